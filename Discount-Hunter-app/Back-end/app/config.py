@@ -1,6 +1,28 @@
 from functools import lru_cache
+from pathlib import Path
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings
-from pydantic import Field
+from pydantic import BaseModel, Field
+
+
+class StoreConfig(BaseModel):
+    """One store the scrapers can target."""
+
+    name: str = Field(..., description="Store name used in results and in per-request store lists")
+    scraper: str = Field(
+        ...,
+        description="Scraper class as 'module:Class', or the name of a 'discount_hunter.scrapers' entry point",
+    )
+    search_url: str = Field(..., description="Search page URL with a {query} placeholder")
+    enabled: bool = True
+    concurrency: Optional[int] = Field(
+        default=None, ge=1, description="Concurrent requests to this store; defaults to STORE_CONCURRENCY"
+    )
+    timeout_seconds: Optional[float] = Field(
+        default=None, ge=1.0, description="ScrapingBee timeout for this store; defaults to request_timeout_seconds"
+    )
+    render_js: bool = True
+    wait_ms: int = Field(default=2000, ge=0, description="How long ScrapingBee lets the page render")
 
 
 class Settings(BaseSettings):
@@ -11,27 +33,38 @@ class Settings(BaseSettings):
         validation_alias="SCRAPINGBEE_API_KEY",
         description="API key for ScrapingBee",
     )
+    scrapingbee_base_url: str = Field(
+        default="https://app.scrapingbee.com/api/v1/",
+        validation_alias="SCRAPINGBEE_BASE_URL",
+        description="ScrapingBee API endpoint; point at a local stand-in for load tests",
+    )
     request_timeout_seconds: float = Field(
         default=30.0,
         ge=1.0,
         description="Timeout for outbound HTTP calls to ScrapingBee",
     )
-    stores: list[dict[str, str]] = Field(
+    stores: list[StoreConfig] = Field(
         default_factory=lambda: [
-            {
-                "name": "Maxima",
-                "search_url": "https://www.barbora.lt/paieska?q={query}",
-            },
-            {
-                "name": "Rimi",
-                "search_url": "https://www.rimi.lt/e-parduotuve/lt/paieska?query={query}",
-            },
-            {
-                "name": "Lidl",
-                "search_url": "https://www.lidl.lt/c/search?q={query}",
-            },
+            StoreConfig(
+                name="Barbora",
+                scraper="app.scrapers.store_barbora:BarboraScraper",
+                search_url="https://www.barbora.lt/paieska?q={query}",
+            ),
+            StoreConfig(
+                name="Rimi",
+                scraper="app.scrapers.store_rimi:RimiScraper",
+                search_url="https://www.rimi.lt/e-parduotuve/lt/paieska?query={query}",
+                # Rimi renders slowly; give it extra time
+                wait_ms=4000,
+            ),
+            StoreConfig(
+                name="Lidl",
+                scraper="app.scrapers.store_lidl:LidlScraper",
+                search_url="https://www.lidl.lt/c/search?q={query}",
+            ),
         ],
-        description="List of store descriptors the scraper should target",
+        validation_alias="STORES",
+        description="Stores the scrapers target, as a JSON list in the STORES variable",
     )
 
     class Config:
@@ -47,6 +80,184 @@ class Settings(BaseSettings):
         description="API key for OCR.space (optional, falls back to mock)",
     )
 
+    log_level: str = Field(
+        default="INFO",
+        validation_alias="LOG_LEVEL",
+        description="Level for the app loggers",
+    )
+    log_debug_sample_rate: float = Field(
+        default=0.1,
+        ge=0.0,
+        le=1.0,
+        validation_alias="LOG_DEBUG_SAMPLE_RATE",
+        description="Fraction of DEBUG records that are written",
+    )
+
+    admin_token: str = Field(
+        default="",
+        validation_alias="ADMIN_TOKEN",
+        description="Token for /api/admin endpoints (X-Admin-Token); admin is disabled when empty",
+    )
+    profile_sample_rate: float = Field(
+        default=0.0,
+        ge=0.0,
+        le=1.0,
+        validation_alias="PROFILE_SAMPLE_RATE",
+        description="Fraction of scrape jobs sampled by the stack profiler",
+    )
+    profile_interval_ms: float = Field(
+        default=10.0,
+        gt=0.0,
+        validation_alias="PROFILE_INTERVAL_MS",
+        description="Stack sampling interval for profiled jobs",
+    )
+    profile_dir: str = Field(
+        default=str(Path(__file__).resolve().parent.parent / "profiles"),
+        validation_alias="PROFILE_DIR",
+        description="Where collapsed-stack profiles are written",
+    )
+
+    archive_pages: bool = Field(
+        default=False,
+        validation_alias="ARCHIVE_PAGES",
+        description="Keep a compressed copy of every page fetched from ScrapingBee",
+    )
+    archive_dir: str = Field(
+        default=str(Path(__file__).resolve().parent.parent / "archive"),
+        validation_alias="ARCHIVE_DIR",
+        description="Where archived pages are stored",
+    )
+    archive_max_mb: float = Field(
+        default=500.0,
+        gt=0,
+        validation_alias="ARCHIVE_MAX_MB",
+        description="Compressed archive size above which the oldest pages are deleted",
+    )
+    parse_cache_size: int = Field(
+        default=512,
+        ge=0,
+        validation_alias="PARSE_CACHE_SIZE",
+        description="Parsed product grids kept for reuse when a page hasn't changed",
+    )
+    scrape_replay: bool = Field(
+        default=False,
+        validation_alias="SCRAPE_REPLAY",
+        description="Serve store pages from the archive instead of ScrapingBee",
+    )
+
+    store_concurrency: int = Field(
+        default=4,
+        ge=1,
+        validation_alias="STORE_CONCURRENCY",
+        description="Maximum concurrent ScrapingBee requests per store",
+    )
+    basket_store_overhead: float = Field(
+        default=0.0,
+        ge=0,
+        validation_alias="BASKET_STORE_OVERHEAD",
+        description="Cost added per store used when splitting a basket (delivery fee, extra trip)",
+    )
+    basket_min_relevance: float = Field(
+        default=0.6,
+        ge=0,
+        le=1,
+        validation_alias="BASKET_MIN_RELEVANCE",
+        description="IDF-weighted share of a shopping-list item's words a result must contain to be priced",
+    )
+
+    catalog_ttl_seconds: float = Field(
+        default=6 * 60 * 60,
+        ge=0.0,
+        description="How long catalog entries answer searches before a live re-scrape",
+    )
+
+    state_backend: Literal["memory", "sqlite"] = Field(
+        default="memory",
+        validation_alias="STATE_BACKEND",
+        description="Where jobs live: 'memory' for one process, 'sqlite' to share them between workers",
+    )
+    state_db_path: str = Field(
+        default=str(Path(__file__).resolve().parent.parent / "state.db"),
+        validation_alias="STATE_DB_PATH",
+        description="SQLite file shared by the workers when STATE_BACKEND is 'sqlite'",
+    )
+    state_retention_seconds: float = Field(
+        default=24 * 60 * 60,
+        gt=0,
+        validation_alias="STATE_RETENTION_SECONDS",
+        description="How long jobs stay in the shared state after their last update",
+    )
+    state_poll_ms: float = Field(
+        default=200.0,
+        gt=0,
+        validation_alias="STATE_POLL_MS",
+        description="How often a long-poll for a job running on another worker checks for updates",
+    )
+    state_busy_timeout_ms: float = Field(
+        default=200.0,
+        gt=0,
+        validation_alias="STATE_BUSY_TIMEOUT_MS",
+        description="Longest a shared-state read on the event loop waits for a locked database",
+    )
+
+    watch_interval_seconds: Optional[float] = Field(
+        default=None,
+        gt=0,
+        validation_alias="WATCH_INTERVAL_SECONDS",
+        description="How often the watchlist is evaluated in the background (live scrapes cost credits); off when unset",
+    )
+    watch_concurrency: int = Field(
+        default=4,
+        ge=1,
+        validation_alias="WATCH_CONCURRENCY",
+        description="Watched products fetched at the same time during a cycle",
+    )
+
+    rate_limit_enabled: bool = Field(
+        default=True,
+        validation_alias="RATE_LIMIT_ENABLED",
+        description="Apply the per-client API rate limits",
+    )
+    rate_limits: dict[str, str] = Field(
+        default_factory=lambda: {
+            # Scrape requests some store has to be scraped live for (per query in a batch)
+            "live_scrape": "10/minute",
+            # Scrape requests the catalog answers entirely
+            "cached_scrape": "120/minute",
+            "poll": "1200/minute",
+            "auth": "20/minute",
+            "ocr": "20/minute",
+            "default": "300/minute",
+        },
+        validation_alias="RATE_LIMITS",
+        description='Requests per client for each endpoint class, e.g. {"live_scrape": "10/minute"}; classes left out are not limited',
+    )
+    rate_limit_sync_seconds: float = Field(
+        default=1.0,
+        gt=0,
+        validation_alias="RATE_LIMIT_SYNC_SECONDS",
+        description="How often workers exchange rate-limit counts through the shared state",
+    )
+
+    compression_min_bytes: int = Field(
+        default=1024,
+        ge=0,
+        validation_alias="COMPRESSION_MIN_BYTES",
+        description="JSON responses at least this large are gzip/brotli compressed when the client accepts it",
+    )
+    finished_job_max_age: int = Field(
+        default=60 * 60,
+        ge=0,
+        validation_alias="FINISHED_JOB_MAX_AGE",
+        description="Cache-Control max-age for finished jobs, whose responses never change",
+    )
+    listing_max_age: int = Field(
+        default=60,
+        ge=0,
+        validation_alias="LISTING_MAX_AGE",
+        description="Cache-Control max-age for catalog listings such as /api/discounts",
+    )
+
 
 @lru_cache(maxsize=1)
 def get_settings() -> Settings:
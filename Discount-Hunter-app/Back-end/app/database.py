@@ -8,6 +8,8 @@ def get_db_connection():
     """Get a database connection."""
     conn = sqlite3.connect(str(DATABASE_PATH))
     conn.row_factory = sqlite3.Row
+    # Off by default in SQLite; needed for ON DELETE CASCADE
+    conn.execute("PRAGMA foreign_keys = ON")
     return conn
 
 def init_db():
@@ -26,10 +28,47 @@ def init_db():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     """)
-    
+
+    # Price-drop watches and the notifications they raise
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS watches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            query TEXT NOT NULL,
+            target_price REAL NOT NULL,
+            stores TEXT,
+            last_price REAL,
+            notified_price REAL,
+            checked_at REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_watches_user ON watches (user_id)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS notifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            watch_id INTEGER NOT NULL,
+            query TEXT NOT NULL,
+            store TEXT NOT NULL,
+            title TEXT NOT NULL,
+            price REAL NOT NULL,
+            target_price REAL NOT NULL,
+            url TEXT,
+            created_at REAL NOT NULL,
+            delivered_at REAL
+        )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_notifications_pending ON notifications (user_id, delivered_at)"
+    )
+    # One row per periodic job; workers race to advance started_at
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS watch_cycles (
+            name TEXT PRIMARY KEY,
+            started_at REAL NOT NULL
+        )
+    """)
+
     conn.commit()
     conn.close()
-
-# Initialize database on import
-if not DATABASE_PATH.exists():
-    init_db()
@@ -0,0 +1,144 @@
+"""Structured, non-blocking logging.
+
+Application loggers (``logging.getLogger(__name__)`` under ``app``) hand
+records to a `QueueHandler`; a background `QueueListener` thread formats
+them as one JSON object per line and writes them to stdout, so the event
+loop never blocks on terminal or pipe I/O.
+
+Records carry ``job_id`` and ``store`` from the current `log_context`, and
+DEBUG records are sampled at ``LOG_DEBUG_SAMPLE_RATE``.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Iterator, Optional
+
+
+job_id_var: ContextVar[Optional[str]] = ContextVar("log_job_id", default=None)
+store_var: ContextVar[Optional[str]] = ContextVar("log_store", default=None)
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+
+
+@contextmanager
+def log_context(*, job_id: Optional[str] = None, store: Optional[str] = None) -> Iterator[None]:
+    """Attach `job_id` / `store` to every record logged inside the block."""
+    tokens = []
+    if job_id is not None:
+        tokens.append((job_id_var, job_id_var.set(job_id)))
+    if store is not None:
+        tokens.append((store_var, store_var.set(store)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copy the correlation fields onto the record in the caller's context."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "job_id", None) is None:
+            record.job_id = job_id_var.get()
+        if getattr(record, "store", None) is None:
+            record.store = store_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Let through only `rate` of DEBUG records; other levels always pass."""
+
+    def __init__(self, rate: float = 1.0) -> None:
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or self.rate >= 1.0 or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and value is not None:
+                payload[key] = value
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        elif record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(QueueHandler):
+    """Queue records with their message merged, leaving JSON formatting to the listener."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(level: str = "INFO", debug_sample_rate: float = 1.0) -> None:
+    """Route the ``app`` loggers through a queue to a JSON stdout handler.
+
+    Safe to call more than once; later calls only update level and sampling.
+    """
+    global _listener
+    logger = logging.getLogger("app")
+    logger.setLevel(level.upper())
+    logger.propagate = False
+
+    if _listener is not None:
+        for handler in logger.handlers:
+            for f in handler.filters:
+                if isinstance(f, SamplingFilter):
+                    f.rate = debug_sample_rate
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter())
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    handler = _QueueHandler(records)
+    handler.addFilter(SamplingFilter(debug_sample_rate))
+    handler.addFilter(ContextFilter())
+    logger.addHandler(handler)
+
+    _listener = QueueListener(records, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
+    logger = logging.getLogger("app")
+    for handler in list(logger.handlers):
+        if isinstance(handler, _QueueHandler):
+            logger.removeHandler(handler)
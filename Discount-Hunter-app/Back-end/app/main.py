@@ -1,20 +1,64 @@
 import asyncio
+import logging
+import math
+import time
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime
 from uuid import uuid4
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, PlainTextResponse, Response
 
 from app import schemas
-from app.services.scraping import scrape_all_stores
-from app.services.price_utils import sanitize_prices, add_price_statistics
+from app.compression import CompressionMiddleware
+from app.config import get_settings
+from app.log import configure_logging, log_context, shutdown_logging
+from app.metrics import JOB_SECONDS, monitor_event_loop_lag, render_metrics, stage_timer, track_job
+from app.profiling import get_profiler
+from app.ratelimit import get_limiter, run_sync
+from app.records import ScrapedItem
+from app.shared import get_shared_state
+from app.serialization import dumps, etag_for, etag_matches
+from app.scrapers import UnknownStoreError, get_registry
+from app.scrapers.scrapingbee import close_client
+from app.services.catalog import catalog
+from app.services.scraping import needs_live_scrape, scrape_all_stores, scrape_many
+from app.services.price_utils import sanitize_prices, basket_totals
+from app.services.watchlist import (
+    add_watch, delete_watch, evaluate_watches, list_watches, run_watch_cycles, take_notifications,
+)
 from app.state import job_store
+from app.database import init_db
 from app.services.ocr import ocr_from_file
-from app.services.auth import register_user, login_user, get_user_by_token
+from app.services.auth import register_user, login_user, get_user_by_token, verify_token
 from fastapi import File, UploadFile
 from app.schemas import OCRResponse
 
-app = FastAPI(title="Discount Hunter API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    configure_logging(settings.log_level, settings.log_debug_sample_rate)
+    init_db()
+    background = [asyncio.create_task(monitor_event_loop_lag())]
+    if settings.watch_interval_seconds:
+        background.append(asyncio.create_task(
+            run_watch_cycles(settings.watch_interval_seconds, settings.watch_concurrency)
+        ))
+    if get_shared_state() is not None:
+        background.append(asyncio.create_task(run_sync(get_limiter(), settings.rate_limit_sync_seconds)))
+    yield
+    for task in background:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await close_client()
+    shutdown_logging()
+
+
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="Discount Hunter API", lifespan=lifespan)
 
 # Allow CORS from the frontend host(s)
 allowed_origins = [
@@ -31,6 +75,80 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=get_settings().compression_min_bytes)
+
+
+# ============================================================================
+# RATE LIMITING
+# ============================================================================
+
+# token -> (user id or None, when to verify it again); a token is never trusted past its exp
+_token_users: dict[str, tuple[int | None, float]] = {}
+_TOKEN_CACHE_SIZE = 4096
+_TOKEN_CACHE_SECONDS = 60.0
+
+
+def _token_user(token: str, now: float | None = None) -> int | None:
+    now = time.time() if now is None else now
+    cached = _token_users.get(token)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+    payload = verify_token(token)
+    user_id = payload["user_id"] if payload else None
+    recheck = now + _TOKEN_CACHE_SECONDS
+    if payload and "exp" in payload:
+        recheck = min(recheck, payload["exp"])
+    if len(_token_users) >= _TOKEN_CACHE_SIZE:
+        for key, (_, until) in list(_token_users.items()):
+            if until <= now:
+                del _token_users[key]
+        if len(_token_users) >= _TOKEN_CACHE_SIZE:
+            _token_users.clear()
+    _token_users[token] = (user_id, recheck)
+    return user_id
+
+
+def _client_key(request: Request) -> str:
+    """Who a request counts against: the token's user, or the client address."""
+    token = request.query_params.get("token")
+    if not token:
+        authorization = request.headers.get("authorization", "")
+        token = authorization[7:] if authorization[:7].lower() == "bearer " else None
+    # Unverified tokens would give every made-up token a fresh quota
+    user_id = _token_user(token) if token else None
+    if user_id is not None:
+        return f"user:{user_id}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def _charge(request: Request, costs: dict[str, int]) -> None:
+    """Count a request's costs against their rules, all or none of them."""
+    refused = get_limiter().hit_many(costs, _client_key(request))
+    if refused is None:
+        return
+    rule, retry_after = refused
+    if math.isinf(retry_after):
+        # Waiting wouldn't help, so don't send a Retry-After that can't succeed
+        limit = get_limiter().rules[rule]
+        raise HTTPException(
+            status_code=413,
+            detail=(
+                f"Request costs {costs[rule]} against the {rule} limit of {limit.limit} per"
+                f" {limit.window:g} s; split it into smaller requests"
+            ),
+        )
+    raise HTTPException(
+        status_code=429,
+        detail=f"Rate limit exceeded ({rule})",
+        headers={"Retry-After": str(math.ceil(retry_after))},
+    )
+
+
+def rate_limited(rule: str):
+    """Dependency charging one request against `rule`."""
+    async def check(request: Request) -> None:
+        _charge(request, {rule: 1})
+    return Depends(check)
 
 
 @app.get("/healthz", tags=["health"])
@@ -38,11 +156,17 @@ async def health_check() -> dict[str, str]:
     return {"status": "ok", "timestamp": datetime.utcnow().isoformat()}
 
 
+@app.get("/metrics", tags=["health"], response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Prometheus text exposition of the process metrics."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 # ============================================================================
 # AUTH ENDPOINTS
 # ============================================================================
 
-@app.post("/api/auth/register", response_model=schemas.AuthResponse, tags=["auth"])
+@app.post("/api/auth/register", response_model=schemas.AuthResponse, tags=["auth"], dependencies=[rate_limited("auth")])
 async def register(request: schemas.RegisterRequest) -> schemas.AuthResponse:
     """Register a new user."""
     try:
@@ -57,7 +181,7 @@ async def register(request: schemas.RegisterRequest) -> schemas.AuthResponse:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@app.post("/api/auth/login", response_model=schemas.AuthResponse, tags=["auth"])
+@app.post("/api/auth/login", response_model=schemas.AuthResponse, tags=["auth"], dependencies=[rate_limited("auth")])
 async def login(request: schemas.LoginRequest) -> schemas.AuthResponse:
     """Login a user."""
     try:
@@ -67,29 +191,105 @@ async def login(request: schemas.LoginRequest) -> schemas.AuthResponse:
         raise HTTPException(status_code=401, detail=str(e))
 
 
-@app.get("/api/auth/me", response_model=dict, tags=["auth"])
-async def get_current_user(token: str = Query(...)) -> dict:
-    """Get current user from token."""
+def require_user(token: str = Query(...)) -> dict:
+    """Dependency resolving the `token` query parameter to its user, or 401."""
     user = get_user_by_token(token)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid token")
     return user
 
 
+@app.get("/api/auth/me", response_model=dict, tags=["auth"], dependencies=[rate_limited("default")])
+async def get_current_user(user: dict = Depends(require_user)) -> dict:
+    """Get current user from token."""
+    return user
+
+
+# ============================================================================
+# WATCHLIST ENDPOINTS
+# ============================================================================
+
+@app.get("/api/watchlist", response_model=list[schemas.WatchResponse], tags=["watchlist"], dependencies=[rate_limited("default")])
+def get_watchlist(user: dict = Depends(require_user)) -> list[dict]:
+    return [watch.to_api() for watch in list_watches(user["userId"])]
+
+
+@app.post("/api/watchlist", response_model=schemas.WatchResponse, tags=["watchlist"], dependencies=[rate_limited("default")])
+def create_watch(request: schemas.WatchRequest, user: dict = Depends(require_user)) -> dict:
+    """Watch a product and get notified when it drops to the target price."""
+    stores = _requested_stores(request.stores) if request.stores else None
+    try:
+        watch = add_watch(user["userId"], request.query, request.targetPrice, stores)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return watch.to_api()
+
+
+@app.delete("/api/watchlist/{watch_id}", tags=["watchlist"], dependencies=[rate_limited("default")])
+def remove_watch(watch_id: int, user: dict = Depends(require_user)) -> dict[str, str]:
+    if not delete_watch(user["userId"], watch_id):
+        raise HTTPException(status_code=404, detail="Watch not found")
+    return {"status": "deleted"}
+
+
+@app.get("/api/notifications", response_model=list[schemas.NotificationResponse], tags=["watchlist"], dependencies=[rate_limited("default")])
+def get_notifications(user: dict = Depends(require_user)) -> list[dict]:
+    """Undelivered price-drop notifications; each is returned once."""
+    return take_notifications(user["userId"])
+
+
 # ============================================================================
 # SCRAPING ENDPOINTS
 # ============================================================================
 
+@app.get("/api/stores", response_model=list[str], tags=["scraping"], dependencies=[rate_limited("default")])
+async def list_stores(if_none_match: str | None = Header(default=None)) -> Response:
+    """Stores a scrape request can select."""
+    return _listing_response(get_registry().names(), if_none_match)
+
+
+@app.get("/api/discounts", response_model=list[schemas.StoreResult], tags=["scraping"], dependencies=[rate_limited("default")])
+async def list_discounts(
+    store: list[str] | None = Query(default=None, description="Stores to list; all stores when omitted"),
+    min_percent: float = Query(default=0, ge=0, le=100, alias="minPercent"),
+    limit: int = Query(default=50, ge=1, le=500),
+    if_none_match: str | None = Header(default=None),
+) -> Response:
+    """Discounted products seen in recent scrapes, biggest discount first. Never scrapes."""
+    stores = _requested_stores(store) if store else None
+    shared = get_shared_state()
+    if shared is not None:
+        shared.sync_catalog(catalog)
+    entries = catalog.discounted(stores, min_percent=min_percent, max_age=get_settings().catalog_ttl_seconds)
+    return _listing_response([
+        # lastUpdated is when the catalog saw the offer, so unchanged listings keep their ETag
+        {**entry.to_item().to_api(), "lastUpdated": datetime.utcfromtimestamp(entry.updated_at).isoformat()}
+        for entry in entries[:limit]
+    ], if_none_match)
+
+
+def _listing_response(data, if_none_match: str | None) -> Response:
+    """JSON response with a content ETag that intermediaries may cache briefly."""
+    body = dumps(data)
+    headers = {"ETag": etag_for(body), "Cache-Control": f"public, max-age={get_settings().listing_max_age}"}
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
 @app.post(
     "/api/scrape",
     response_model=schemas.ScrapeTriggerResponse,
     tags=["scraping"],
 )
-async def start_scrape(request: schemas.ScrapeRequest) -> schemas.ScrapeTriggerResponse:
+async def start_scrape(request: schemas.ScrapeRequest, http_request: Request) -> schemas.ScrapeTriggerResponse:
+    stores = _requested_stores(request.stores)
+    # A request the catalog can answer costs no credits, so it has its own, larger quota
+    _charge(http_request, {"live_scrape" if needs_live_scrape(request.query, stores) else "cached_scrape": 1})
     job_id = str(uuid4())
     await job_store.create_job(job_id)
 
-    asyncio.create_task(_run_scrape_job(job_id, request.query))
+    asyncio.create_task(_run_scrape_job(job_id, request.query, stores))
 
     return schemas.ScrapeTriggerResponse(jobId=job_id)
 
@@ -98,52 +298,246 @@ async def start_scrape(request: schemas.ScrapeRequest) -> schemas.ScrapeTriggerR
     "/api/scrape/{job_id}",
     response_model=schemas.JobStatusResponse,
     tags=["scraping"],
+    dependencies=[rate_limited("poll")],
 )
-async def get_job_status(job_id: str) -> schemas.JobStatusResponse:
+async def get_job_status(
+    job_id: str,
+    wait: float = Query(default=0, ge=0, le=30, description="Seconds to hold the request until the job changes"),
+    if_none_match: str | None = Header(default=None),
+) -> Response:
     record = await job_store.get_record(job_id)
-    if not record:
+    if not record or record.kind != "scrape":
         raise HTTPException(status_code=404, detail="Job not found")
 
-    return schemas.JobStatusResponse(
+    return await _job_response(record, wait, if_none_match, lambda: schemas.JobStatusResponse(
         status=record.status,
-        data=record.data,
+        data=[item.to_api() for item in record.data] if record.data is not None else None,
         error=record.error,
+        timings=record.timings or None,
+    ))
+
+
+@app.post(
+    "/api/scrape/batch",
+    response_model=schemas.ScrapeTriggerResponse,
+    tags=["scraping"],
+)
+async def start_batch_scrape(
+    request: schemas.BatchScrapeRequest, http_request: Request
+) -> schemas.ScrapeTriggerResponse:
+    """Scrape a whole shopping list as one job."""
+    stores = _requested_stores(request.stores)
+    queries = list(dict.fromkeys(q for q in request.queries if q))
+    live = sum(needs_live_scrape(query, stores) for query in queries)
+    _charge(http_request, {"live_scrape": live, "cached_scrape": len(queries) - live})
+    job_id = str(uuid4())
+    await job_store.create_job(job_id, kind="batch")
+
+    asyncio.create_task(_run_batch_job(job_id, request.queries, stores))
+
+    return schemas.ScrapeTriggerResponse(jobId=job_id)
+
+
+@app.get(
+    "/api/scrape/batch/{job_id}",
+    response_model=schemas.BatchJobStatusResponse,
+    tags=["scraping"],
+    dependencies=[rate_limited("poll")],
+)
+async def get_batch_job_status(
+    job_id: str,
+    wait: float = Query(default=0, ge=0, le=30, description="Seconds to hold the request until the job changes"),
+    if_none_match: str | None = Header(default=None),
+) -> Response:
+    record = await job_store.get_record(job_id)
+    if not record or record.kind != "batch":
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return await _job_response(record, wait, if_none_match, lambda: _batch_status(record))
+
+
+def _batch_status(record) -> schemas.BatchJobStatusResponse:
+    basket = record.summary
+    return schemas.BatchJobStatusResponse(
+        status=record.status,
+        items=[
+            {"query": entry["query"], "results": [item.to_api() for item in entry["results"]]}
+            for entry in record.data
+        ] if record.data is not None else None,
+        basket=schemas.BasketSummary(
+            stores=basket["stores"],
+            cheapestStore=basket["cheapest_store"],
+            cheapestTotal=basket["cheapest_total"],
+            bestSingle=basket["best_single"],
+            bestSplit=basket["best_split"],
+            unavailable=basket["unavailable"],
+        ) if basket else None,
+        error=record.error,
+        timings=record.timings or None,
     )
 
 
-async def _run_scrape_job(job_id: str, query: str) -> None:
-    await job_store.update_job(job_id, status="running")
+def _requested_stores(stores: list[str] | None) -> list[str]:
     try:
-        results = await scrape_all_stores(query)
-        # Filter out results with very low confidence (likely irrelevant)
-        filtered = [r for r in results if r.get('confidence', 0) >= 0.15 or r.get('price') is None]  # Lowered from 0.3 to 0.15
-        # Sanitize prices to remove outliers and invalid data
+        return get_registry().select(stores)
+    except UnknownStoreError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+async def _job_response(record, wait: float, if_none_match: str | None, build) -> Response:
+    """Serve a job status, long-polling and honouring ETags.
+
+    With `wait`, an unfinished job is held until its next update (or the
+    timeout) unless the client's If-None-Match shows it hasn't seen the
+    current state yet. Unfinished jobs are tagged by `updated_at`; a finished
+    job's response never changes, so its bytes and ETag are kept on the record
+    and repeat polls skip validation and encoding entirely; it is also marked
+    cacheable by intermediaries. `build` returns the status model.
+    """
+    finished = ("completed", "failed")
+    if wait and record.status not in finished and (
+        not if_none_match or etag_matches(if_none_match, record.version)
+    ):
+        await record.wait_for_change(wait)
+
+    if record.status not in finished:
+        # Clients may keep it, but must revalidate: the next poll may differ
+        headers = {"ETag": record.version, "Cache-Control": "no-cache"}
+        if etag_matches(if_none_match, record.version):
+            return Response(status_code=304, headers=headers)
+        return Response(dumps(build().model_dump(mode="json")), media_type="application/json", headers=headers)
+
+    if record.payload is None:
+        record.payload = dumps(build().model_dump(mode="json"))
+        record.etag = etag_for(record.payload)
+    headers = {
+        "ETag": record.etag,
+        "Cache-Control": f"public, max-age={get_settings().finished_job_max_age}, immutable",
+    }
+    if etag_matches(if_none_match, record.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(record.payload, media_type="application/json", headers=headers)
+
+
+def _rank_results(results: list[ScrapedItem]) -> list[ScrapedItem]:
+    """Drop irrelevant and outlier prices, best match first."""
+    # Filter out results with very low confidence (likely irrelevant)
+    filtered = [r for r in results if r.confidence >= 0.15 or r.price is None]  # Lowered from 0.3 to 0.15
+    # Sanitize prices to remove outliers and invalid data
+    with stage_timer("sanitize"):
         sanitized = sanitize_prices(filtered)
-        # Add statistics
-        stats = add_price_statistics(sanitized)
-        # Sort by confidence (highest first) then price (lowest first)
-        sanitized.sort(key=lambda x: (-(x.get('confidence') or 0), x.get('price') or float('inf')))
-    except Exception as exc:
-        await job_store.update_job(job_id, status="failed", error=str(exc))
-        return
+    # Sort by confidence (highest first) then price (lowest first)
+    with stage_timer("sort"):
+        sanitized.sort(key=lambda x: (-(x.confidence or 0), x.price or float('inf')))
+    return sanitized
+
+
+async def _run_scrape_job(job_id: str, query: str, stores: list[str]) -> None:
+    record = await job_store.update_job(job_id, status="running")
+    start = time.perf_counter()
+    async with get_profiler().job(job_id):
+        with track_job(record.timings), log_context(job_id=job_id):
+            try:
+                results = await scrape_all_stores(query, stores)
+                sanitized = _rank_results(results)
+            except Exception as exc:
+                _record_job_time(record, start, "failed")
+                logger.exception("Scrape job failed", extra={"query": query})
+                await job_store.update_job(job_id, status="failed", error=str(exc))
+                return
+
+            _record_job_time(record, start, "completed")
+            logger.info(
+                "Scrape job completed",
+                extra={"query": query, "results": len(sanitized), "seconds": record.timings["total"]},
+            )
+        await job_store.update_job(job_id, status="completed", data=sanitized)
+
+
+async def _run_batch_job(job_id: str, queries: list[str], stores: list[str]) -> None:
+    record = await job_store.update_job(job_id, status="running")
+    start = time.perf_counter()
+    async with get_profiler().job(job_id):
+        with track_job(record.timings), log_context(job_id=job_id):
+            try:
+                by_query = await scrape_many(queries, stores)
+                ranked = {query: _rank_results(results) for query, results in by_query.items()}
+                settings = get_settings()
+                basket = basket_totals(ranked, settings.basket_store_overhead, settings.basket_min_relevance)
+            except Exception as exc:
+                _record_job_time(record, start, "failed")
+                logger.exception("Batch scrape job failed", extra={"queries": len(queries)})
+                await job_store.update_job(job_id, status="failed", error=str(exc))
+                return
+
+            _record_job_time(record, start, "completed")
+            logger.info(
+                "Batch scrape job completed",
+                extra={"queries": len(ranked), "seconds": record.timings["total"]},
+            )
+        items = [{"query": query, "results": results} for query, results in ranked.items()]
+        await job_store.update_job(job_id, status="completed", data=items, summary=basket)
+
+
+def _record_job_time(record, start: float, status: str) -> None:
+    elapsed = time.perf_counter() - start
+    record.timings["total"] = round(elapsed, 6)
+    JOB_SECONDS.observe(elapsed, status=status)
+
+
+# ============================================================================
+# ADMIN ENDPOINTS
+# ============================================================================
+
+def require_admin(x_admin_token: str = Header(default="")) -> None:
+    admin_token = get_settings().admin_token
+    if not admin_token or x_admin_token != admin_token:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+
+@app.post("/api/admin/profiles/{job_id}", tags=["admin"], dependencies=[Depends(require_admin)])
+async def start_job_profile(job_id: str) -> dict[str, str]:
+    """Start sampling a running scrape job; the profile is saved when it ends."""
+    if not get_profiler().start(job_id):
+        raise HTTPException(status_code=404, detail="Job is not running")
+    return {"status": "profiling", "jobId": job_id}
+
+
+@app.post("/api/admin/watchlist/evaluate", tags=["admin"], dependencies=[Depends(require_admin)])
+async def evaluate_watchlist() -> dict[str, int]:
+    """Run a watchlist cycle now instead of waiting for the next one."""
+    return await evaluate_watches(concurrency=get_settings().watch_concurrency)
+
+
+@app.get("/api/admin/profiles", tags=["admin"], dependencies=[Depends(require_admin)])
+async def list_job_profiles() -> list[dict]:
+    return [
+        {"jobId": path.stem, "bytes": path.stat().st_size, "modified": datetime.utcfromtimestamp(path.stat().st_mtime)}
+        for path in get_profiler().list_profiles()
+    ]
+
 
-    await job_store.update_job(job_id, status="completed", data=sanitized)
+@app.get("/api/admin/profiles/{job_id}", tags=["admin"], dependencies=[Depends(require_admin)])
+async def get_job_profile(job_id: str) -> FileResponse:
+    """Collapsed-stack profile for `job_id` (flamegraph.pl / speedscope input)."""
+    path = get_profiler().path_for(job_id)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=path.name)
 
 
-@app.post("/api/ocr", response_model=OCRResponse, tags=["ocr"])
+@app.post("/api/ocr", response_model=OCRResponse, tags=["ocr"], dependencies=[rate_limited("ocr")])
 async def upload_and_ocr(file: UploadFile = File(...)) -> OCRResponse:
     """Accept an uploaded image and return a best-effort product name.
 
     Falls back to a mocked product name when no OCR provider key is configured.
     """
     try:
-        print(f"[OCR] Received file: {file.filename}, content_type: {file.content_type}")
+        logger.info("OCR upload received", extra={"filename": file.filename, "content_type": file.content_type})
         product_name = await ocr_from_file(file)
-        print(f"[OCR] Successfully extracted: {product_name}")
+        logger.info("OCR extracted product name", extra={"product_name": product_name})
     except Exception as exc:
-        print(f"[OCR] ERROR: {type(exc).__name__}: {str(exc)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("OCR failed")
         raise HTTPException(status_code=500, detail=str(exc))
 
     return OCRResponse(productName=product_name)
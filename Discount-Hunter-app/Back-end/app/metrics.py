@@ -0,0 +1,226 @@
+"""Process-local metrics with Prometheus text exposition.
+
+Scrape jobs are broken into stages (ScrapingBee fetch, page trimming, soup
+construction, card scanning, normalization, matching, sanitizing, sorting).
+`stage_timer` observes each stage in a histogram labelled by stage and store
+and, when a job is being tracked with `track_job`, adds the duration to that
+job's timings dict so it ends up on the `JobRecord`.
+"""
+
+import asyncio
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text format: backslash, double quote and newline."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, object]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> Iterator[str]:
+        ...
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: object) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[str]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {value:g}"
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: object) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def value(self, **labels: object) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[str]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {value:g}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., +Inf count, sum]
+        self._series: dict[LabelValues, list[float]] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def count(self, **labels: object) -> int:
+        series = self._series.get(self._key(labels))
+        return int(series[-2]) if series else 0
+
+    def samples(self) -> Iterator[str]:
+        for key, series in sorted(self._series.items()):
+            for bound, bucket_count in zip(self.buckets, series):
+                le = _format_labels(self.labelnames, key, f'le="{bound:g}"')
+                yield f"{self.name}_bucket{le} {bucket_count:g}"
+            inf = _format_labels(self.labelnames, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{inf} {series[-2]:g}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-2]:g}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-1]:g}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    "discount_hunter_stage_seconds",
+    "Time spent in each scrape pipeline stage",
+    ("stage", "store"),
+))
+JOB_SECONDS = registry.register(Histogram(
+    "discount_hunter_job_seconds",
+    "End-to-end scrape job duration",
+    ("status",),
+))
+CATALOG_LOOKUPS = registry.register(Counter(
+    "discount_hunter_catalog_lookups_total",
+    "Per-store catalog lookups, by hit or miss",
+    ("store", "result"),
+))
+PARSE_CACHE = registry.register(Counter(
+    "discount_hunter_parse_cache_total",
+    "Parsed page cache lookups by store, by hit or miss",
+    ("store", "result"),
+))
+SCRAPINGBEE_REQUESTS = registry.register(Counter(
+    "discount_hunter_scrapingbee_requests_total",
+    "ScrapingBee API requests by HTTP status",
+    ("status",),
+))
+SCRAPINGBEE_CREDITS = registry.register(Counter(
+    "discount_hunter_scrapingbee_credits_total",
+    "ScrapingBee credits spent (Spb-cost header)",
+))
+EVENT_LOOP_LAG = registry.register(Gauge(
+    "discount_hunter_event_loop_lag_seconds",
+    "How late the last event loop lag probe woke up",
+))
+
+
+_job_timings: ContextVar[Optional[dict[str, float]]] = ContextVar("job_timings", default=None)
+
+
+@contextmanager
+def track_job(timings: dict[str, float]) -> Iterator[dict[str, float]]:
+    """Collect every `stage_timer` in this context into `timings`."""
+    token = _job_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _job_timings.reset(token)
+
+
+@contextmanager
+def stage_timer(stage: str, store: str = "") -> Iterator[None]:
+    """Time a pipeline stage for the histogram and the current job's timings."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage, store=store)
+        timings = _job_timings.get()
+        if timings is not None:
+            key = f"{store}.{stage}" if store else stage
+            timings[key] = round(timings.get(key, 0.0) + elapsed, 6)
+
+
+async def monitor_event_loop_lag(interval: float = 0.5) -> None:
+    """Sleep `interval` forever and record how late each wake-up was."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.set(max(0.0, loop.time() - start - interval))
+
+
+def render_metrics() -> str:
+    return registry.render()
@@ -1,20 +1,125 @@
-from typing import List, Dict
+from functools import lru_cache
+from typing import Iterable, List
 import unicodedata
 import re
 
+from app.quantity import fill_unit_price
+from app.records import ScrapedItem
 
+
+# Letters NFKD does not decompose into an ASCII base
+_SPECIAL_FOLDS = {
+    "ł": "l", "đ": "d", "ø": "o", "ß": "ss", "æ": "ae", "œ": "oe", "þ": "th", "ı": "i",
+}
+
+# Spellings of units that should index as one token
+UNIT_ALIASES = {
+    "gr": "g", "gramu": "g", "kilogramu": "kg", "ltr": "l", "litr": "l", "litras": "l",
+    "litrai": "l", "pcs": "vnt",
+}
+
+STOPWORDS = frozenset({"ir", "su", "bei", "ar", "is", "uz", "the", "and", "with"})
+
+
+def _build_fold_table() -> dict[int, str]:
+    """Map lowercase Latin letters with diacritics to their ASCII base."""
+    table: dict[int, str] = {}
+    for code in range(0x80, 0x250):
+        ch = chr(code)
+        base = "".join(c for c in unicodedata.normalize("NFKD", ch) if not unicodedata.combining(c))
+        if ch.islower() and base.isascii() and base.isalpha():
+            table[code] = base.lower()
+    for ch, base in _SPECIAL_FOLDS.items():
+        table[ord(ch)] = base
+    return table
+
+
+FOLD_TABLE = _build_fold_table()
+
+
+def _fold_rest(text: str) -> str:
+    """NFKD-fold what `FOLD_TABLE` doesn't cover (ligatures like "ﬁ", fullwidth forms)."""
+    return "".join(
+        c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c)
+    ).lower()
+
+# Numbers (with decimal point or comma) and runs of letters; everything else
+# separates tokens, so "500g" -> "500 g" and "6x0,5l" -> "6 x 0.5 l"
+_TOKEN = re.compile(r"\d+(?:[.,]\d+)?|[a-z]+")
+
+
+# Normalized words per whitespace-separated chunk ("2,5%", "varškės"). Chunks
+# recur across titles far more than whole titles do, so a cold title is mostly
+# dict hits. Tokens never span whitespace, so this equals folding the whole text.
+_chunk_words: dict[str, tuple[str, ...]] = {}
+_CHUNK_CACHE_SIZE = 65_536
+
+
+def _normalize_chunk(chunk: str) -> tuple[str, ...]:
+    if not chunk.isascii():
+        chunk = chunk.translate(FOLD_TABLE)
+        if not chunk.isascii():
+            chunk = _fold_rest(chunk)
+    words = []
+    for word in _TOKEN.findall(chunk):
+        if "," in word:
+            word = word.replace(",", ".")
+        word = UNIT_ALIASES.get(word, word)
+        if word not in STOPWORDS:
+            words.append(word)
+    return tuple(words)
+
+
+def normalize_words(text: str) -> List[str]:
+    """Fold `text` to ASCII and split it into normalized words.
+
+    Unit spellings are unified and stopwords dropped.
+    """
+    words: List[str] = []
+    for chunk in text.lower().split():
+        normalized = _chunk_words.get(chunk)
+        if normalized is None:
+            if chunk.isdecimal() and chunk.isascii():
+                # Plain numbers are their own word; caching them would only churn the cache
+                words.append(chunk)
+                continue
+            if len(_chunk_words) >= _CHUNK_CACHE_SIZE:
+                _chunk_words.clear()
+            normalized = _chunk_words[chunk] = _normalize_chunk(chunk)
+        words += normalized
+    return words
+
+
+@lru_cache(maxsize=16_384)
 def normalize_title(title: str) -> str:
+    """Return the canonical, space-separated word form of a product title.
+
+    Memoized: the same titles come back from every store and every search.
+    """
     if not title:
         return ""
-    t = title.lower()
-    t = unicodedata.normalize("NFKD", t)
-    t = re.sub(r"[^a-z0-9]+", " ", t)
-    return " ".join(t.split())
+    return " ".join(normalize_words(title))
+
+
+def normalize_titles(titles: Iterable[str]) -> List[str]:
+    return [normalize_title(title) for title in titles]
+
 
+def normalize_results(items: List[ScrapedItem]) -> List[ScrapedItem]:
+    """Add `normalized_title`, `size` and `unit_price`, and drop repeated
+    cards within the same store.
 
-def normalize_results(items: List[Dict]) -> List[Dict]:
+    A store page often lists the same product twice (e.g. in a promo strip and
+    in the grid); only the first card per store/title/price is kept.
+    """
+    seen = set()
+    unique = []
     for item in items:
-        item["normalized_title"] = normalize_title(item.get("title") or "")
-    # Optionally deduplicate by normalized_title + size
-    # Keep as-is for now; callers can sort by unit_price or price
-    return items
+        item.normalized_title = normalize_title(item.title or "")
+        fill_unit_price(item)
+        key = (item.store, item.normalized_title, item.price)
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(item)
+    return unique
@@ -0,0 +1,184 @@
+"""Opt-in sampling profiler for scrape jobs.
+
+A single background thread wakes every ``interval`` seconds while at least
+one job is being profiled. For each profiled job it records one stack:
+
+- when the job's task is the one running on the event loop, the loop
+  thread's real Python stack (parsing, regex scanning, ...);
+- otherwise the chain of coroutines the task is suspended in, under a
+  ``[waiting]`` root (ScrapingBee round trips, locks, sleeps).
+
+Stacks are aggregated and written as collapsed-stack files
+(``frame;frame;frame count`` per line), the input format of flamegraph.pl
+and speedscope. Nothing runs unless a job is sampled, so leaving a low
+``PROFILE_SAMPLE_RATE`` on in production only costs the sampled jobs.
+"""
+
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import FrameType
+from typing import AsyncIterator, Optional
+
+from app.config import get_settings
+
+
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def _thread_stack(frame: Optional[FrameType]) -> list[str]:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    names.reverse()
+    return names
+
+
+def _await_stack(task: asyncio.Task) -> list[str]:
+    names = ["[waiting]"]
+    awaitable = task.get_coro()
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is None:
+            names.append(type(awaitable).__name__)
+            break
+        names.append(_frame_name(frame))
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    return names
+
+
+@dataclass
+class _ActiveProfile:
+    job_id: str
+    task: asyncio.Task
+    loop: asyncio.AbstractEventLoop
+    thread_id: int
+    samples: Counter = field(default_factory=Counter)
+
+
+class SamplingProfiler:
+    def __init__(self, output_dir: Path, interval: float = 0.01, sample_rate: float = 0.0, max_files: int = 200) -> None:
+        self.output_dir = output_dir
+        self.interval = interval
+        self.sample_rate = sample_rate
+        self.max_files = max_files
+        self._running_jobs: dict[str, asyncio.Task] = {}
+        self._active: dict[str, _ActiveProfile] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -- job lifecycle -------------------------------------------------
+
+    @asynccontextmanager
+    async def job(self, job_id: str, *, force: bool = False) -> AsyncIterator[None]:
+        """Register the current task as `job_id`; sample it if chosen."""
+        task = asyncio.current_task()
+        self._running_jobs[job_id] = task
+        if force or (self.sample_rate > 0 and random.random() < self.sample_rate):
+            self.start(job_id)
+        try:
+            yield
+        finally:
+            self._running_jobs.pop(job_id, None)
+            await self.stop(job_id)
+
+    def start(self, job_id: str) -> bool:
+        """Begin sampling a running job. Returns False if it isn't running."""
+        task = self._running_jobs.get(job_id)
+        if task is None or task.done():
+            return False
+        profile = _ActiveProfile(job_id, task, task.get_loop(), threading.get_ident())
+        with self._lock:
+            self._active.setdefault(job_id, profile)
+            self._ensure_thread()
+        self._wakeup.set()
+        return True
+
+    async def stop(self, job_id: str) -> Optional[Path]:
+        """Stop sampling `job_id` and write its profile, if it has samples."""
+        with self._lock:
+            profile = self._active.pop(job_id, None)
+        if profile is None or not profile.samples:
+            return None
+        # File writes and rotation stay off the event loop
+        return await asyncio.to_thread(self._write, profile)
+
+    def is_running(self, job_id: str) -> bool:
+        return job_id in self._running_jobs
+
+    # -- stored profiles -----------------------------------------------
+
+    def path_for(self, job_id: str) -> Path:
+        return self.output_dir / f"{Path(job_id).name}.collapsed"
+
+    def list_profiles(self) -> list[Path]:
+        if not self.output_dir.exists():
+            return []
+        return sorted(self.output_dir.glob("*.collapsed"), key=lambda p: p.stat().st_mtime, reverse=True)
+
+    def _write(self, profile: _ActiveProfile) -> Path:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(profile.job_id)
+        lines = [f"{stack} {count}" for stack, count in profile.samples.most_common()]
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        for old in self.list_profiles()[self.max_files:]:
+            old.unlink(missing_ok=True)
+        return path
+
+    # -- sampler thread ------------------------------------------------
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="job-profiler", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                active = list(self._active.values())
+                self._sample(active)
+            if not active:
+                # Park until the next profiled job starts
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            time.sleep(self.interval)
+
+    def _sample(self, active: list[_ActiveProfile]) -> None:
+        frames = sys._current_frames()
+        for profile in active:
+            if profile.task.done():
+                continue
+            if asyncio.current_task(profile.loop) is profile.task:
+                stack = _thread_stack(frames.get(profile.thread_id))
+            else:
+                stack = _await_stack(profile.task)
+            if stack:
+                profile.samples[";".join(stack)] += 1
+
+
+_profiler: Optional[SamplingProfiler] = None
+
+
+def get_profiler() -> SamplingProfiler:
+    """Return the process profiler, configured from settings on first use."""
+    global _profiler
+    if _profiler is None:
+        settings = get_settings()
+        _profiler = SamplingProfiler(
+            output_dir=Path(settings.profile_dir),
+            interval=settings.profile_interval_ms / 1000,
+            sample_rate=settings.profile_sample_rate,
+        )
+    return _profiler
@@ -0,0 +1,76 @@
+from typing import List, NamedTuple, Optional
+import re
+
+from app.records import ScrapedItem
+
+
+# One compiled pattern for every supported quantity, including multipacks
+# such as "6x0,5 l" or "4 x 125 g".
+QUANTITY_PATTERN = re.compile(
+    r"(?:(?P<count>\d{1,3})\s*[x×]\s*)?"
+    r"(?P<amount>\d+(?:[.,]\d+)?)\s*"
+    r"(?P<unit>kg|gr?|mg|ml|cl|l|ltr|vnt|pcs)(?![a-ząčęėįšųūž])",
+    re.IGNORECASE,
+)
+
+# unit -> (base unit, factor to base unit)
+UNIT_FACTORS = {
+    "mg": ("kg", 0.000001),
+    "g": ("kg", 0.001),
+    "gr": ("kg", 0.001),
+    "kg": ("kg", 1.0),
+    "ml": ("l", 0.001),
+    "cl": ("l", 0.01),
+    "l": ("l", 1.0),
+    "ltr": ("l", 1.0),
+    "vnt": ("vnt", 1.0),
+    "pcs": ("vnt", 1.0),
+}
+
+
+class Quantity(NamedTuple):
+    amount: float  # total in `unit`, multipacks already multiplied out
+    unit: str  # base unit: "kg", "l" or "vnt"
+    count: int = 1
+
+    def __str__(self) -> str:
+        return f"{self.amount:g} {self.unit}"
+
+
+def parse_quantity(title: str) -> Optional[Quantity]:
+    """Return the first quantity in `title`, converted to its base unit."""
+    if not title:
+        return None
+    m = QUANTITY_PATTERN.search(title)
+    if not m:
+        return None
+    unit, factor = UNIT_FACTORS[m.group("unit").lower()]
+    count = int(m.group("count")) if m.group("count") else 1
+    amount = float(m.group("amount").replace(",", ".")) * factor * count
+    if amount <= 0:
+        return None
+    return Quantity(round(amount, 6), unit, count)
+
+
+def unit_price(price: Optional[float], quantity: Optional[Quantity]) -> Optional[float]:
+    """Price per base unit (€/kg, €/l or €/vnt), rounded to cents."""
+    if not price or quantity is None:
+        return None
+    return round(price / quantity.amount, 2)
+
+
+def fill_unit_price(item: ScrapedItem) -> ScrapedItem:
+    """Set `size` and `unit_price` on a scraped item that doesn't have them yet."""
+    if item.size and item.unit_price is not None:
+        return item
+    quantity = parse_quantity(item.title or "")
+    if quantity is not None:
+        item.size = str(quantity)
+        item.unit_price = unit_price(item.price, quantity)
+    return item
+
+
+def fill_unit_prices(items: List[ScrapedItem]) -> List[ScrapedItem]:
+    for item in items:
+        fill_unit_price(item)
+    return items
@@ -0,0 +1,209 @@
+"""Sliding-window rate limits for the API.
+
+Every rule allows ``limit`` requests per ``window`` seconds per client (an
+API token, or the client address for anonymous calls). Counts are kept per
+fixed window and the current usage is estimated the usual sliding-window way:
+the previous window's count, weighted by how much of it still overlaps the
+last ``window`` seconds, plus the current window's count. That is two
+integers per client and rule, and a check is a dict lookup and some
+arithmetic, so the limiter costs microseconds per request.
+
+With several workers (``STATE_BACKEND=sqlite``), each worker still decides
+locally, and `sync` (run every ``RATE_LIMIT_SYNC_SECONDS`` from the
+lifespan) pushes its new counts to the shared state and pulls the other
+workers' counts. A client can therefore exceed a limit by at most what it
+manages to send to the other workers between two syncs.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from app.config import get_settings
+from app.shared import SharedState, get_shared_state
+
+logger = logging.getLogger(__name__)
+
+_UNITS = {"second": 1, "minute": 60, "hour": 60 * 60, "day": 24 * 60 * 60}
+
+# Hits between sweeps of clients idle for more than a window
+_PRUNE_EVERY = 10_000
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    limit: int
+    window: float
+
+    @classmethod
+    def parse(cls, name: str, spec: str) -> "Rule":
+        """Parse ``"10/minute"`` (or ``"10/60"`` for a window in seconds)."""
+        count, _, per = spec.partition("/")
+        per = per.strip().rstrip("s") or "second"
+        window = _UNITS[per] if per in _UNITS else float(per)
+        return cls(name, int(count), float(window))
+
+
+class SlidingWindowLimiter:
+    def __init__(self, rules: dict[str, Rule], shared: Optional[SharedState] = None) -> None:
+        self.rules = rules
+        self.shared = shared
+        # (rule, client) -> [window index, count, previous count, others' count, others' previous count]
+        self._state: dict[tuple[str, str], list] = {}
+        # (rule, client, window index) -> hits not yet pushed to the shared state
+        self._pending: dict[tuple[str, str, int], int] = {}
+        self._hits = 0
+
+    @staticmethod
+    def _roll(state: list, index: int) -> None:
+        if state[0] == index:
+            return
+        if index - state[0] == 1:
+            state[2], state[4] = state[1], state[3]
+        else:
+            state[2] = state[4] = 0
+        state[0] = index
+        state[1] = state[3] = 0
+
+    def hit(self, rule_name: str, client: str, cost: int = 1, now: Optional[float] = None) -> float:
+        """Count `cost` requests by `client` against a rule.
+
+        Returns 0 when they are allowed, otherwise the seconds to wait before
+        retrying (the requests are then not counted). A cost above the rule's
+        limit can never be allowed and returns infinity. Rules that aren't
+        configured never limit.
+        """
+        refused = self.hit_many({rule_name: cost}, client, now)
+        return refused[1] if refused else 0.0
+
+    def hit_many(self, costs: dict[str, int], client: str, now: Optional[float] = None) -> Optional[tuple[str, float]]:
+        """Count several rules' costs at once, all or nothing.
+
+        Returns None when every cost is allowed (and counted), otherwise the
+        first refused rule and its wait as in `hit`, with nothing counted.
+        """
+        now = time.time() if now is None else now
+        charges = []
+        for rule_name, cost in costs.items():
+            rule = self.rules.get(rule_name)
+            if rule is None or cost <= 0:
+                continue
+            if cost > rule.limit:
+                return rule_name, math.inf
+            index = int(now // rule.window)
+            overlap = 1.0 - (now - index * rule.window) / rule.window
+            key = (rule_name, client)
+            state = self._state.get(key)
+            if state is None:
+                state = self._state[key] = [index, 0, 0, 0, 0]
+            else:
+                self._roll(state, index)
+
+            previous = state[2] + state[4]
+            used = previous * overlap + state[1] + state[3]
+            if used + cost > rule.limit:
+                excess = used + cost - rule.limit
+                # The estimate falls by `previous` per window as the old window slides out
+                wait = excess / previous * rule.window if previous else rule.window
+                return rule_name, min(wait, overlap * rule.window + rule.window)
+            charges.append((rule_name, client, index, state, cost))
+
+        for rule_name, client, index, state, cost in charges:
+            state[1] += cost
+            if self.shared is not None:
+                pending_key = (rule_name, client, index)
+                self._pending[pending_key] = self._pending.get(pending_key, 0) + cost
+        self._hits += 1
+        if self._hits % _PRUNE_EVERY == 0:
+            self.prune(now)
+        return None
+
+    def sync(self, now: Optional[float] = None) -> None:
+        """Push this worker's new counts and pull everyone else's."""
+        if self.shared is None:
+            return
+        now = time.time() if now is None else now
+        pending = self._take_pending()
+        try:
+            self.shared.add_rate_counts(pending)
+        except Exception:
+            self._restore_pending(pending)
+            raise
+        self._apply(self._pull(now), now)
+
+    def _take_pending(self) -> list[tuple[str, str, int, int]]:
+        pending, self._pending = self._pending, {}
+        return [(rule, client, index, count) for (rule, client, index), count in pending.items()]
+
+    def _restore_pending(self, pending: list[tuple[str, str, int, int]]) -> None:
+        """Put back counts a failed sync took, so the next sync pushes them."""
+        for rule, client, index, count in pending:
+            key = (rule, client, index)
+            self._pending[key] = self._pending.get(key, 0) + count
+
+    def _pull(self, now: float) -> list[tuple[str, str, int, int]]:
+        """Read the other workers' recent counts. Touches only the shared state."""
+        longest = max((rule.window for rule in self.rules.values()), default=0.0)
+        return self.shared.rate_counts(since=now - 2 * longest)
+
+    def _apply(self, counts: list[tuple[str, str, int, int]], now: float) -> None:
+        for state in self._state.values():
+            state[3] = state[4] = 0
+        for rule_name, client, index, count in counts:
+            rule = self.rules.get(rule_name)
+            if rule is None:
+                continue
+            current = int(now // rule.window)
+            state = self._state.get((rule_name, client))
+            if state is None:
+                state = self._state[(rule_name, client)] = [current, 0, 0, 0, 0]
+            else:
+                self._roll(state, current)
+            if index == current:
+                state[3] = count
+            elif index == current - 1:
+                state[4] = count
+
+    def prune(self, now: Optional[float] = None) -> None:
+        """Forget clients with no requests in the current or previous window."""
+        now = time.time() if now is None else now
+        for key, state in list(self._state.items()):
+            if int(now // self.rules[key[0]].window) - state[0] > 1:
+                del self._state[key]
+
+
+@lru_cache(maxsize=1)
+def get_limiter() -> SlidingWindowLimiter:
+    """The process's limiter; it has no rules when ``RATE_LIMIT_ENABLED`` is off."""
+    settings = get_settings()
+    rules = {}
+    if settings.rate_limit_enabled:
+        rules = {name: Rule.parse(name, spec) for name, spec in settings.rate_limits.items()}
+    return SlidingWindowLimiter(rules, get_shared_state())
+
+
+async def run_sync(limiter: SlidingWindowLimiter, interval: float) -> None:
+    """Exchange counts with the other workers every `interval` seconds, forever."""
+    while True:
+        await asyncio.sleep(interval)
+        now = time.time()
+        pending = limiter._take_pending()
+        try:
+            # Writes run on the writer thread rather than the loop
+            await limiter.shared.submit(limiter.shared.add_rate_counts, pending)
+        except Exception:
+            # Keep the counts; the next sync pushes them along with the new ones
+            limiter._restore_pending(pending)
+            logger.exception("Rate limit sync failed")
+            continue
+        try:
+            counts = await limiter.shared.submit(limiter._pull, now)
+        except Exception:
+            logger.exception("Rate limit sync failed")
+            continue
+        limiter._apply(counts, now)
@@ -0,0 +1,51 @@
+"""Compact record type for scraped products.
+
+Store scrapers emit one `ScrapedItem` per product card and the rest of the
+pipeline (normalization, catalog, matching, sanitizing, job storage) passes
+the same objects along, filling fields in place. Slotted instances are a
+fraction of the size of the equivalent dict and are never copied into a
+second shape; `to_api` builds the camelCase response dict only when a job
+status is serialized.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+@dataclass(slots=True)
+class ScrapedItem:
+    store: str
+    title: str
+    price: Optional[float] = None
+    currency: str = "EUR"
+    url: Optional[str] = None
+    image_url: Optional[str] = None
+    brand: Optional[str] = None
+    size: Optional[str] = None
+    unit_price: Optional[float] = None
+    normalized_title: Optional[str] = None
+    cluster_id: Optional[int] = None
+    confidence: float = 0.8  # placeholder; per-store scrapers can set this later
+    # Struck-through price the store shows next to `price`
+    original_price: Optional[float] = None
+    # Price with the store's loyalty card, when lower than `price`
+    loyalty_price: Optional[float] = None
+    discount_percent: Optional[float] = None
+
+    def to_api(self) -> dict[str, Any]:
+        """Return the item in the `StoreResult` response shape."""
+        return {
+            "store": self.store,
+            "price": self.price,
+            "currency": self.currency,
+            "confidence": self.confidence,
+            "originalPrice": self.original_price,
+            "loyaltyPrice": self.loyalty_price,
+            "discountPercent": self.discount_percent,
+            "productUrl": self.url,
+            "title": self.title,
+            "size": self.size,
+            "unitPrice": self.unit_price,
+            "normalized_title": self.normalized_title,
+            "clusterId": self.cluster_id,
+        }
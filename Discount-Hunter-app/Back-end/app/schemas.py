@@ -29,6 +29,18 @@ class ScrapeRequest(BaseModel):
     query: constr(strip_whitespace=True, min_length=2, max_length=120) = Field(
         ..., description="Product name or keywords to search for"
     )
+    stores: Optional[list[str]] = Field(
+        default=None, description="Stores to search; all enabled stores when omitted"
+    )
+
+
+class BatchScrapeRequest(BaseModel):
+    queries: list[constr(strip_whitespace=True, min_length=2, max_length=120)] = Field(
+        ..., min_length=1, max_length=50, description="Shopping list items to search for"
+    )
+    stores: Optional[list[str]] = Field(
+        default=None, description="Stores to search; all enabled stores when omitted"
+    )
 
 
 class ScrapeTriggerResponse(BaseModel):
@@ -40,9 +52,15 @@ class StoreResult(BaseModel):
     price: Optional[float] = Field(default=None, description="Current price, if parsed")
     currency: Optional[str] = Field(default="€")
     confidence: Optional[float] = Field(default=0.0, description="Price extraction confidence (0-1)")
-    originalPrice: Optional[float] = Field(default=None)
-    discountPercent: Optional[float] = Field(default=None)
+    originalPrice: Optional[float] = Field(default=None, description="Struck-through price before the discount")
+    loyaltyPrice: Optional[float] = Field(default=None, description="Price with the store's loyalty card")
+    discountPercent: Optional[float] = Field(
+        default=None, description="Percent saved by the lowest price on offer against originalPrice (or price)"
+    )
     productUrl: Optional[str] = Field(default=None)
+    size: Optional[str] = Field(default=None, description='Total quantity in its base unit, e.g. "0.5 kg"')
+    unitPrice: Optional[float] = Field(default=None, description="Price per kg, l or piece")
+    clusterId: Optional[int] = Field(default=None, description="Results sharing an id are the same product")
     lastUpdated: datetime = Field(default_factory=datetime.utcnow)
 
 
@@ -50,6 +68,73 @@ class JobStatusResponse(BaseModel):
     status: Literal["queued", "running", "completed", "failed"]
     data: Optional[list[StoreResult]] = None
     error: Optional[str] = None
+    timings: Optional[dict[str, float]] = Field(default=None, description="Seconds spent per pipeline stage")
+
+
+class BatchItemResult(BaseModel):
+    query: str
+    results: list[StoreResult] = Field(default_factory=list)
+
+
+class StoreBasketTotal(BaseModel):
+    store: str
+    total: float
+    items: int = Field(..., description="Number of basket items the store carries")
+    missing: list[str] = Field(default_factory=list)
+
+
+class BasketPlan(BaseModel):
+    stores: list[str]
+    total: float = Field(..., description="Item prices plus store overhead")
+    overhead: float = 0.0
+    assignment: dict[str, str] = Field(default_factory=dict, description="Store to buy each item from")
+
+
+class BasketSummary(BaseModel):
+    stores: list[StoreBasketTotal] = Field(default_factory=list)
+    cheapestStore: Optional[str] = Field(default=None, description="Cheapest store carrying every item")
+    cheapestTotal: Optional[float] = None
+    bestSingle: Optional[BasketPlan] = None
+    bestSplit: Optional[BasketPlan] = Field(default=None, description="Cheapest plan using up to two stores")
+    unavailable: list[str] = Field(default_factory=list, description="Items no store carries")
+
+
+class BatchJobStatusResponse(BaseModel):
+    status: Literal["queued", "running", "completed", "failed"]
+    items: Optional[list[BatchItemResult]] = None
+    basket: Optional[BasketSummary] = None
+    error: Optional[str] = None
+    timings: Optional[dict[str, float]] = None
+
+
+class WatchRequest(BaseModel):
+    query: constr(strip_whitespace=True, min_length=2, max_length=120) = Field(
+        ..., description="Product to watch, as it would be searched"
+    )
+    targetPrice: float = Field(..., gt=0, description="Notify when the price is at or below this")
+    stores: Optional[list[str]] = Field(
+        default=None, description="Stores to watch; all enabled stores when omitted"
+    )
+
+
+class WatchResponse(BaseModel):
+    id: int
+    query: str
+    targetPrice: float
+    stores: Optional[list[str]] = None
+    lastPrice: Optional[float] = Field(default=None, description="Best matching price at the last check")
+
+
+class NotificationResponse(BaseModel):
+    id: int
+    watchId: int
+    query: str
+    store: str
+    title: str
+    price: float
+    targetPrice: float
+    productUrl: Optional[str] = None
+    createdAt: float = Field(..., description="Unix time the price drop was found")
 
 
 class OCRResponse(BaseModel):
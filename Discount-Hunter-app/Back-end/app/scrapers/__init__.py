@@ -1,27 +1,64 @@
-from typing import List, Dict
-from .store_barbora import BarboraScraper
-from .store_rimi import RimiScraper
-from .store_lidl import LidlScraper
+import asyncio
+import copy
+import logging
+from typing import Iterable, List, Dict, Optional
+from app.log import log_context
+from app.records import ScrapedItem
+from .registry import StoreRegistry, UnknownStoreError, get_registry
 
-SCRAPERS = [
-    BarboraScraper(),
-    RimiScraper(),
-    LidlScraper(),
-]
+logger = logging.getLogger(__name__)
 
 
-async def search_all(query: str) -> List[Dict]:
-    """Run each scraper and collect normalized results.
+# (store, query) -> search already in flight, so concurrent jobs share it
+_in_flight: Dict[tuple, "asyncio.Future[List[ScrapedItem]]"] = {}
+
+
+async def _search_store(registry: StoreRegistry, store: str, query: str) -> List[ScrapedItem]:
+    key = (store, query.strip().lower())
+    pending = _in_flight.get(key)
+    if pending is not None:
+        # Later stages fill items in place, so each job gets its own copies
+        return [copy.copy(item) for item in await asyncio.shield(pending)]
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[key] = future
+    try:
+        async with registry.limit(store):
+            with log_context(store=store):
+                items = await registry.get(store).search(query)
+        future.set_result(items or [])
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as exc:
+        future.set_exception(exc)
+        # Mark retrieved so a failure nobody else awaited isn't logged by asyncio
+        future.exception()
+        raise
+    finally:
+        _in_flight.pop(key, None)
+    return future.result()
+
+
+async def search_all(query: str, stores: Optional[Iterable[str]] = None) -> List[ScrapedItem]:
+    """Run the store scrapers concurrently and collect their results.
 
     Each scraper is expected to implement an async `search` method.
+    When `stores` is given, only those (enabled) stores are searched.
+    Each store has its own concurrency limit (see `StoreRegistry.limit`),
+    and an identical store search already in flight is awaited, not repeated.
     """
+    registry = get_registry()
+    selected = registry.select(stores)
+    outcomes = await asyncio.gather(
+        *(_search_store(registry, store, query) for store in selected),
+        return_exceptions=True,
+    )
     results = []
-    for scraper in SCRAPERS:
-        try:
-            items = await scraper.search(query)
-            if items:
-                results.extend(items)
-        except Exception as exc:
+    for store, outcome in zip(selected, outcomes):
+        if isinstance(outcome, BaseException):
             # Don't fail the whole pipeline for a single store
-            print(f"Error scraping {scraper.name}: {exc}")
+            logger.warning("Store scrape failed", extra={"store": store, "error": str(outcome)})
+            continue
+        results.extend(outcome)
     return results
@@ -0,0 +1,200 @@
+"""Content-addressed archive of raw store pages.
+
+Every page fetched from ScrapingBee can be kept here, compressed, so parsers
+can be re-run over real markup after a store changes its layout and so
+benchmarks and the replay mode (``SCRAPE_REPLAY``) run without the network.
+
+Layout under the archive directory::
+
+    objects/ab/abcdef....html.gz   page bodies, named by SHA-256 of the HTML
+    index.jsonl                    {"url", "sha", "fetched_at"} per changed fetch
+
+Identical pages are stored once, and refetching a URL whose page hasn't
+changed doesn't add an index line. The index is compacted to the latest line
+per URL once it holds more than ``INDEX_COMPACT_LINES`` lines (or twice as
+many lines as URLs, whichever is more). Bodies are zstd-compressed when the
+``zstandard`` package is installed and gzip-compressed otherwise; both are
+read back either way. Once the objects exceed ``max_bytes`` the least
+recently fetched ones are deleted along with their index lines (the newest
+page is always kept).
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional, gzip is always available
+    zstandard = None
+
+from app.config import get_settings
+
+
+class PageNotArchived(LookupError):
+    """Replay asked for a URL the archive has never seen."""
+
+
+class PageArchive:
+    INDEX_COMPACT_LINES = 10_000
+
+    def __init__(self, root: Path, max_bytes: int = 500 * 1024 * 1024) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self._objects = root / "objects"
+        self._index_path = root / "index.jsonl"
+        self._lock = threading.Lock()
+        # url -> sha of the latest fetch, loaded lazily from index.jsonl
+        self._latest: Optional[dict[str, str]] = None
+        # Lines in index.jsonl, counted along with _latest
+        self._lines = 0
+        # Compressed bytes under objects/, counted on first write
+        self._total: Optional[int] = None
+
+    # -- storing -------------------------------------------------------
+
+    def put(self, url: str, html: str, *, fetched_at: Optional[float] = None) -> str:
+        """Archive one fetched page. Returns its content hash."""
+        body = html.encode("utf-8")
+        sha = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            path = self._find(sha)
+            if path is None:
+                path = self._object_path(sha, ".zst" if zstandard else ".gz")
+                path.parent.mkdir(parents=True, exist_ok=True)
+                data = _compress(body, path.suffix)
+                # Count what is stored before the new object lands, so a first scan can't include it
+                stored = self._stored_bytes()
+                tmp = path.with_suffix(path.suffix + ".tmp")
+                tmp.write_bytes(data)
+                os.replace(tmp, path)
+                self._total = stored + len(data)
+            else:
+                # Refresh so rotation treats it as recently fetched
+                os.utime(path)
+            latest = self._index()
+            if latest.get(url) != sha:
+                entry = {"url": url, "sha": sha, "fetched_at": fetched_at or time.time()}
+                with self._index_path.open("a", encoding="utf-8") as index:
+                    index.write(json.dumps(entry) + "\n")
+                latest[url] = sha
+                self._lines += 1
+            if self._stored_bytes() > self.max_bytes:
+                self._rotate()
+            elif self._lines > max(self.INDEX_COMPACT_LINES, 2 * len(latest)):
+                self._compact(removed=set())
+        return sha
+
+    # -- reading -------------------------------------------------------
+
+    def get(self, url: str) -> str:
+        """Return the latest archived page for `url`."""
+        with self._lock:
+            sha = self._index().get(url)
+            path = self._find(sha) if sha else None
+            if path is None:
+                raise PageNotArchived(url)
+            return _decompress(path.read_bytes(), path.suffix).decode("utf-8")
+
+    def urls(self) -> list[str]:
+        with self._lock:
+            return list(self._index())
+
+    def size(self) -> int:
+        """Compressed bytes currently stored."""
+        with self._lock:
+            return self._stored_bytes()
+
+    # -- internals -----------------------------------------------------
+
+    def _object_path(self, sha: str, suffix: str) -> Path:
+        return self._objects / sha[:2] / f"{sha}.html{suffix}"
+
+    def _find(self, sha: str) -> Optional[Path]:
+        for suffix in (".zst", ".gz"):
+            path = self._object_path(sha, suffix)
+            if path.exists():
+                return path
+        return None
+
+    def _iter_objects(self) -> Iterator[Path]:
+        if self._objects.exists():
+            yield from self._objects.glob("*/*.html.zst")
+            yield from self._objects.glob("*/*.html.gz")
+
+    def _stored_bytes(self) -> int:
+        if self._total is None:
+            self._total = sum(path.stat().st_size for path in self._iter_objects())
+        return self._total
+
+    def _index(self) -> dict[str, str]:
+        if self._latest is None:
+            self._latest = {}
+            self._lines = 0
+            if self._index_path.exists():
+                with self._index_path.open(encoding="utf-8") as index:
+                    for line in index:
+                        entry = json.loads(line)
+                        self._latest[entry["url"]] = entry["sha"]
+                        self._lines += 1
+        return self._latest
+
+    def _rotate(self) -> None:
+        objects = [(path.stat(), path) for path in self._iter_objects()]
+        total = sum(stat.st_size for stat, _ in objects)
+        objects.sort(key=lambda pair: pair[0].st_mtime)
+        removed = set()
+        # The newest page stays even if it alone is over the limit
+        for stat, path in objects[:-1]:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            removed.add(path.name.split(".", 1)[0])
+            total -= stat.st_size
+        self._total = total
+        self._compact(removed)
+
+    def _compact(self, removed: set[str]) -> None:
+        """Rewrite the index with the latest line per URL, leaving out deleted pages."""
+        latest: dict[str, str] = {}
+        with self._index_path.open(encoding="utf-8") as index:
+            for line in index:
+                url = json.loads(line)["url"]
+                latest.pop(url, None)
+                latest[url] = line
+        kept = [line for line in latest.values() if json.loads(line)["sha"] not in removed]
+        tmp = self._index_path.with_suffix(".tmp")
+        tmp.write_text("".join(kept), encoding="utf-8")
+        os.replace(tmp, self._index_path)
+        self._latest = None
+
+
+def _compress(body: bytes, suffix: str) -> bytes:
+    if suffix == ".zst":
+        return zstandard.ZstdCompressor(level=10).compress(body)
+    return gzip.compress(body, compresslevel=6)
+
+
+def _decompress(data: bytes, suffix: str) -> bytes:
+    if suffix == ".zst":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read .zst archive pages")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+_archive: Optional[PageArchive] = None
+
+
+def get_archive() -> PageArchive:
+    """Return the process page archive, configured from settings on first use."""
+    global _archive
+    if _archive is None:
+        settings = get_settings()
+        _archive = PageArchive(Path(settings.archive_dir), max_bytes=int(settings.archive_max_mb * 1024 * 1024))
+    return _archive
@@ -1,21 +1,76 @@
+import copy
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional
+from typing import List, Optional
+
+from bs4 import BeautifulSoup
+from lxml import etree
+
+from app.config import StoreConfig, get_settings
+from app.metrics import PARSE_CACHE, stage_timer
+from app.records import ScrapedItem
+from .html import fingerprint, parsed_pages, trim_to_cards
+from .scrapingbee import scrapingbee_get
 
 
 class StoreScraper(ABC):
     """Abstract base for per-store scrapers.
 
-    Implementations should provide a synchronous `search(query)` method
-    that returns a list of normalized item dicts.
+    `search(query)` fetches the store's search page as described by its
+    `StoreConfig` and parses it with `_parse_html`; implementations provide
+    the card selectors (`CARDS`, `_parse_cards`) and default `SEARCH_URL`.
     """
 
     name: str = ""
+    SEARCH_URL: str = ""
+    # Product cards read per results page
+    MAX_CARDS: int = 30
+    # XPath twin of the card selector in _parse_cards, used to trim pages before parsing
+    CARDS: etree.XPath
 
-    @abstractmethod
-    def search(self, query: str) -> List[Dict[str, Optional[str]]]:
-        """Return list of normalized items.
+    def __init__(self, config: Optional[StoreConfig] = None) -> None:
+        if config is None:
+            # Standalone use (tests, benchmarks): take the configured store of this name
+            config = next((c for c in get_settings().stores if c.name == self.name), None) or StoreConfig(
+                name=self.name,
+                scraper=f"{type(self).__module__}:{type(self).__qualname__}",
+                search_url=self.SEARCH_URL,
+            )
+        self.config = config
+        self.name = config.name
+
+    async def search(self, query: str) -> List[ScrapedItem]:
+        """Return list of scraped items.
 
         Each item should include at least:
           - store, title, price, unit_price (optional), currency, url, image_url
         """
+        config = self.config
+        url = config.search_url.format(query=query)
+        params = {"wait": str(config.wait_ms)} if config.render_js and config.wait_ms else None
+        timeout = config.timeout_seconds or get_settings().request_timeout_seconds
+        with stage_timer("fetch", self.name):
+            html = await scrapingbee_get(url, render_js=config.render_js, params=params, timeout=timeout)
+        return self._parse_html(html, base_url=url)
+
+    @abstractmethod
+    def _parse_cards(self, soup: BeautifulSoup, base_url: str) -> List[ScrapedItem]:
         ...
+
+    def _parse_html(self, html: str, base_url: str = "") -> List[ScrapedItem]:
+        with stage_timer("trim", self.name):
+            html = trim_to_cards(html, self.CARDS, limit=self.MAX_CARDS)
+
+        # An unchanged product grid parses to the same items
+        key = fingerprint(self.name, base_url, html)
+        cached = parsed_pages.get(key)
+        PARSE_CACHE.inc(store=self.name, result="miss" if cached is None else "hit")
+        if cached is not None:
+            return [copy.copy(item) for item in cached]
+
+        with stage_timer("soup", self.name):
+            soup = BeautifulSoup(html, "lxml")
+        with stage_timer("cards", self.name):
+            items = self._parse_cards(soup, base_url)
+        # Later pipeline stages fill items in place; keep pristine copies
+        parsed_pages.put(key, [copy.copy(item) for item in items])
+        return items
@@ -0,0 +1,187 @@
+"""Pre-parse trimming for rendered store pages.
+
+A search results page is mostly inline scripts, styles and site chrome, and
+the scrapers only read the first few dozen product cards. `trim_to_cards`
+parses the page once with lxml (in C), picks the card elements with a
+compiled XPath, drops their ``<script>``/``<style>`` children and returns
+just those subtrees as HTML, so BeautifulSoup builds a small tree instead of
+the whole page.
+
+The trimmed grid is also what gets fingerprinted: `parsed_pages` maps a
+hash of (store, page URL, grid HTML) to the items parsed from it, so a
+repeat fetch whose products haven't changed skips soup building and card
+extraction entirely.
+
+`card_prices` reads the current, struck-through and loyalty-card prices of
+one parsed card, for the scrapers' `_parse_cards`.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from bs4.element import NavigableString, Tag
+from lxml import etree
+
+from app.config import get_settings
+from app.records import ScrapedItem
+
+_PARSER = etree.HTMLParser(remove_comments=True)
+
+
+def card_xpath(*rules: tuple[str, Optional[str]]) -> etree.XPath:
+    """Compile the XPath form of a scraper's card selector.
+
+    Each rule is ``(tag, class_fragment)``, matching the CSS selector
+    ``tag[class*='class_fragment']``; a ``None`` fragment matches every `tag`.
+    """
+    parts = [
+        f"//{tag}[contains(@class, '{fragment}')]" if fragment else f"//{tag}"
+        for tag, fragment in rules
+    ]
+    return etree.XPath(" | ".join(parts))
+
+
+def trim_to_cards(html: str, cards: etree.XPath, limit: int = 30) -> str:
+    """Return the HTML of the first `limit` outermost elements matching `cards`.
+
+    Matches nested inside another match travel with their ancestor, so
+    selecting the cards again on the result finds the same first `limit`
+    elements, in the same order, as on the full page. Pages lxml cannot
+    parse are returned unchanged.
+    """
+    try:
+        root = etree.fromstring(html, _PARSER)
+    except (etree.ParserError, ValueError):
+        return html
+    if root is None:
+        return html
+
+    matches = cards(root)
+    matched = set(matches)
+    parts = []
+    for element in matches:
+        if any(ancestor in matched for ancestor in element.iterancestors()):
+            continue
+        etree.strip_elements(element, "script", "style", with_tail=False)
+        parts.append(etree.tostring(element, encoding="unicode", method="html", with_tail=False))
+        if len(parts) == limit:
+            break
+    return "".join(parts)
+
+
+_PRICE = re.compile(r"(\d+)[.,](\d{2})")
+
+# (tag, fragment): a `tag` element (any tag if None) whose class or
+# data-test attribute contains `fragment` (any element of `tag` if None)
+MarkerRule = tuple[Optional[str], Optional[str]]
+
+
+def _is_marked(element: Tag, rules: tuple[MarkerRule, ...]) -> bool:
+    attrs = element.attrs
+    marks = " ".join(attrs.get("class", ())) + " " + attrs.get("data-test", "")
+    return any(
+        (tag is None or element.name == tag) and (fragment is None or fragment in marks)
+        for tag, fragment in rules
+    )
+
+
+def _text_outside(element: Tag, skip: set[int]) -> str:
+    """Text of `element` without the text of the elements in `skip`."""
+    parts = []
+    for child in element.children:
+        if isinstance(child, NavigableString):
+            parts.append(str(child))
+        elif isinstance(child, Tag) and id(child) not in skip:
+            parts.append(_text_outside(child, skip))
+    return "".join(parts)
+
+
+def _price_in(element: Tag, skip: set[int]) -> Optional[float]:
+    if id(element) in skip or any(id(parent) in skip for parent in element.parents):
+        return None
+    match = _PRICE.search(_text_outside(element, skip) if skip else element.get_text())
+    return float(f"{match.group(1)}.{match.group(2)}") if match else None
+
+
+def card_prices(
+    card: Tag, current: str, old: tuple[MarkerRule, ...], loyalty: tuple[MarkerRule, ...]
+) -> tuple[Optional[float], Optional[float], Optional[float]]:
+    """Return ``(price, old_price, loyalty_price)`` read from one product card.
+
+    `current` is a CSS selector; `old` (struck-through) and `loyalty`
+    (loyalty-card) prices are found with `MarkerRule`s in a single walk over
+    the card, which costs far less than more CSS selectors. Old and loyalty
+    elements, and the text inside them, are never read as the current price,
+    even when they match `current` or sit inside a current-price element.
+    A card that only shows a loyalty price has that as its price.
+    """
+    old_price = loyalty_price = None
+    special: set[int] = set()
+    for element in card.find_all(True):
+        if _is_marked(element, old):
+            special.add(id(element))
+            if old_price is None:
+                old_price = _price_in(element, set())
+        elif _is_marked(element, loyalty):
+            special.add(id(element))
+            if loyalty_price is None:
+                loyalty_price = _price_in(element, set())
+
+    price = None
+    first = card.select_one(current)
+    if first is not None:
+        price = _price_in(first, special)
+        if price is None and special:
+            price = next(filter(None, (_price_in(e, special) for e in card.select(current))), None)
+    if price is None:
+        price, loyalty_price = loyalty_price, None
+    if old_price is not None and (price is None or old_price <= price):
+        old_price = None
+    if loyalty_price is not None and price is not None and loyalty_price >= price:
+        loyalty_price = None
+    return price, old_price, loyalty_price
+
+
+def fingerprint(store: str, base_url: str, grid_html: str) -> str:
+    """Identify a product grid; card URLs are resolved against `base_url`."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (store, base_url, grid_html):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ParsedPageCache:
+    """Bounded LRU of grid fingerprint -> parsed items."""
+
+    def __init__(self, max_entries: int = 512) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, list[ScrapedItem]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[list[ScrapedItem]]:
+        with self._lock:
+            items = self._entries.get(key)
+            if items is not None:
+                self._entries.move_to_end(key)
+            return items
+
+    def put(self, key: str, items: list[ScrapedItem]) -> None:
+        with self._lock:
+            self._entries[key] = items
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+parsed_pages = ParsedPageCache(get_settings().parse_cache_size)
@@ -0,0 +1,95 @@
+"""Store registry: which stores exist, how to scrape them, and how hard.
+
+Stores are described by `Settings.stores` (the ``STORES`` variable). Each
+names its scraper class either as ``module:Class`` or as an entry point in
+the ``discount_hunter.scrapers`` group, so a store shipped in another
+package only needs an entry point and a line of configuration. Scraper
+modules are imported the first time their store is searched, and each
+store gets its own concurrency limit.
+"""
+
+import asyncio
+import importlib
+from importlib.metadata import entry_points
+from typing import Iterable, Optional
+
+from app.config import StoreConfig, get_settings
+
+ENTRY_POINT_GROUP = "discount_hunter.scrapers"
+
+
+class UnknownStoreError(ValueError):
+    """A request named a store that isn't configured or is disabled."""
+
+
+def load_scraper_class(spec: str) -> type:
+    """Resolve a ``module:Class`` path or an entry point name to a class."""
+    if ":" in spec:
+        module_name, _, attr = spec.partition(":")
+        return getattr(importlib.import_module(module_name), attr)
+    matches = entry_points(group=ENTRY_POINT_GROUP, name=spec)
+    if not matches:
+        raise LookupError(f"No scraper entry point named {spec!r} in {ENTRY_POINT_GROUP}")
+    return next(iter(matches)).load()
+
+
+class StoreRegistry:
+    def __init__(self, configs: Iterable[StoreConfig], default_concurrency: int = 4) -> None:
+        self._configs = {config.name: config for config in configs}
+        self.default_concurrency = default_concurrency
+        self._scrapers = {}
+        self._limits: dict[str, asyncio.Semaphore] = {}
+
+    def names(self) -> list[str]:
+        """Enabled stores, in configuration order."""
+        return [name for name, config in self._configs.items() if config.enabled]
+
+    def config(self, name: str) -> StoreConfig:
+        return self._configs[name]
+
+    def select(self, stores: Optional[Iterable[str]] = None) -> list[str]:
+        """Return the enabled stores a request asked for (all when None).
+
+        Names match case-insensitively; unknown or disabled stores raise
+        `UnknownStoreError`.
+        """
+        enabled = self.names()
+        if stores is None:
+            return enabled
+        by_key = {name.lower(): name for name in enabled}
+        selected = []
+        for store in stores:
+            name = by_key.get(store.strip().lower())
+            if name is None:
+                raise UnknownStoreError(f"Unknown or disabled store: {store}")
+            if name not in selected:
+                selected.append(name)
+        return selected
+
+    def get(self, name: str):
+        """Return the store's scraper, importing its module on first use."""
+        scraper = self._scrapers.get(name)
+        if scraper is None:
+            config = self._configs[name]
+            scraper = self._scrapers[name] = load_scraper_class(config.scraper)(config)
+        return scraper
+
+    def limit(self, name: str) -> asyncio.Semaphore:
+        """Semaphore capping concurrent requests to one store."""
+        semaphore = self._limits.get(name)
+        if semaphore is None:
+            size = self._configs[name].concurrency or self.default_concurrency
+            semaphore = self._limits[name] = asyncio.Semaphore(size)
+        return semaphore
+
+
+_registry: Optional[StoreRegistry] = None
+
+
+def get_registry() -> StoreRegistry:
+    """Return the process store registry, built from settings on first use."""
+    global _registry
+    if _registry is None:
+        settings = get_settings()
+        _registry = StoreRegistry(settings.stores, settings.store_concurrency)
+    return _registry
@@ -1,15 +1,50 @@
-from typing import Optional
-import httpx
+import asyncio
+from typing import TYPE_CHECKING, Optional
 from app.config import get_settings
+from app.metrics import SCRAPINGBEE_CREDITS, SCRAPINGBEE_REQUESTS
+from .archive import get_archive
+
+if TYPE_CHECKING:
+    import httpx
+
+# One pooled client per process so concurrent store requests reuse connections
+_client: Optional["httpx.AsyncClient"] = None
+
+
+def get_client() -> "httpx.AsyncClient":
+    global _client
+    if _client is None or _client.is_closed:
+        # Imported on first request; httpx (and httpcore) are slow to import
+        import httpx
+
+        _client = httpx.AsyncClient(
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
 
 
 async def scrapingbee_get(url: str, render_js: bool = False, params: Optional[dict] = None, timeout: float = 30.0) -> str:
-    """Async wrapper around ScrapingBee API using httpx.AsyncClient.
+    """Async wrapper around ScrapingBee API using the shared httpx.AsyncClient.
 
     Reads the API key from `app.config.get_settings()` so `.env` values are honored.
     Returns the HTML text. Raises for HTTP errors when no key or request fails.
+
+    With `ARCHIVE_PAGES` every page is also stored in the page archive; with
+    `SCRAPE_REPLAY` pages come from the archive and no request is made
+    (`PageNotArchived` is raised for URLs it has never seen).
     """
     settings = get_settings()
+    if settings.scrape_replay:
+        return await asyncio.to_thread(get_archive().get, url)
+
     api_key = settings.scrapingbee_api_key
     if not api_key:
         raise RuntimeError("SCRAPINGBEE_API_KEY is not configured")
@@ -22,7 +57,13 @@ async def scrapingbee_get(url: str, render_js: bool = False, params: Optional[di
     if params:
         base_params.update(params)
 
-    async with httpx.AsyncClient(follow_redirects=True, timeout=timeout) as client:
-        resp = await client.get("https://app.scrapingbee.com/api/v1/", params=base_params)
-        resp.raise_for_status()
-        return resp.text
+    resp = await get_client().get(settings.scrapingbee_base_url, params=base_params, timeout=timeout)
+    SCRAPINGBEE_REQUESTS.inc(status=resp.status_code)
+    cost = resp.headers.get("Spb-cost")
+    if cost and cost.isdigit():
+        SCRAPINGBEE_CREDITS.inc(int(cost))
+    resp.raise_for_status()
+    html = resp.text
+    if settings.archive_pages:
+        await asyncio.to_thread(get_archive().put, url, html)
+    return html
@@ -1,53 +1,46 @@
-from typing import List, Dict, Optional
+from typing import List
 from bs4 import BeautifulSoup
 from .base import StoreScraper
-from .scrapingbee import scrapingbee_get
+from .html import card_prices, card_xpath
+from app.records import ScrapedItem
+from app.services.price_utils import discount_percent
 from urllib.parse import urljoin
-import re
 
 
 class RimiScraper(StoreScraper):
     name = "Rimi"
     SEARCH_URL = "https://www.rimi.lt/e-parduotuve/lt/paieska?query={query}"
+    CARDS = card_xpath(("div", "product"), ("li", "product"))
+    PRICE = ".price, .product-price, .final-price, [data-test*='price']"
+    OLD_PRICE = (("del", None), ("s", None), (None, "old-price"), (None, "price-old"))
+    # Mano Rimi card prices sit in a badge next to the shelf price
+    LOYALTY_PRICE = ((None, "loyalty"), (None, "price-badge"))
 
-    async def search(self, query: str) -> List[Dict[str, Optional[str]]]:
-        url = self.SEARCH_URL.format(query=query)
-        # Rimi can be dynamic; give extra wait
-        html = await scrapingbee_get(url, render_js=True, params={"wait": "4000"})
-        return self._parse_html(html, base_url=url)
-
-    def _parse_html(self, html: str, base_url: str = "") -> List[Dict[str, Optional[str]]]:
-        soup = BeautifulSoup(html, "lxml")
+    def _parse_cards(self, soup: BeautifulSoup, base_url: str) -> List[ScrapedItem]:
         items = []
         # Rimi search results often use product-tile or product-card classes
         cards = soup.select("div[class*='product'], div[class*='product-tile'], li[class*='product']")
-        for card in cards[:30]:
+        for card in cards[:self.MAX_CARDS]:
             title_elem = card.select_one(".product-title, .title, h3, h2, [data-testid*='title']")
-            price_elem = card.select_one(".price, .product-price, .final-price, [data-test*='price']")
             link_elem = card.select_one("a[href]")
             img_elem = card.select_one("img[src]")
 
             title = title_elem.get_text(strip=True) if title_elem else None
-            price = None
-            if price_elem:
-                m = re.search(r"(\d+[.,]\d{2})", price_elem.get_text())
-                if m:
-                    price = float(m.group(1).replace(",", "."))
+            price, old_price, loyalty_price = card_prices(card, self.PRICE, self.OLD_PRICE, self.LOYALTY_PRICE)
 
             url = urljoin(base_url, link_elem["href"]) if link_elem and link_elem.get("href") else base_url
             image = img_elem["src"] if img_elem and img_elem.get("src") else None
 
             if title and price:
-                items.append({
-                    "store": self.name,
-                    "title": title,
-                    "brand": None,
-                    "size": None,
-                    "unit_price": None,
-                    "price": price,
-                    "currency": "EUR",
-                    "url": url,
-                    "image_url": image,
-                })
+                items.append(ScrapedItem(
+                    store=self.name,
+                    title=title,
+                    price=price,
+                    url=url,
+                    image_url=image,
+                    original_price=old_price,
+                    loyalty_price=loyalty_price,
+                    discount_percent=discount_percent(price, old_price, loyalty_price),
+                ))
 
         return items
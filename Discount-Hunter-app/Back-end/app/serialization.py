@@ -0,0 +1,37 @@
+"""JSON encoding and ETags for cached API responses.
+
+Uses orjson when it is installed and falls back to the standard library
+encoder, so the app runs either way; orjson is several times faster on the
+large result lists finished jobs return.
+"""
+
+import hashlib
+import json
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode JSON-compatible data (e.g. ``model_dump(mode="json")``) to bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def etag_for(body: bytes) -> str:
+    """Strong ETag for a response body."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value covers `etag` (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
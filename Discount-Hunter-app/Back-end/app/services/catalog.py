@@ -0,0 +1,390 @@
+"""Local product catalog with an inverted token index.
+
+Every item returned by the store scrapers is upserted here, keyed by
+``(store, normalized_title)``. The index maps the stemmed tokens of each
+normalized title to entry keys. Queries are answered by intersecting the
+posting lists of their terms, so a lookup only touches the entries that
+contain every query term; matches are ranked with BM25.
+
+A store only answers a query from the catalog when a live scrape of that
+query, or of a broader one (a subset of its terms), returned results there
+recently: one incidental entry matching "pienas" says nothing about the
+rest of a store's milk shelf. `mark_covered` records those scrapes.
+
+Another index keeps, per store, the keys of entries whose last scrape
+showed a discount, so `discounted` lists current offers without scanning
+the catalog or scraping.
+"""
+
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from itertools import combinations
+from operator import itemgetter
+from typing import Iterable, Optional
+
+from app.normalization import normalize_title
+from app.records import ScrapedItem
+from app.services.relevance import B, K1, idf, query_terms, stem_words
+
+
+CatalogKey = tuple[str, str]
+
+# Queries with more terms than this are only covered by scrapes of the same terms
+_MAX_SUBSET_TERMS = 6
+
+
+@dataclass
+class CatalogEntry:
+    store: str
+    title: str
+    normalized_title: str
+    price: Optional[float] = None
+    currency: str = "EUR"
+    url: Optional[str] = None
+    image_url: Optional[str] = None
+    size: Optional[str] = None
+    unit_price: Optional[float] = None
+    original_price: Optional[float] = None
+    loyalty_price: Optional[float] = None
+    discount_percent: Optional[float] = None
+    updated_at: float = field(default_factory=time.time)
+    tokens: tuple[str, ...] = field(default=(), repr=False)
+    # Computed once at insert, so searches don't recount every matched title
+    term_freqs: dict[str, int] = field(default_factory=dict, repr=False)
+    length: int = 0
+
+    def to_item(self) -> ScrapedItem:
+        """Return the entry as the record the store scrapers emit."""
+        return ScrapedItem(
+            store=self.store,
+            title=self.title,
+            price=self.price,
+            currency=self.currency,
+            url=self.url,
+            image_url=self.image_url,
+            size=self.size,
+            unit_price=self.unit_price,
+            normalized_title=self.normalized_title,
+            original_price=self.original_price,
+            loyalty_price=self.loyalty_price,
+            discount_percent=self.discount_percent,
+        )
+
+
+class ProductCatalog:
+    """In-memory product catalog with a token -> entry-key inverted index.
+
+    Entries are kept in update order; once ``max_entries`` is exceeded the
+    least recently updated entries are evicted together with their postings.
+    """
+
+    def __init__(self, max_entries: int = 100_000, max_queries: int = 10_000) -> None:
+        self.max_entries = max_entries
+        self.max_queries = max_queries
+        # query terms -> store -> when a live scrape of them last returned results there
+        self._coverage: OrderedDict[frozenset[str], dict[str, float]] = OrderedDict()
+        self._entries: OrderedDict[CatalogKey, CatalogEntry] = OrderedDict()
+        self._index: dict[str, set[CatalogKey]] = {}
+        # token -> (store, title length) -> count of the token in the title -> keys;
+        # the same postings as `_index`, split by what BM25 scores them on
+        self._shapes: dict[str, dict[tuple[str, int], dict[int, set[CatalogKey]]]] = {}
+        self._discounted: dict[str, set[CatalogKey]] = {}
+        self._total_tokens = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, store: str, normalized_title: str) -> Optional[CatalogEntry]:
+        return self._entries.get((store, normalized_title))
+
+    def upsert(self, items: Iterable[ScrapedItem], *, now: Optional[float] = None) -> int:
+        """Insert or refresh scraped items. Returns the number of items stored."""
+        now = time.time() if now is None else now
+        stored = 0
+        for item in items:
+            store = item.store
+            title = item.title
+            if not store or not title:
+                continue
+            normalized = item.normalized_title or normalize_title(title)
+            if not normalized:
+                continue
+
+            key = (store, normalized)
+            entry = self._entries.get(key)
+            if entry is None:
+                tokens = tuple(stem_words(normalized.split()))
+                entry = CatalogEntry(
+                    store=store,
+                    title=title,
+                    normalized_title=normalized,
+                    tokens=tokens,
+                    term_freqs=dict(Counter(tokens)),
+                    length=len(tokens),
+                )
+                self._entries[key] = entry
+                self._total_tokens += len(tokens)
+                for token, count in entry.term_freqs.items():
+                    self._index.setdefault(token, set()).add(key)
+                    shape = self._shapes.setdefault(token, {}).setdefault((store, entry.length), {})
+                    shape.setdefault(count, set()).add(key)
+            else:
+                self._entries.move_to_end(key)
+
+            entry.title = title
+            entry.price = item.price
+            entry.currency = item.currency or entry.currency
+            entry.url = item.url or entry.url
+            entry.image_url = item.image_url or entry.image_url
+            entry.size = item.size
+            entry.unit_price = item.unit_price
+            entry.original_price = item.original_price
+            entry.loyalty_price = item.loyalty_price
+            entry.discount_percent = item.discount_percent
+            entry.updated_at = now
+            if item.discount_percent:
+                self._discounted.setdefault(store, set()).add(key)
+            elif store in self._discounted:
+                self._discounted[store].discard(key)
+            stored += 1
+
+        while len(self._entries) > self.max_entries:
+            self._evict_oldest()
+        return stored
+
+    def search(
+        self,
+        query: str,
+        *,
+        max_age: Optional[float] = None,
+        stores: Optional[Iterable[str]] = None,
+        now: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> list[CatalogEntry]:
+        """Return entries whose title contains every query term, best match first.
+
+        Entries older than ``max_age`` seconds are skipped when it is given;
+        only the best ``limit`` are returned when it is given.
+        """
+        oldest = _oldest(max_age, now)
+        results: list[CatalogEntry] = []
+        for _, _, keys in self._ranked_groups(query, stores):
+            results.extend(self._take(keys, None if limit is None else limit - len(results), oldest))
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    def _ranked_groups(
+        self, query: str, stores: Optional[Iterable[str]]
+    ) -> list[tuple[float, str, set[CatalogKey]]]:
+        """Keys of entries matching ``query`` as ``(BM25 score, store, keys)``, best first.
+
+        A broad query matches thousands of entries, but within a store their
+        titles come in a few dozen (length, term counts) shapes that score
+        the same. The groups are built from the `_shapes` postings with set
+        operations and each is scored once; only the groups a caller takes
+        entries from are looked at entry by entry.
+        """
+        tokens = query_terms(query)
+        if not tokens or any(token not in self._index for token in tokens):
+            return []
+        # Rarest term first, so the intersections start small
+        terms = sorted(tokens, key=lambda token: len(self._index[token]))
+        wanted = set(stores) if stores is not None else None
+
+        groups = []
+        for (store, length), by_count in self._shapes[terms[0]].items():
+            if wanted is not None and store not in wanted:
+                continue
+            partial = [((count,), keys) for count, keys in by_count.items()]
+            for token in terms[1:]:
+                other = self._shapes[token].get((store, length))
+                if not other:
+                    partial = []
+                    break
+                partial = [
+                    (counts + (count,), matched)
+                    for counts, keys in partial
+                    for count, other_keys in other.items()
+                    if (matched := keys & other_keys)
+                ]
+            groups.extend((store, length, counts, keys) for counts, keys in partial)
+
+        n_docs = len(self._entries)
+        avg_len = self._total_tokens / n_docs
+        weights = [idf(len(self._index[token]), n_docs) * (K1 + 1.0) for token in terms]
+        ranked = []
+        for store, length, counts, keys in groups:
+            norm = K1 * (1.0 - B + B * length / avg_len)
+            score = sum(weight * count / (count + norm) for weight, count in zip(weights, counts))
+            ranked.append((score, store, keys))
+        ranked.sort(key=itemgetter(0), reverse=True)
+        return ranked
+
+    def _take(self, keys: set[CatalogKey], limit: Optional[int], oldest: Optional[float]) -> list[CatalogEntry]:
+        """Up to `limit` entries of one equally scored group updated since `oldest`."""
+        taken = []
+        for key in keys:
+            entry = self._entries[key]
+            if oldest is not None and entry.updated_at < oldest:
+                continue
+            taken.append(entry)
+            if len(taken) == limit:
+                break
+        return taken
+
+    def mark_covered(self, query: str, stores: Iterable[str], *, now: Optional[float] = None) -> None:
+        """Record that a live scrape of ``query`` returned results in ``stores``."""
+        terms = query_terms(query)
+        if not terms:
+            return
+        now = time.time() if now is None else now
+        scraped = self._coverage.get(terms)
+        if scraped is None:
+            scraped = self._coverage[terms] = {}
+        else:
+            self._coverage.move_to_end(terms)
+        for store in stores:
+            scraped[store] = now
+        while len(self._coverage) > self.max_queries:
+            self._coverage.popitem(last=False)
+
+    def covered_stores(
+        self,
+        query: str,
+        stores: Iterable[str],
+        *,
+        max_age: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> set[str]:
+        """Stores in which ``query`` or a broader query was scraped within ``max_age`` seconds."""
+        terms = query_terms(query)
+        if not terms:
+            return set()
+        now = time.time() if now is None else now
+        if len(terms) <= _MAX_SUBSET_TERMS:
+            candidates = (frozenset(c) for n in range(1, len(terms) + 1) for c in combinations(terms, n))
+        else:
+            candidates = (terms,)
+        wanted = set(stores)
+        covered = set()
+        for candidate in candidates:
+            scraped = self._coverage.get(candidate)
+            if not scraped:
+                continue
+            for store in wanted - covered:
+                at = scraped.get(store)
+                if at is not None and (max_age is None or now - at <= max_age):
+                    covered.add(store)
+            if covered == wanted:
+                break
+        return covered
+
+    def missing_stores(
+        self,
+        query: str,
+        stores: Iterable[str],
+        *,
+        max_age: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> list[str]:
+        """The ``stores`` a live scrape of ``query`` is still needed for."""
+        stores = list(stores)
+        covered = self.covered_stores(query, stores, max_age=max_age, now=now)
+        return [store for store in stores if store not in covered]
+
+    def lookup(
+        self,
+        query: str,
+        stores: Iterable[str],
+        *,
+        max_age: Optional[float] = None,
+        now: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> tuple[list[ScrapedItem], list[str]]:
+        """Answer ``query`` from the catalog for the given stores.
+
+        Returns ``(items, missing_stores)`` as given by `missing_stores`.
+        Items only come from the stores that aren't missing, best match
+        first, and at most ``limit`` per store when it is given (a live scrape
+        returns no more than a page of cards either).
+        """
+        stores = list(stores)
+        missing = self.missing_stores(query, stores, max_age=max_age, now=now)
+        if len(missing) == len(stores):
+            return [], missing
+        covered = [store for store in stores if store not in missing]
+        taken: dict[str, int] = {}
+        entries: list[CatalogEntry] = []
+        oldest = _oldest(max_age, now)
+        for _, store, keys in self._ranked_groups(query, covered):
+            have = taken.get(store, 0)
+            if limit is not None and have >= limit:
+                continue
+            chosen = self._take(keys, None if limit is None else limit - have, oldest)
+            taken[store] = have + len(chosen)
+            entries.extend(chosen)
+        return [entry.to_item() for entry in entries], missing
+
+    def discounted(
+        self,
+        stores: Optional[Iterable[str]] = None,
+        *,
+        min_percent: float = 0.0,
+        max_age: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> list[CatalogEntry]:
+        """Entries currently on offer in `stores` (all stores by default), biggest discount first."""
+        now = time.time() if now is None else now
+        stores = self._discounted if stores is None else stores
+        results = []
+        for store in stores:
+            for key in self._discounted.get(store, ()):
+                entry = self._entries[key]
+                if entry.discount_percent < min_percent:
+                    continue
+                if max_age is not None and now - entry.updated_at > max_age:
+                    continue
+                results.append(entry)
+        results.sort(key=lambda e: e.discount_percent, reverse=True)
+        return results
+
+    def clear(self) -> None:
+        self._coverage.clear()
+        self._entries.clear()
+        self._index.clear()
+        self._shapes.clear()
+        self._discounted.clear()
+        self._total_tokens = 0
+
+    def _evict_oldest(self) -> None:
+        key, entry = self._entries.popitem(last=False)
+        self._total_tokens -= len(entry.tokens)
+        self._discounted.get(entry.store, set()).discard(key)
+        for token, count in entry.term_freqs.items():
+            keys = self._index.get(token)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self._index[token]
+            by_shape = self._shapes[token]
+            by_count = by_shape[(entry.store, entry.length)]
+            by_count[count].discard(key)
+            if not by_count[count]:
+                del by_count[count]
+                if not by_count:
+                    del by_shape[(entry.store, entry.length)]
+                    if not by_shape:
+                        del self._shapes[token]
+
+
+def _oldest(max_age: Optional[float], now: Optional[float]) -> Optional[float]:
+    """Oldest ``updated_at`` still within ``max_age``, or None for no limit."""
+    if max_age is None:
+        return None
+    return (time.time() if now is None else now) - max_age
+
+
+catalog = ProductCatalog()
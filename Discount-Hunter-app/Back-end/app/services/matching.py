@@ -0,0 +1,181 @@
+"""Cross-store product matching.
+
+Titles are reduced to features (brand, size, token set). Candidate pairs are
+generated by token blocking: each item is only compared with items from other
+stores that share one of its rarest tokens, so the work grows with block size
+rather than with the square of the catalog. Blocks over ``max_block_size``
+(a token every product of a category shares) are split further by brand and
+size bucket. Candidates are scored with an IDF-weighted token Jaccard and
+merged into clusters with union-find.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+from app.normalization import normalize_title
+from app.quantity import Quantity, parse_quantity
+from app.records import ScrapedItem
+
+
+# Brands that don't stand out typographically in store titles
+KNOWN_BRANDS = frozenset({
+    "dvaro", "rokiskio", "zemaitijos", "zemaitijos pienas", "pieno zvaigzdes",
+    "magija", "svalya", "clevero", "maggi", "knorr", "nestle", "milka",
+    "tarczynski", "biovela", "krekenavos", "vilkyskiu", "arla", "valio",
+    "coca cola", "pepsi", "fazer", "gaja", "selga", "karums",
+})
+
+
+@dataclass(frozen=True)
+class ProductFeatures:
+    brand: Optional[str]
+    size: Optional[Quantity]
+    tokens: frozenset[str]
+
+
+def extract_brand(title: str, normalized: Optional[str] = None) -> Optional[str]:
+    """Guess the brand: a known brand prefix, otherwise a leading ALL-CAPS word."""
+    normalized = normalize_title(title) if normalized is None else normalized
+    words = normalized.split()
+    for n in (2, 1):
+        prefix = " ".join(words[:n])
+        if len(words) >= n and prefix in KNOWN_BRANDS:
+            return prefix
+    first = (title or "").split(maxsplit=1)
+    if first and len(first[0]) > 1 and first[0].isalpha() and first[0].isupper():
+        return words[0] if words else None
+    return None
+
+
+def extract_features(title: str, normalized: Optional[str] = None) -> ProductFeatures:
+    normalized = normalize_title(title) if normalized is None else normalized
+    return ProductFeatures(
+        brand=extract_brand(title, normalized),
+        size=parse_quantity(title),
+        tokens=frozenset(t for t in normalized.split() if not t.isdigit()),
+    )
+
+
+def _compatible(a: ProductFeatures, b: ProductFeatures, size_tolerance: float) -> bool:
+    if a.brand and b.brand and a.brand != b.brand:
+        return False
+    if a.size and b.size:
+        if a.size.unit != b.size.unit:
+            return False
+        larger = max(a.size.amount, b.size.amount)
+        if larger and abs(a.size.amount - b.size.amount) / larger > size_tolerance:
+            return False
+    return True
+
+
+def _size_buckets(size: Optional[Quantity], size_tolerance: float) -> tuple:
+    """Buckets for `size`; two sizes within `size_tolerance` always share one."""
+    if size is None:
+        return (None,)
+    if size_tolerance <= 0:
+        return ((size.unit, size.amount),)
+    # Buckets one tolerance wide on a log scale; each size also joins the next one up
+    bucket = math.floor(math.log(size.amount) / -math.log(1 - min(size_tolerance, 0.99)))
+    return ((size.unit, bucket), (size.unit, bucket + 1))
+
+
+def _split_block(members: list[int], features: list[ProductFeatures], size_tolerance: float) -> Iterable[list[int]]:
+    """Split an oversized block into items of the same brand and a similar size.
+
+    Items without a brand or size land with the others missing it, so they are
+    not compared across the whole block.
+    """
+    groups: dict[tuple, list[int]] = {}
+    for i in members:
+        f = features[i]
+        for bucket in _size_buckets(f.size, size_tolerance):
+            groups.setdefault((f.brand, bucket), []).append(i)
+    return groups.values()
+
+
+def match_products(
+    items: list[ScrapedItem],
+    *,
+    threshold: float = 0.6,
+    block_keys: int = 2,
+    max_block_size: int = 100,
+    size_tolerance: float = 0.05,
+) -> list[list[int]]:
+    """Group items that describe the same product into clusters.
+
+    Returns clusters as lists of indexes into ``items``; every item appears in
+    exactly one cluster. Only items from different stores are compared.
+    """
+    # The same title usually shows up once per store; extract its features once
+    by_title: dict[str, ProductFeatures] = {}
+    features = []
+    for item in items:
+        title = item.title or ""
+        f = by_title.get(title)
+        if f is None:
+            f = by_title[title] = extract_features(title, item.normalized_title)
+        features.append(f)
+
+    doc_freq: dict[str, int] = {}
+    for f in features:
+        for token in f.tokens:
+            doc_freq[token] = doc_freq.get(token, 0) + 1
+    total = len(features) or 1
+    idf = {token: math.log(1 + total / df) for token, df in doc_freq.items()}
+
+    # Token weight of each item, so a score only sums the shared tokens
+    weight_of = {title: sum(idf[t] for t in f.tokens) for title, f in by_title.items()}
+    weights = [weight_of[item.title or ""] for item in items]
+
+    # Block on each item's rarest tokens
+    blocks: dict[str, list[int]] = {}
+    for i, f in enumerate(features):
+        for token in sorted(f.tokens, key=lambda t: (doc_freq[t], t))[:block_keys]:
+            blocks.setdefault(token, []).append(i)
+
+    groups: list[list[int]] = []
+    for members in blocks.values():
+        if len(members) > max_block_size:
+            groups.extend(_split_block(members, features, size_tolerance))
+        else:
+            groups.append(members)
+
+    parent = list(range(len(items)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    stores = [item.store for item in items]
+    seen: set[tuple[int, int]] = set()
+    for members in groups:
+        if len(members) < 2:
+            continue
+        for x, i in enumerate(members):
+            store_i, f_i = stores[i], features[i]
+            for j in members[x + 1:]:
+                if stores[j] == store_i or (i, j) in seen:
+                    continue
+                seen.add((i, j))
+                root_i, root_j = find(i), find(j)
+                if root_i == root_j or not _compatible(f_i, features[j], size_tolerance):
+                    continue
+                shared = sum(idf[t] for t in f_i.tokens & features[j].tokens)
+                if shared and shared / (weights[i] + weights[j] - shared) >= threshold:
+                    parent[root_j] = root_i
+
+    clusters: dict[int, list[int]] = {}
+    for i in range(len(items)):
+        clusters.setdefault(find(i), []).append(i)
+    return list(clusters.values())
+
+
+def assign_clusters(items: list[ScrapedItem], **kwargs: Any) -> list[ScrapedItem]:
+    """Set ``cluster_id`` on every item; matching items share the same id."""
+    for cluster_id, members in enumerate(match_products(items, **kwargs)):
+        for i in members:
+            items[i].cluster_id = cluster_id
+    return items
@@ -1,9 +1,11 @@
-import httpx
+import logging
 import re
 import io
 from fastapi import UploadFile
 from app.config import get_settings
-from PIL import Image, ImageEnhance, ImageOps
+
+
+logger = logging.getLogger(__name__)
 
 
 class OCRError(RuntimeError):
@@ -12,6 +14,9 @@ class OCRError(RuntimeError):
 
 def _preprocess_image(image_bytes: bytes) -> bytes:
     """Preprocess image for better OCR: convert to grayscale, enhance contrast, auto-orient."""
+    # Pillow is only needed for OCR uploads; keep it out of API startup
+    from PIL import Image, ImageEnhance, ImageOps
+
     try:
         img = Image.open(io.BytesIO(image_bytes))
         
@@ -141,6 +146,8 @@ async def ocr_from_file(upload_file: UploadFile) -> str:
     # Preprocess image for better OCR
     processed_content = _preprocess_image(content)
 
+    import httpx
+
     async with httpx.AsyncClient() as client:
         # Always use .png extension since we convert to PNG
         filename = "image.png"
@@ -170,11 +177,10 @@ async def ocr_from_file(upload_file: UploadFile) -> str:
     parsed = payload.get("ParsedResults") or []
     text = " ".join(r.get("ParsedText", "") for r in parsed).strip()
 
-    # Debug: print raw OCR text
-    print(f"[OCR DEBUG] Raw text from OCR: {text[:200]}..." if len(text) > 200 else f"[OCR DEBUG] Raw text from OCR: {text}")
+    logger.debug("OCR raw text", extra={"text": text[:200]})
     
     # Use intelligent extraction
     extracted = _extract_product_name(text)
-    print(f"[OCR DEBUG] Extracted product name: {extracted}")
+    logger.debug("OCR extracted product name", extra={"product_name": extracted})
     
     return extracted
@@ -1,14 +1,34 @@
 """Utilities for price validation, sanitization, and outlier detection."""
 
-from typing import List, Optional
+from itertools import combinations
+from typing import Dict, List, Optional, Union
 import statistics
 
+from app.records import ScrapedItem
+from app.services.relevance import Corpus, query_terms
+
 
 def is_valid_price(price: Optional[float]) -> bool:
     """Check if a price value is valid (positive number)."""
     return price is not None and isinstance(price, (int, float)) and price > 0
 
 
+def discount_percent(
+    price: Optional[float], original_price: Optional[float] = None, loyalty_price: Optional[float] = None
+) -> Optional[float]:
+    """Percent saved by the best price on offer against the reference price.
+
+    The reference is the struck-through `original_price` when there is one,
+    otherwise the shelf `price` (so a loyalty-card price alone is still a
+    discount). Returns None when nothing is cheaper than the reference.
+    """
+    reference = original_price or price
+    best = min((p for p in (price, loyalty_price) if is_valid_price(p)), default=None)
+    if not is_valid_price(reference) or best is None or best >= reference:
+        return None
+    return round((reference - best) / reference * 100, 1)
+
+
 def remove_outliers_iqr(values: List[float], multiplier: float = 1.5) -> List[float]:
     """Remove outliers using the IQR method.
     
@@ -39,37 +59,37 @@ def remove_outliers_iqr(values: List[float], multiplier: float = 1.5) -> List[fl
     return [v for v in values if lower_bound <= v <= upper_bound]
 
 
-def sanitize_prices(price_list: List[dict]) -> List[dict]:
+def sanitize_prices(price_list: List[ScrapedItem]) -> List[ScrapedItem]:
     """Sanitize price data by removing invalid entries and outliers.
     
     Args:
-        price_list: List of price dictionaries from scraping results
+        price_list: Scraped items
     
     Returns:
         Cleaned list with valid prices and outliers removed
     """
     # Filter to only valid prices
-    valid_items = [item for item in price_list if is_valid_price(item.get('price'))]
+    valid_items = [item for item in price_list if is_valid_price(item.price)]
     
     if len(valid_items) < 2:
         return valid_items
     
     # Extract prices for outlier detection
-    prices = [item['price'] for item in valid_items]
+    prices = [item.price for item in valid_items]
     
     # Remove outliers
     cleaned_prices = remove_outliers_iqr(prices, multiplier=2.0)
     
     # Filter original items to only include non-outlier prices
     price_set = set(cleaned_prices)
-    return [item for item in valid_items if item['price'] in price_set]
+    return [item for item in valid_items if item.price in price_set]
 
 
-def get_best_price(price_list: List[dict]) -> Optional[dict]:
+def get_best_price(price_list: List[ScrapedItem]) -> Optional[ScrapedItem]:
     """Get the best (lowest valid) price from a list of price results.
     
     Args:
-        price_list: List of price dictionaries
+        price_list: Scraped items
     
     Returns:
         Item with the best price, or None if no valid prices
@@ -79,19 +99,19 @@ def get_best_price(price_list: List[dict]) -> Optional[dict]:
     if not sanitized:
         return None
     
-    return min(sanitized, key=lambda x: x['price'])
+    return min(sanitized, key=lambda x: x.price)
 
 
-def add_price_statistics(price_list: List[dict]) -> dict:
+def add_price_statistics(price_list: List[ScrapedItem]) -> dict:
     """Add statistical information about prices.
     
     Args:
-        price_list: List of price dictionaries
+        price_list: Scraped items
     
     Returns:
         Dictionary with min, max, mean, median prices
     """
-    valid_prices = [item['price'] for item in price_list if is_valid_price(item.get('price'))]
+    valid_prices = [item.price for item in price_list if is_valid_price(item.price)]
     
     if not valid_prices:
         return {
@@ -109,3 +129,155 @@ def add_price_statistics(price_list: List[dict]) -> dict:
         'median': round(statistics.median(valid_prices), 2),
         'count': len(valid_prices)
     }
+
+
+def relevant_items(query: str, price_list: List[ScrapedItem], min_relevance: float) -> List[ScrapedItem]:
+    """Items whose title covers at least `min_relevance` of the query terms.
+
+    Coverage is IDF-weighted over the result list (`Corpus.coverage`), so
+    store search results that only share a common word with the query, or
+    none at all, are dropped.
+    """
+    terms = query_terms(query)
+    if not terms or min_relevance <= 0:
+        return list(price_list)
+    corpus = Corpus([item.title or "" for item in price_list])
+    return [item for i, item in enumerate(price_list) if corpus.coverage(terms, i) >= min_relevance]
+
+
+def cheapest_per_store(price_list: List[ScrapedItem]) -> Dict[str, float]:
+    """Lowest valid price each store offers in a result list."""
+    cheapest: Dict[str, float] = {}
+    for item in price_list:
+        store = item.store
+        price = item.price
+        if store and is_valid_price(price) and price < cheapest.get(store, float('inf')):
+            cheapest[store] = price
+    return cheapest
+
+
+def _plan(stores, prices: Dict[str, Dict[str, float]], overhead: Dict[str, float], bound: float) -> Optional[dict]:
+    """Cheapest assignment of every item to one of `stores`, or None.
+
+    Gives up (returns None) as soon as the running total reaches `bound`.
+    """
+    total = sum(overhead.get(store, 0.0) for store in stores)
+    assignment = {}
+    for item, per_store in prices.items():
+        best_store, best_price = None, float('inf')
+        for store in stores:
+            price = per_store.get(store)
+            if price is not None and price < best_price:
+                best_store, best_price = store, price
+        if best_store is None:
+            return None
+        total += best_price
+        if total >= bound:
+            return None
+        assignment[item] = best_store
+    return {
+        'stores': list(stores),
+        'total': round(total, 2),
+        'overhead': round(sum(overhead.get(store, 0.0) for store in stores), 2),
+        'assignment': assignment,
+    }
+
+
+def optimize_basket(
+    prices: Dict[str, Dict[str, float]],
+    store_overhead: Union[float, Dict[str, float]] = 0.0,
+    max_stores: int = 2,
+) -> dict:
+    """Find the cheapest way to buy a basket from one store or a few.
+
+    Every combination of up to `max_stores` stores is priced by sending
+    each item to the cheapest store of the combination, plus each store's
+    overhead (delivery fee, extra trip). Combinations are cut off once they
+    exceed the best total found so far, so a 50-item basket over a handful
+    of stores takes well under a millisecond.
+
+    Args:
+        prices: Cheapest price per store, keyed by item (see `cheapest_per_store`)
+        store_overhead: Cost per store used, as one value or per store name
+        max_stores: Largest number of stores a split may use
+
+    Returns:
+        Dictionary with the best single-store plan, the best plan using up to
+        `max_stores` stores (each None if no store set covers the basket), and
+        the items no store carries, which are left out of both plans
+    """
+    unavailable = [item for item, per_store in prices.items() if not per_store]
+    available = {item: per_store for item, per_store in prices.items() if per_store}
+    stores = sorted({store for per_store in available.values() for store in per_store})
+    if isinstance(store_overhead, dict):
+        overhead = {store: store_overhead.get(store, 0.0) for store in stores}
+    else:
+        overhead = {store: store_overhead for store in stores}
+
+    best_single = None
+    best_split = None
+    for size in range(1, max(1, max_stores) + 1):
+        for combo in combinations(stores, size):
+            bound = best_split['total'] if best_split else float('inf')
+            if size == 1 and best_single:
+                bound = best_single['total']
+            plan = _plan(combo, available, overhead, bound)
+            if plan is None:
+                continue
+            if size == 1:
+                best_single = plan
+            if best_split is None or plan['total'] < best_split['total']:
+                best_split = plan
+
+    return {
+        'single': best_single,
+        'split': best_split,
+        'unavailable': unavailable,
+    }
+
+
+def basket_totals(
+    results_by_item: Dict[str, List[ScrapedItem]],
+    store_overhead: Union[float, Dict[str, float]] = 0.0,
+    min_relevance: float = 0.0,
+) -> dict:
+    """Total the cheapest match per item for each store.
+
+    Args:
+        results_by_item: Result lists keyed by the item (query) they answer
+        store_overhead: Per-store cost passed on to `optimize_basket`
+        min_relevance: Share of the query terms a result must cover to be
+            priced (see `relevant_items`); weak matches are often the cheapest
+
+    Returns:
+        Dictionary with each store's total and missing items, the cheapest
+        store that carries every item (None if no store does), and the
+        `optimize_basket` plans under 'best_single' and 'best_split'
+    """
+    cheapest = {
+        item: cheapest_per_store(relevant_items(item, results, min_relevance))
+        for item, results in results_by_item.items()
+    }
+    stores = sorted({store for per_store in cheapest.values() for store in per_store})
+
+    totals = []
+    for store in stores:
+        prices = [per_store[store] for per_store in cheapest.values() if store in per_store]
+        totals.append({
+            'store': store,
+            'total': round(sum(prices), 2),
+            'items': len(prices),
+            'missing': [item for item, per_store in cheapest.items() if store not in per_store],
+        })
+
+    complete = [t for t in totals if not t['missing']]
+    best = min(complete, key=lambda t: t['total']) if complete else None
+    plans = optimize_basket(cheapest, store_overhead)
+    return {
+        'stores': totals,
+        'cheapest_store': best['store'] if best else None,
+        'cheapest_total': best['total'] if best else None,
+        'best_single': plans['single'],
+        'best_split': plans['split'],
+        'unavailable': plans['unavailable'],
+    }
@@ -0,0 +1,122 @@
+"""Token-based relevance scoring shared by the scrapers and the catalog.
+
+Text is folded with `normalize_words` (lowercase, Lithuanian diacritics to
+ASCII) and every word is reduced with a light suffix-stripping stemmer, so
+"pienas", "pieno" and "pieną" all become "pien". Documents are scored with
+BM25; `Corpus.coverage` gives an IDF-weighted share of matched query terms
+in [0, 1] that is usable as a confidence value.
+"""
+
+import math
+from collections import Counter
+from functools import lru_cache
+from typing import Iterable, Mapping, Sequence
+
+from app.normalization import normalize_words
+
+
+# Common Lithuanian noun/adjective endings after ASCII folding, longest first
+_SUFFIXES = tuple(sorted({
+    "iausias", "iuose", "esnis", "iems", "ioms", "iams", "uose",
+    "ams", "oms", "ems", "ais", "ius", "iai", "ios", "ies", "yse", "ose", "ese",
+    "as", "is", "ys", "us", "es", "os", "ai", "ei", "ui", "iu", "io", "ia",
+    "a", "e", "i", "o", "u", "y",
+}, key=len, reverse=True))
+
+MIN_STEM_LENGTH = 3
+
+K1 = 1.2
+B = 0.75
+
+
+@lru_cache(maxsize=50_000)
+def stem(token: str) -> str:
+    """Strip one inflection ending, keeping at least `MIN_STEM_LENGTH` chars."""
+    if len(token) <= MIN_STEM_LENGTH or not token.isalpha():
+        return token
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM_LENGTH:
+            return token[: -len(suffix)]
+    return token
+
+
+def stem_words(words: Iterable[str]) -> list[str]:
+    return [stem(word) for word in words]
+
+
+def tokenize(text: str) -> list[str]:
+    """Fold, split and stem `text`."""
+    return stem_words(normalize_words(text))
+
+
+@lru_cache(maxsize=1024)
+def query_terms(query: str) -> frozenset[str]:
+    """Distinct stemmed terms of a search query, cached across requests."""
+    return frozenset(tokenize(query))
+
+
+def idf(doc_freq: int, n_docs: int) -> float:
+    """BM25 inverse document frequency (always positive)."""
+    return math.log(1.0 + (n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+
+def bm25(
+    terms: Iterable[str],
+    term_freqs: Mapping[str, int],
+    doc_len: int,
+    avg_doc_len: float,
+    doc_freqs: Mapping[str, int],
+    n_docs: int,
+) -> float:
+    """BM25 score of one document for the given query terms."""
+    norm = K1 * (1.0 - B + B * doc_len / (avg_doc_len or 1.0))
+    score = 0.0
+    for term in terms:
+        tf = term_freqs.get(term, 0)
+        if tf:
+            score += idf(doc_freqs.get(term, 0), n_docs) * tf * (K1 + 1.0) / (tf + norm)
+    return score
+
+
+class Corpus:
+    """A small set of documents (e.g. product cards on one page).
+
+    Each document is tokenized exactly once, when it is added.
+    """
+
+    def __init__(self, texts: Sequence[str] = ()) -> None:
+        self._term_freqs: list[Counter] = []
+        self._lengths: list[int] = []
+        self._total_len = 0
+        self._doc_freqs: Counter = Counter()
+        for text in texts:
+            self.add(text)
+
+    def __len__(self) -> int:
+        return len(self._term_freqs)
+
+    def add(self, text: str) -> int:
+        """Tokenize and index `text`; returns its document index."""
+        tokens = tokenize(text)
+        tf = Counter(tokens)
+        self._term_freqs.append(tf)
+        self._lengths.append(len(tokens))
+        self._total_len += len(tokens)
+        self._doc_freqs.update(tf.keys())
+        return len(self._term_freqs) - 1
+
+    def score(self, terms: Iterable[str], doc: int) -> float:
+        avg = self._total_len / len(self)
+        return bm25(terms, self._term_freqs[doc], self._lengths[doc], avg, self._doc_freqs, len(self))
+
+    def coverage(self, terms: Iterable[str], doc: int) -> float:
+        """IDF-weighted fraction of `terms` present in document `doc`."""
+        tf = self._term_freqs[doc]
+        n = len(self)
+        total = matched = 0.0
+        for term in terms:
+            weight = idf(self._doc_freqs.get(term, 0), n)
+            total += weight
+            if term in tf:
+                matched += weight
+        return matched / total if total else 0.0
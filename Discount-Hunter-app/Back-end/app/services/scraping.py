@@ -1,14 +1,20 @@
 import asyncio
 import re
-from typing import Any, Optional, Tuple, List
+from typing import TYPE_CHECKING, Any, Optional, Tuple, List
 from urllib.parse import quote_plus
 
-import httpx
-from bs4 import BeautifulSoup
-
-from app.config import get_settings
-from app.scrapers import search_all
+from app.config import StoreConfig, get_settings
+from app.metrics import CATALOG_LOOKUPS, stage_timer
+from app.scrapers import get_registry, search_all
 from app.normalization import normalize_results
+from app.records import ScrapedItem
+from app.services.catalog import catalog
+from app.services.matching import assign_clusters
+from app.services.relevance import Corpus, query_terms
+from app.shared import get_shared_state
+
+if TYPE_CHECKING:
+    import httpx
 
 
 # Multiple price patterns for better matching across different store formats
@@ -23,13 +29,16 @@ PRICE_PATTERNS = [
     re.compile(r'\b(\d+[.,]\d{2})\s*(?=\D|$)'),  # Any decimal number as fallback
 ]
 
+# Per-kg / per-litre price labels ("1,99 €/kg", "kaina už kg", "per kg")
+PER_UNIT_PRICE_PATTERN = re.compile(r'(?:/|\bper\b|\buž\b)\s*(?:kg|l)\b', re.IGNORECASE)
+
 
 class ScrapingBeeError(RuntimeError):
     """Raised when ScrapingBee returns an error response."""
 
 
 async def fetch_store_snapshot(
-    client: httpx.AsyncClient, *, store: dict[str, str], query: str
+    client: "httpx.AsyncClient", *, store: StoreConfig, query: str
 ) -> dict[str, Any]:
     """Fetch a single store page through ScrapingBee and derive a price."""
     settings = get_settings()
@@ -37,7 +46,7 @@ async def fetch_store_snapshot(
         raise ScrapingBeeError("SCRAPINGBEE_API_KEY is not configured")
 
     encoded_query = quote_plus(query)
-    target_url = store["search_url"].format(query=encoded_query)
+    target_url = store.search_url.format(query=encoded_query)
 
     params = {
         "api_key": settings.scrapingbee_api_key,
@@ -49,14 +58,14 @@ async def fetch_store_snapshot(
     }
 
     response = await client.get(
-        "https://app.scrapingbee.com/api/v1/",
+        settings.scrapingbee_base_url,
         params=params,
         timeout=settings.request_timeout_seconds,
     )
 
     if response.is_error:
         raise ScrapingBeeError(
-            f"ScrapingBee error for {store['name']}: {response.status_code}"
+            f"ScrapingBee error for {store.name}: {response.status_code}"
         )
 
     html = response.text
@@ -65,7 +74,7 @@ async def fetch_store_snapshot(
     price, confidence = extract_price_from_product_cards(html, query)
     
     return {
-        "store": store["name"],
+        "store": store.name,
         "price": price,
         "currency": "€",
         "confidence": round(confidence, 2),
@@ -81,12 +90,16 @@ def extract_price_from_product_cards(html: str, query: str) -> Tuple[Optional[fl
     Returns:
         Tuple of (price, confidence) where confidence is 0.0-1.0
     """
-    try:
-        soup = BeautifulSoup(html, 'lxml')
-    except:
-        soup = BeautifulSoup(html, 'html.parser')
+    # Deferred so importing the API doesn't load bs4 before the first scrape
+    from bs4 import BeautifulSoup
+
+    with stage_timer("soup"):
+        try:
+            soup = BeautifulSoup(html, 'lxml')
+        except:
+            soup = BeautifulSoup(html, 'html.parser')
     
-    query_terms = [term.lower() for term in query.split() if len(term) > 2]
+    terms = [term for term in query_terms(query) if len(term) > 2]
     
     # Common product card selectors across Lithuanian stores
     product_selectors = [
@@ -106,73 +119,75 @@ def extract_price_from_product_cards(html: str, query: str) -> Tuple[Optional[fl
         '[class*="price"][class*="main"]',
     ]
     
-    per_kg_exclude_patterns = [
-        r'/\s*kg',
-        r'€\s*/\s*kg',
-        r'kaina\s*už\s*kg',
-        r'per\s*kg',
-        r'\d+[.,]\d{2}\s*€\s*/\s*kg',
-    ]
-    
     candidate_products = []
     
-    # Find all potential product containers
+    # Find all potential product containers; a card matched by several
+    # selectors is only considered once
+    cards = []
+    seen_cards = set()
     for selector in product_selectors:
-        products = soup.select(selector)
-        for product in products[:20]:  # Limit to first 20
-            product_text = product.get_text().lower()
-            
-            # Check if product matches query terms
-            matches = sum(1 for term in query_terms if term in product_text)
-            relevance = matches / len(query_terms) if query_terms else 0
-            
-            if relevance < 0.2:  # Lowered from 0.3 to 0.2 (20% match)
-                continue
-            
-            # Look for unit price elements first
-            found_price = False
-            for price_selector in unit_price_selectors:
-                price_elements = product.select(price_selector)
-                for elem in price_elements:
-                    price_text = elem.get_text()
-                    
-                    # Skip if this looks like a per-kg price
-                    is_per_kg = any(re.search(pattern, price_text, re.IGNORECASE) for pattern in per_kg_exclude_patterns)
-                    if is_per_kg:
-                        continue
-                    
-                    # Extract price
-                    price_match = re.search(r'(\d+)[.,](\d{2})', price_text)
-                    if price_match:
-                        try:
-                            price = float(f"{price_match.group(1)}.{price_match.group(2)}")
-                            # Reasonable price range for grocery items (not per-kg)
-                            if 0.10 <= price <= 25.00:  # Expanded from 50 to 25
-                                candidate_products.append((price, relevance, product_text[:100]))
-                                found_price = True
-                                break
-                        except:
-                            continue
-                if found_price:
-                    break
-            
-            # If no unit price found, try any price element but filter out high prices
-            if not found_price:
-                all_prices = re.findall(r'(\d+)[.,](\d{2})\s*€', product.get_text())
-                for price_parts in all_prices:
+        for product in soup.select(selector)[:20]:  # Limit to first 20
+            if id(product) not in seen_cards:
+                seen_cards.add(id(product))
+                cards.append(product)
+    
+    # Extract and tokenize every card's text exactly once
+    card_texts = [product.get_text() for product in cards]
+    corpus = Corpus(card_texts)
+    
+    for index, product in enumerate(cards):
+        product_text = card_texts[index]
+        
+        # Check if product matches query terms
+        relevance = corpus.coverage(terms, index) if terms else 0
+        if relevance < 0.2:  # Lowered from 0.3 to 0.2 (20% match)
+            continue
+        score = corpus.score(terms, index)
+        snippet = product_text[:100].lower()
+        
+        # Look for unit price elements first
+        found_price = False
+        for price_selector in unit_price_selectors:
+            price_elements = product.select(price_selector)
+            for elem in price_elements:
+                price_text = elem.get_text()
+                
+                # Skip if this looks like a per-kg price
+                if PER_UNIT_PRICE_PATTERN.search(price_text):
+                    continue
+                
+                # Extract price
+                price_match = re.search(r'(\d+)[.,](\d{2})', price_text)
+                if price_match:
                     try:
-                        price = float(f"{price_parts[0]}.{price_parts[1]}")
-                        # Filter: typical grocery items are under €20
-                        if 0.10 <= price <= 20.00:  # Expanded from 10 to 20
-                            candidate_products.append((price, relevance * 0.8, product_text[:100]))
+                        price = float(f"{price_match.group(1)}.{price_match.group(2)}")
+                        # Reasonable price range for grocery items (not per-kg)
+                        if 0.10 <= price <= 25.00:  # Expanded from 50 to 25
+                            candidate_products.append((price, relevance, score, snippet))
+                            found_price = True
                             break
                     except:
                         continue
-    
+            if found_price:
+                break
+        
+        # If no unit price found, try any price element but filter out high prices
+        if not found_price:
+            all_prices = re.findall(r'(\d+)[.,](\d{2})\s*€', product_text)
+            for price_parts in all_prices:
+                try:
+                    price = float(f"{price_parts[0]}.{price_parts[1]}")
+                    # Filter: typical grocery items are under €20
+                    if 0.10 <= price <= 20.00:  # Expanded from 10 to 20
+                        candidate_products.append((price, relevance * 0.8, score, snippet))
+                        break
+                except:
+                    continue
+
     if candidate_products:
-        # Sort by relevance (best match first), then by lower price
-        candidate_products.sort(key=lambda x: (-x[1], x[0]))
-        best_price, best_relevance, _ = candidate_products[0]
+        # Sort by relevance (best match first), then BM25 score, then by lower price
+        candidate_products.sort(key=lambda x: (-x[1], -x[2], x[0]))
+        best_price, best_relevance, _, _ = candidate_products[0]
         confidence = min(best_relevance, 0.9)
         return best_price, confidence
     
@@ -260,28 +275,58 @@ def extract_price(html: str) -> Tuple[Optional[float], float]:
     return None, 0.0
 
 
-async def scrape_all_stores(query: str) -> list[dict[str, Any]]:
-    """Scrape every configured store concurrently."""
-    # Use per-store scrapers implemented in app.scrapers
-    raw = await search_all(query)
-    # Normalize titles and add normalized_title
-    normalized = normalize_results(raw)
+def needs_live_scrape(query: str, stores: Optional[list[str]] = None) -> bool:
+    """Whether `scrape_all_stores` would have to scrape some store live right now."""
+    stores = get_registry().select(stores)
+    shared = get_shared_state()
+    if shared is not None:
+        shared.sync_catalog(catalog)
+    # Same check as `scrape_all_stores`, without searching the catalog for the items
+    return bool(catalog.missing_stores(query, stores, max_age=get_settings().catalog_ttl_seconds))
 
-    # Convert normalized items into the old API response shape
-    payload: list[dict[str, Any]] = []
-    for item in normalized:
-        payload.append(
-            {
-                "store": item.get("store"),
-                "price": item.get("price"),
-                "currency": item.get("currency", "€"),
-                "confidence": 0.8,  # placeholder; per-store scrapers can set this later
-                "originalPrice": None,
-                "discountPercent": None,
-                "productUrl": item.get("url"),
-                "title": item.get("title"),
-                "normalized_title": item.get("normalized_title"),
-            }
-        )
-    return payload
 
+async def scrape_all_stores(query: str, stores: Optional[list[str]] = None) -> list[ScrapedItem]:
+    """Scrape every enabled store (or just `stores`) concurrently."""
+    settings = get_settings()
+    # Answer from the local catalog first; only stores the query wasn't recently scraped in are scraped live
+    registry = get_registry()
+    stores = registry.select(stores)
+    shared = get_shared_state()
+    with stage_timer("catalog"):
+        if shared is not None:
+            # Pick up what other workers scraped since the last lookup
+            shared.sync_catalog(catalog)
+        # No more per store than a live scrape would return
+        limit = max(registry.get(store).MAX_CARDS for store in stores) if stores else None
+        cached, missing = catalog.lookup(query, stores, max_age=settings.catalog_ttl_seconds, limit=limit)
+    for store in stores:
+        CATALOG_LOOKUPS.inc(store=store, result="miss" if store in missing else "hit")
+    live: list[ScrapedItem] = []
+    if missing:
+        # Use per-store scrapers implemented in app.scrapers
+        raw = await search_all(query, stores=missing)
+        # Normalize titles and add normalized_title
+        with stage_timer("normalize"):
+            live = normalize_results(raw)
+            catalog.upsert(live)
+            # Stores that returned nothing may have failed, so they aren't marked covered
+            catalog.mark_covered(query, {item.store for item in live})
+        if shared is not None:
+            await shared.publish_items(live, query)
+    normalized = cached + live
+    # Group the same product across stores
+    with stage_timer("match"):
+        assign_clusters(normalized)
+    # Items stay records; ScrapedItem.to_api builds the response shape
+    return normalized
+
+
+async def scrape_many(queries: list[str], stores: Optional[list[str]] = None) -> dict[str, list[ScrapedItem]]:
+    """Scrape several queries as one unit of work.
+
+    Repeated queries are scraped once. All queries share the catalog, the
+    pooled ScrapingBee client and the per-store concurrency limits.
+    """
+    unique = list(dict.fromkeys(q.strip() for q in queries if q.strip()))
+    results = await asyncio.gather(*(scrape_all_stores(q, stores) for q in unique))
+    return dict(zip(unique, results))
@@ -0,0 +1,255 @@
+"""Price-drop watches and the engine that evaluates them.
+
+A watch is a user's query with a target price. `evaluate_watches` checks
+every watch in one cycle: watches are grouped by their normalized
+query (the sorted stemmed query terms), so each distinct product is fetched
+once however many users watch it. Fetching goes through
+`scrape_all_stores`, which answers from the catalog while it is fresh and
+only scrapes the stores it has no recent prices for.
+
+When the best matching price is at or below a watch's target, and lower
+than the price the user was last told about, a row is added to the
+``notifications`` table; clients collect them with `take_notifications`.
+
+The functions here use sqlite synchronously. The cycle runs its queries with
+`asyncio.to_thread`, and the API routes calling the others are plain ``def``
+routes that Starlette runs in its threadpool.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from app.database import get_db_connection
+from app.records import ScrapedItem
+from app.services.relevance import query_terms, stem_words
+from app.services.scraping import scrape_all_stores
+
+logger = logging.getLogger(__name__)
+
+Fetch = Callable[[str, Optional[list[str]]], Awaitable[list[ScrapedItem]]]
+
+
+@dataclass
+class Watch:
+    id: int
+    user_id: int
+    query: str
+    target_price: float
+    stores: Optional[list[str]] = None
+    last_price: Optional[float] = None
+    # Best price in the last notification; cleared once the price goes back above target
+    notified_price: Optional[float] = None
+
+    @property
+    def key(self) -> str:
+        return query_key(self.query)
+
+    def to_api(self) -> dict:
+        return {
+            "id": self.id,
+            "query": self.query,
+            "targetPrice": self.target_price,
+            "stores": self.stores,
+            "lastPrice": self.last_price,
+        }
+
+
+def query_key(query: str) -> str:
+    """Queries with the same key search for the same product."""
+    return " ".join(sorted(query_terms(query)))
+
+
+def _watch_from_row(row) -> Watch:
+    return Watch(
+        id=row["id"],
+        user_id=row["user_id"],
+        query=row["query"],
+        target_price=row["target_price"],
+        stores=json.loads(row["stores"]) if row["stores"] else None,
+        last_price=row["last_price"],
+        notified_price=row["notified_price"],
+    )
+
+
+def add_watch(user_id: int, query: str, target_price: float, stores: Optional[list[str]] = None) -> Watch:
+    """Add a watch for `user_id`."""
+    if not query_key(query):
+        raise ValueError("Query has no searchable words")
+    conn = get_db_connection()
+    cursor = conn.execute(
+        "INSERT INTO watches (user_id, query, target_price, stores) VALUES (?, ?, ?, ?)",
+        (user_id, query, target_price, json.dumps(stores) if stores else None),
+    )
+    conn.commit()
+    watch_id = cursor.lastrowid
+    conn.close()
+    return Watch(id=watch_id, user_id=user_id, query=query, target_price=target_price, stores=stores)
+
+
+def list_watches(user_id: int) -> list[Watch]:
+    conn = get_db_connection()
+    rows = conn.execute("SELECT * FROM watches WHERE user_id = ? ORDER BY id", (user_id,)).fetchall()
+    conn.close()
+    return [_watch_from_row(row) for row in rows]
+
+
+def delete_watch(user_id: int, watch_id: int) -> bool:
+    """Delete one of the user's watches. False if they have no such watch."""
+    conn = get_db_connection()
+    cursor = conn.execute("DELETE FROM watches WHERE id = ? AND user_id = ?", (watch_id, user_id))
+    conn.commit()
+    conn.close()
+    return cursor.rowcount > 0
+
+
+def take_notifications(user_id: int, limit: int = 50) -> list[dict]:
+    """Return the user's undelivered notifications, oldest first, and mark them delivered."""
+    conn = get_db_connection()
+    rows = conn.execute(
+        "SELECT * FROM notifications WHERE user_id = ? AND delivered_at IS NULL ORDER BY id LIMIT ?",
+        (user_id, limit),
+    ).fetchall()
+    if rows:
+        conn.executemany(
+            "UPDATE notifications SET delivered_at = ? WHERE id = ?",
+            [(time.time(), row["id"]) for row in rows],
+        )
+        conn.commit()
+    conn.close()
+    return [
+        {
+            "id": row["id"],
+            "watchId": row["watch_id"],
+            "query": row["query"],
+            "store": row["store"],
+            "title": row["title"],
+            "price": row["price"],
+            "targetPrice": row["target_price"],
+            "productUrl": row["url"],
+            "createdAt": row["created_at"],
+        }
+        for row in rows
+    ]
+
+
+def group_watches(watches: list[Watch]) -> dict[str, list[Watch]]:
+    """Watches keyed by normalized query."""
+    groups: dict[str, list[Watch]] = {}
+    for watch in watches:
+        groups.setdefault(watch.key, []).append(watch)
+    return groups
+
+
+def _group_stores(group: list[Watch]) -> Optional[list[str]]:
+    """Stores to fetch for a group: every store if any watch has no store list."""
+    if any(watch.stores is None for watch in group):
+        return None
+    return sorted({store for watch in group for store in watch.stores})
+
+
+def best_match(watch: Watch, items: list[ScrapedItem]) -> Optional[ScrapedItem]:
+    """Cheapest item in the watch's stores whose title has every query term."""
+    terms = query_terms(watch.query)
+    best = None
+    for item in items:
+        if item.price is None or (watch.stores is not None and item.store not in watch.stores):
+            continue
+        if not terms <= set(stem_words((item.normalized_title or "").split())):
+            continue
+        if best is None or item.price < best.price:
+            best = item
+    return best
+
+
+async def evaluate_watches(fetch: Fetch = scrape_all_stores, *, concurrency: int = 4) -> dict[str, int]:
+    """Check every watch once and queue notifications for new price drops."""
+    watches = await asyncio.to_thread(_load_watches)
+    groups = group_watches(watches)
+
+    limit = asyncio.Semaphore(concurrency)
+
+    async def fetch_group(group: list[Watch]) -> list[ScrapedItem]:
+        async with limit:
+            return await fetch(group[0].query, _group_stores(group))
+
+    fetched = await asyncio.gather(*(fetch_group(group) for group in groups.values()), return_exceptions=True)
+
+    updates = []
+    notifications = []
+    failed = 0
+    now = time.time()
+    for (key, group), items in zip(groups.items(), fetched):
+        if isinstance(items, BaseException):
+            failed += 1
+            logger.warning("Watch group fetch failed", extra={"query_key": key, "error": str(items)})
+            continue
+        for watch in group:
+            best = best_match(watch, items)
+            price = best.price if best else None
+            notified = watch.notified_price
+            if best and price <= watch.target_price and (notified is None or price < notified):
+                notifications.append((
+                    watch.user_id, watch.id, watch.query, best.store, best.title,
+                    price, watch.target_price, best.url, now,
+                ))
+                notified = price
+            elif price is None or price > watch.target_price:
+                notified = None
+            updates.append((price, notified, now, watch.id))
+
+    await asyncio.to_thread(_save_cycle, updates, notifications)
+
+    stats = {"watches": len(watches), "groups": len(groups), "failed": failed, "notifications": len(notifications)}
+    logger.info("Watch cycle finished", extra=stats)
+    return stats
+
+
+def _load_watches() -> list[Watch]:
+    conn = get_db_connection()
+    watches = [_watch_from_row(row) for row in conn.execute("SELECT * FROM watches").fetchall()]
+    conn.close()
+    return watches
+
+
+def _save_cycle(updates: list[tuple], notifications: list[tuple]) -> None:
+    conn = get_db_connection()
+    conn.executemany(
+        "UPDATE watches SET last_price = ?, notified_price = ?, checked_at = ? WHERE id = ?",
+        updates,
+    )
+    conn.executemany(
+        "INSERT INTO notifications (user_id, watch_id, query, store, title, price, target_price, url, created_at)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        notifications,
+    )
+    conn.commit()
+    conn.close()
+
+
+def claim_cycle(interval: float, now: Optional[float] = None) -> bool:
+    """Claim the next evaluation cycle. Only one worker wins each interval."""
+    now = time.time() if now is None else now
+    conn = get_db_connection()
+    conn.execute("INSERT OR IGNORE INTO watch_cycles (name, started_at) VALUES ('watchlist', 0)")
+    cursor = conn.execute(
+        "UPDATE watch_cycles SET started_at = ? WHERE name = 'watchlist' AND started_at <= ?",
+        (now, now - interval),
+    )
+    conn.commit()
+    conn.close()
+    return cursor.rowcount == 1
+
+
+async def run_watch_cycles(interval: float, concurrency: int = 4) -> None:
+    """Evaluate the watchlist every `interval` seconds, forever."""
+    while True:
+        if await asyncio.to_thread(claim_cycle, interval):
+            try:
+                await evaluate_watches(concurrency=concurrency)
+            except Exception:
+                logger.exception("Watch cycle failed")
+        await asyncio.sleep(min(interval, 60.0))
@@ -0,0 +1,255 @@
+"""Process-shared state in a local SQLite database.
+
+With several uvicorn workers any request can land on any process, so state
+a later request depends on has to live outside the worker that created it.
+`SharedState` keeps it in one SQLite file in WAL mode, where readers never
+block the writer:
+
+- ``jobs``: the latest snapshot of every job, written by the worker that
+  runs it, so a poll answered by another worker still finds it;
+- ``catalog_batches``: items each worker adds to its catalog, with the query
+  they were scraped for, replayed into the other workers' in-memory catalogs
+  before they look a query up;
+- ``rate_counts``: each worker's request counts per rate-limit window,
+  summed by the other workers' limiters (see `app.ratelimit`).
+
+Only one connection can write at a time, so a write may wait for another
+worker's. Writes therefore run on a single writer thread per process
+(`submit`), which keeps them in order and leaves the event loop free while
+SQLite waits for the lock. Readers never wait for the writer in WAL mode.
+Reads are sub-millisecond and mostly stay on the loop, with a short
+``STATE_BUSY_TIMEOUT_MS`` bounding the rare waits (checkpoints). Pickle is used
+for records because the file is private to the workers of one deployment.
+"""
+
+import asyncio
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Optional, TypeVar
+
+from app.config import get_settings
+
+if TYPE_CHECKING:
+    from app.records import ScrapedItem
+    from app.services.catalog import ProductCatalog
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    data BLOB,
+    error TEXT,
+    summary BLOB,
+    timings BLOB,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    touched REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS catalog_batches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    origin INTEGER NOT NULL,
+    items BLOB NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rate_counts (
+    rule TEXT NOT NULL,
+    client TEXT NOT NULL,
+    window INTEGER NOT NULL,
+    origin INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (rule, client, window, origin)
+);
+CREATE INDEX IF NOT EXISTS idx_rate_counts_updated ON rate_counts (updated);
+"""
+
+# Writes between sweeps of expired rows
+_PRUNE_EVERY = 500
+
+# How long the writer thread waits for another worker's write to finish
+_WRITE_TIMEOUT = 5.0
+
+T = TypeVar("T")
+
+
+class SharedState:
+    def __init__(
+        self,
+        path: Path,
+        retention_seconds: float = 24 * 60 * 60,
+        catalog_ttl: float = 6 * 60 * 60,
+        origin: Optional[int] = None,
+        busy_timeout: float = 0.2,
+    ) -> None:
+        self.path = Path(path)
+        # Tags this worker's rows so it can skip them when reading the others'
+        self.origin = os.getpid() if origin is None else origin
+        self.retention_seconds = retention_seconds
+        self.catalog_ttl = catalog_ttl
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-state-writer")
+        self._writes = 0
+        self._catalog_cursor = 0
+
+    def connect(self) -> sqlite3.Connection:
+        """This thread's connection, opened (and the schema created) on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            writer = threading.current_thread().name.startswith("shared-state-writer")
+            timeout = _WRITE_TIMEOUT if writer else self.busy_timeout
+            conn = sqlite3.connect(self.path, timeout=timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def submit(self, write: Callable[..., T], *args: Any) -> "asyncio.Future[T]":
+        """Run `write` on the writer thread, after the writes submitted before it."""
+        return asyncio.get_running_loop().run_in_executor(self._writer, write, *args)
+
+    # -- jobs ----------------------------------------------------------
+
+    async def save_job(self, record: Any) -> None:
+        """Write the current state of a `JobRecord`."""
+        # Snapshot on the loop; the record may change again before the write runs
+        await self.submit(self._write_job, self._job_row(record))
+
+    def _job_row(self, record: Any) -> tuple:
+        return (
+            record.job_id,
+            record.kind,
+            record.status,
+            pickle.dumps(record.data) if record.data is not None else None,
+            record.error,
+            pickle.dumps(record.summary) if record.summary is not None else None,
+            pickle.dumps(record.timings),
+            record.created_at.isoformat(),
+            record.updated_at.isoformat(),
+            time.time(),
+        )
+
+    def _write_job(self, row: tuple) -> None:
+        self.connect().execute("INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+        self._wrote()
+
+    def load_job(self, job_id: str) -> Optional[dict[str, Any]]:
+        """Fields of the stored job as `JobRecord` keyword arguments, or None."""
+        row = self.connect().execute(
+            "SELECT kind, status, data, error, summary, timings, created_at, updated_at FROM jobs WHERE job_id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        kind, status, data, error, summary, timings, created_at, updated_at = row
+        return {
+            "job_id": job_id,
+            "kind": kind,
+            "status": status,
+            "data": pickle.loads(data) if data is not None else None,
+            "error": error,
+            "summary": pickle.loads(summary) if summary is not None else None,
+            "timings": pickle.loads(timings),
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+
+    def job_version(self, job_id: str) -> Optional[str]:
+        """The stored job's ``updated_at``; cheaper than `load_job` for polling."""
+        row = self.connect().execute("SELECT updated_at FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    # -- catalog -------------------------------------------------------
+
+    async def publish_items(self, items: list["ScrapedItem"], query: Optional[str] = None) -> None:
+        """Offer items this worker just scraped for `query` to the other workers' catalogs."""
+        if not items:
+            return
+        await self.submit(self._write_batch, pickle.dumps((query, items)), time.time())
+
+    def _write_batch(self, batch: bytes, created: float) -> None:
+        self.connect().execute(
+            "INSERT INTO catalog_batches (origin, items, created) VALUES (?, ?, ?)",
+            (self.origin, batch, created),
+        )
+        self._wrote()
+
+    def sync_catalog(self, catalog: "ProductCatalog") -> int:
+        """Upsert batches other workers published since the last sync. Returns items added."""
+        rows = self.connect().execute(
+            "SELECT id, items, created FROM catalog_batches WHERE id > ? AND origin != ? ORDER BY id",
+            (self._catalog_cursor, self.origin),
+        ).fetchall()
+        added = 0
+        for batch_id, batch, created in rows:
+            query, items = pickle.loads(batch)
+            added += catalog.upsert(items, now=created)
+            if query:
+                catalog.mark_covered(query, {item.store for item in items}, now=created)
+            self._catalog_cursor = batch_id
+        return added
+
+    # -- rate limits ---------------------------------------------------
+
+    def add_rate_counts(self, counts: list[tuple[str, str, int, int]]) -> None:
+        """Add this worker's ``(rule, client, window, hits)`` counts."""
+        if not counts:
+            return
+        now = time.time()
+        conn = self.connect()
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT INTO rate_counts VALUES (?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (rule, client, window, origin)"
+            " DO UPDATE SET count = count + excluded.count, updated = excluded.updated",
+            [(rule, client, window, self.origin, hits, now) for rule, client, window, hits in counts],
+        )
+        conn.execute("COMMIT")
+        self._wrote()
+
+    def rate_counts(self, since: float) -> list[tuple[str, str, int, int]]:
+        """Other workers' ``(rule, client, window, hits)`` counts updated after `since`."""
+        return self.connect().execute(
+            "SELECT rule, client, window, SUM(count) FROM rate_counts"
+            " WHERE updated >= ? AND origin != ? GROUP BY rule, client, window",
+            (since, self.origin),
+        ).fetchall()
+
+    # -- housekeeping --------------------------------------------------
+
+    def prune(self, now: Optional[float] = None) -> None:
+        """Delete jobs and rate counts past retention, and catalog batches past the catalog TTL."""
+        now = time.time() if now is None else now
+        conn = self.connect()
+        conn.execute("DELETE FROM jobs WHERE touched < ?", (now - self.retention_seconds,))
+        conn.execute("DELETE FROM catalog_batches WHERE created < ?", (now - self.catalog_ttl,))
+        conn.execute("DELETE FROM rate_counts WHERE updated < ?", (now - self.retention_seconds,))
+
+    def _wrote(self) -> None:
+        self._writes += 1
+        if self._writes % _PRUNE_EVERY == 0:
+            self.prune()
+
+
+@lru_cache(maxsize=1)
+def get_shared_state() -> Optional[SharedState]:
+    """The process's shared state, or None when ``STATE_BACKEND`` is ``memory``."""
+    settings = get_settings()
+    if settings.state_backend != "sqlite":
+        return None
+    return SharedState(
+        Path(settings.state_db_path),
+        retention_seconds=settings.state_retention_seconds,
+        catalog_ttl=settings.catalog_ttl_seconds,
+        busy_timeout=settings.state_busy_timeout_ms / 1000,
+    )
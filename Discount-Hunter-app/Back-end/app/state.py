@@ -1,18 +1,87 @@
 import asyncio
+import time
 from collections.abc import MutableMapping
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any, Optional
 
+from app.config import get_settings
+from app.shared import SharedState, get_shared_state
+
+FINISHED = ("completed", "failed")
+
 
 @dataclass
 class JobRecord:
     job_id: str
+    kind: str = "scrape"  # "scrape" or "batch"
     status: str = "queued"
-    data: Optional[list[dict[str, Any]]] = None
+    # ScrapedItem records, or {"query", "results"} entries for batch jobs;
+    # converted to the response shape only when the status is serialized
+    data: Optional[list[Any]] = None
     error: Optional[str] = None
+    # Aggregate computed over `data`, e.g. basket totals for batch jobs
+    summary: Optional[dict[str, Any]] = None
+    # Seconds per pipeline stage, filled in by app.metrics.stage_timer
+    timings: dict[str, float] = field(default_factory=dict)
+    # Encoded status response and its ETag, cached once the job has finished
+    payload: Optional[bytes] = field(default=None, repr=False)
+    etag: Optional[str] = None
     created_at: datetime = field(default_factory=datetime.utcnow)
     updated_at: datetime = field(default_factory=datetime.utcnow)
+    # Set (and replaced) on every update, to wake long-polling requests
+    changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False, compare=False)
+
+    @property
+    def version(self) -> str:
+        """Weak ETag that changes whenever the record is updated."""
+        return f'W/"{self.updated_at.timestamp():.6f}"'
+
+    async def wait_for_change(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for the next update. True if one came."""
+        try:
+            await asyncio.wait_for(self.changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+@dataclass
+class RemoteJobRecord(JobRecord):
+    """Snapshot of a job that another worker is running.
+
+    Nothing in this process is told when it changes, so waiting polls the
+    shared state and refreshes the snapshot in place.
+    """
+
+    shared: Optional[SharedState] = field(default=None, repr=False, compare=False)
+    poll_interval: float = 0.2
+
+    async def wait_for_change(self, timeout: float) -> bool:
+        seen = self.updated_at.isoformat()
+        deadline = time.monotonic() + timeout
+        while True:
+            if await asyncio.to_thread(self.shared.job_version, self.job_id) not in (seen, None):
+                await self.refresh()
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(self.poll_interval, remaining))
+
+    async def refresh(self) -> None:
+        fields = await asyncio.to_thread(self.shared.load_job, self.job_id)
+        if fields is None:
+            return
+        for name, value in _record_fields(fields).items():
+            setattr(self, name, value)
+        self.payload = self.etag = None
+
+
+def _record_fields(stored: dict[str, Any]) -> dict[str, Any]:
+    stored["created_at"] = datetime.fromisoformat(stored["created_at"])
+    stored["updated_at"] = datetime.fromisoformat(stored["updated_at"])
+    return stored
 
 
 class InMemoryJobStore(MutableMapping[str, JobRecord]):
@@ -37,9 +106,9 @@ class InMemoryJobStore(MutableMapping[str, JobRecord]):
     def __len__(self) -> int:
         return len(self._jobs)
 
-    async def create_job(self, job_id: str) -> JobRecord:
+    async def create_job(self, job_id: str, kind: str = "scrape") -> JobRecord:
         async with self._lock:
-            record = JobRecord(job_id=job_id)
+            record = JobRecord(job_id=job_id, kind=kind)
             self._jobs[job_id] = record
             return record
 
@@ -48,8 +117,9 @@ class InMemoryJobStore(MutableMapping[str, JobRecord]):
         job_id: str,
         *,
         status: Optional[str] = None,
-        data: Optional[list[dict[str, Any]]] = None,
+        data: Optional[list[Any]] = None,
         error: Optional[str] = None,
+        summary: Optional[dict[str, Any]] = None,
     ) -> JobRecord:
         async with self._lock:
             record = self._jobs[job_id]
@@ -59,13 +129,62 @@ class InMemoryJobStore(MutableMapping[str, JobRecord]):
                 record.data = data
             if error is not None:
                 record.error = error
+            if summary is not None:
+                record.summary = summary
+            record.payload = record.etag = None
             record.updated_at = datetime.utcnow()
+            record.changed.set()
+            record.changed = asyncio.Event()
             return record
 
     async def get_record(self, job_id: str) -> JobRecord | None:
-        async with self._lock:
-            return self._jobs.get(job_id)
+        # A dict read can't interleave with an update on the event loop, so
+        # polls don't queue behind the lock
+        return self._jobs.get(job_id)
+
+
+class SharedJobStore(InMemoryJobStore):
+    """Job store that also writes every job to `SharedState`.
+
+    The worker running a job keeps the live record and is its only writer;
+    any other worker asked for it loads a `RemoteJobRecord` snapshot. Finished
+    jobs never change again, so their snapshots are kept like local records.
+    """
+
+    def __init__(self, shared: SharedState, poll_interval: float = 0.2) -> None:
+        super().__init__()
+        self.shared = shared
+        self.poll_interval = poll_interval
+
+    async def create_job(self, job_id: str, kind: str = "scrape") -> JobRecord:
+        record = await super().create_job(job_id, kind)
+        await self.shared.save_job(record)
+        return record
+
+    async def update_job(self, job_id: str, **changes: Any) -> JobRecord:
+        record = await super().update_job(job_id, **changes)
+        await self.shared.save_job(record)
+        return record
+
+    async def get_record(self, job_id: str) -> JobRecord | None:
+        record = self._jobs.get(job_id)
+        if record is not None:
+            return record
+        stored = await asyncio.to_thread(self.shared.load_job, job_id)
+        if stored is None:
+            return None
+        record = RemoteJobRecord(**_record_fields(stored), shared=self.shared, poll_interval=self.poll_interval)
+        if record.status in FINISHED:
+            self._jobs[job_id] = record
+        return record
+
+
+def _create_job_store() -> InMemoryJobStore:
+    shared = get_shared_state()
+    if shared is None:
+        return InMemoryJobStore()
+    return SharedJobStore(shared, poll_interval=get_settings().state_poll_ms / 1000)
 
 
-job_store = InMemoryJobStore()
+job_store = _create_job_store()
 
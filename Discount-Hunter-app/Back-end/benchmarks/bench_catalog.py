@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""Benchmark catalog lookups for covered queries at catalog scale.
+
+Fills a catalog with synthetic titles (brand + product + size), marks the
+queries as scraped in every store and times `lookup`, which is what
+`scrape_all_stores` runs when the catalog can answer.
+
+Usage:
+    python benchmarks/bench_catalog.py [--entries 100000] [--limit 30] [--budget-ms 10]
+"""
+import argparse
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.records import ScrapedItem  # noqa: E402
+from app.services.catalog import ProductCatalog  # noqa: E402
+from bench_quantity import PRODUCTS, SIZES  # noqa: E402
+
+STORES = ("Barbora", "Rimi", "Lidl")
+BRANDS = [f"Brand{i}" for i in range(400)]
+QUERIES = ("pienas", "sviestas 82", "kava malta", "jogurtas braskiu 125 g")
+
+
+def build_catalog(entries: int, seed: int = 42) -> ProductCatalog:
+    rng = random.Random(seed)
+    catalog = ProductCatalog(max_entries=entries)
+    items = [
+        ScrapedItem(
+            store=STORES[i % len(STORES)],
+            title=f"{rng.choice(BRANDS)} {rng.choice(PRODUCTS)} {rng.choice(SIZES)} {i}",
+            price=round(rng.uniform(0.3, 15), 2),
+        )
+        for i in range(entries)
+    ]
+    catalog.upsert(items, now=0.0)
+    for query in QUERIES:
+        catalog.mark_covered(query, STORES, now=0.0)
+    return catalog
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=30, help="results kept per store")
+    parser.add_argument("--budget-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    catalog = build_catalog(args.entries)
+    print(f"entries: {len(catalog)}")
+    slowest = 0.0
+    for query in QUERIES:
+        lookup = lambda: catalog.lookup(query, STORES, max_age=60, now=1.0, limit=args.limit)  # noqa: E731
+        items, missing = lookup()
+        seconds = min(timeit.repeat(lookup, number=5, repeat=5)) / 5
+        slowest = max(slowest, seconds)
+        print(f"{query!r:<28} {len(items):>4} items  {seconds * 1000:7.2f} ms  missing={missing}")
+    print(f"slowest: {slowest * 1000:.2f} ms (budget {args.budget_ms:g} ms)")
+    return 0 if slowest * 1000 <= args.budget_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""Benchmark cross-store product matching over a synthetic multi-store catalog.
+
+Usage:
+    python benchmarks/bench_matching.py [--items 100000] [--brands 40]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.records import ScrapedItem  # noqa: E402
+from app.services.matching import match_products  # noqa: E402
+from bench_quantity import PRODUCTS, SIZES  # noqa: E402
+
+STORES = ["Rimi", "Barbora", "Lidl", "Iki", "Maxima"]
+
+
+def build_items(n: int, brands: int, seed: int = 42) -> list[ScrapedItem]:
+    """Products listed by several stores, each formatting the title its own way."""
+    rng = random.Random(seed)
+    names = [f"BRAND{chr(65 + i % 26)}{chr(65 + i // 26)}" for i in range(brands)]
+    items = []
+    while len(items) < n:
+        brand, product, size = rng.choice(names), rng.choice(PRODUCTS), rng.choice(SIZES)
+        for store in rng.sample(STORES, rng.randint(1, len(STORES))):
+            title = f"{brand} {product} {size}" if rng.random() < 0.5 else f"{brand} {product.lower()}, {size.replace(' ', '')}"
+            items.append(ScrapedItem(store=store, title=title.strip(), price=1.99))
+    return items[:n]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--brands", type=int, default=600)
+    args = parser.parse_args()
+
+    items = build_items(args.items, args.brands)
+
+    start = time.perf_counter()
+    clusters = match_products(items)
+    elapsed = time.perf_counter() - start
+
+    matched = sum(len(c) for c in clusters if len(c) > 1)
+    print(f"items:         {len(items)}")
+    print(f"clusters:      {len(clusters)}")
+    print(f"matched items: {matched} ({matched / len(items):.0%})")
+    print(f"match_products: {elapsed * 1000:.0f} ms ({len(items) / elapsed:,.0f} items/s)")
+
+
+if __name__ == "__main__":
+    main()
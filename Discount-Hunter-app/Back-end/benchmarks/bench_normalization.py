@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+"""Benchmark title normalization, cold and memoized.
+
+Cold titles are new to the title cache but mostly made of words seen before,
+as store titles are; expect a couple of microseconds per title cold and
+about 0.1 us memoized.
+
+Usage:
+    python benchmarks/bench_normalization.py [--titles 10000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.normalization import _chunk_words, normalize_title, normalize_titles  # noqa: E402
+from bench_quantity import build_corpus  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--titles", type=int, default=10_000)
+    args = parser.parse_args()
+
+    # Suffix an index so every title is distinct and the first pass is cold
+    titles = [f"{title} {i}" for i, title in enumerate(build_corpus(args.titles))]
+    normalize_title.cache_clear()
+    _chunk_words.clear()
+
+    start = time.perf_counter()
+    normalize_titles(titles)
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    normalize_titles(titles)
+    warm = time.perf_counter() - start
+
+    print(f"titles:   {len(titles)}")
+    print(f"cold:     {cold * 1000:.1f} ms ({cold / len(titles) * 1e6:.2f} us/title)")
+    print(f"memoized: {warm * 1000:.1f} ms ({warm / len(titles) * 1e6:.2f} us/title)")
+
+
+if __name__ == "__main__":
+    main()
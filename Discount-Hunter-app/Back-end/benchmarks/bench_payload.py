@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""Measure finished-job payload sizes with and without compression.
+
+Builds a completed job from a synthetic title corpus and fetches it through
+the app once per encoding, reporting body bytes and server-side time.
+
+Usage:
+    python benchmarks/bench_payload.py [--items 90] [--repeats 50]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.compression import ENCODINGS, compress  # noqa: E402
+from app.main import app  # noqa: E402
+from app.normalization import normalize_titles  # noqa: E402
+from app.quantity import fill_unit_prices  # noqa: E402
+from app.records import ScrapedItem  # noqa: E402
+from app.state import job_store  # noqa: E402
+from bench_quantity import build_corpus  # noqa: E402
+
+STORES = ("Barbora", "Rimi", "Lidl")
+
+
+def build_items(n: int, seed: int = 7) -> list[ScrapedItem]:
+    rng = random.Random(seed)
+    items = []
+    for i, title in enumerate(build_corpus(n, seed)):
+        store = STORES[i % len(STORES)]
+        price = round(rng.uniform(0.5, 15), 2)
+        items.append(ScrapedItem(
+            store=store,
+            title=title,
+            price=price,
+            original_price=round(price * 1.25, 2) if i % 4 == 0 else None,
+            url=f"https://www.{store.lower()}.lt/produktai/{i}",
+        ))
+    for item, normalized in zip(items, normalize_titles([item.title for item in items])):
+        item.normalized_title = normalized
+    fill_unit_prices(items)
+    return items
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=90)
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    async def finish() -> None:
+        await job_store.create_job("bench-payload")
+        await job_store.update_job("bench-payload", status="completed", data=build_items(args.items))
+
+    asyncio.run(finish())
+    client = TestClient(app)
+
+    identity = client.get("/api/scrape/bench-payload", headers={"Accept-Encoding": "identity"}).content
+    print(f"items:    {args.items}")
+    print(f"identity: {len(identity):>7,} bytes")
+    for encoding in ENCODINGS:
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            body = compress(identity, encoding)
+        elapsed = (time.perf_counter() - start) / args.repeats
+        print(
+            f"{encoding + ':':<9} {len(body):>7,} bytes ({len(body) / len(identity):.0%}),"
+            f" {elapsed * 1000:.2f} ms to compress (cached per ETag after the first request)"
+        )
+
+
+if __name__ == "__main__":
+    main()
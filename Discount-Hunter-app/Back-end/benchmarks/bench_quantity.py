@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""Benchmark the quantity/unit-price parser over a synthetic title corpus.
+
+Usage:
+    python benchmarks/bench_quantity.py [--titles 200000]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.quantity import fill_unit_prices, parse_quantity  # noqa: E402
+from app.records import ScrapedItem  # noqa: E402
+
+PRODUCTS = [
+    "Pienas 2,5%", "Sviestas 82%", "Varškės sūrelis", "Mineralinis vanduo", "Alus šviesusis",
+    "Kava malta", "Juodoji arbata", "Makaronai spagečiai", "Ryžiai ilgagrūdžiai", "Kiaušiniai M",
+    "Obuolių sultys", "Jogurtas braškių", "Dešrelės vištienos", "Maggi Magic Asia! Sausis",
+]
+SIZES = ["1 l", "0,5 l", "200 g", "1 kg", "6x0,5 l", "4 x 125 g", "10 vnt", "330 ml", "2,5kg", "", "75cl"]
+
+
+def build_corpus(n: int, seed: int = 42) -> list[str]:
+    rng = random.Random(seed)
+    return [f"{rng.choice(PRODUCTS)} {rng.choice(SIZES)}".strip() for _ in range(n)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--titles", type=int, default=200_000)
+    args = parser.parse_args()
+
+    titles = build_corpus(args.titles)
+    items = [ScrapedItem(store="Rimi", title=t, price=1.99) for t in titles]
+
+    start = time.perf_counter()
+    parsed = sum(1 for t in titles if parse_quantity(t) is not None)
+    parse_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fill_unit_prices(items)
+    fill_elapsed = time.perf_counter() - start
+
+    print(f"titles:            {len(titles)}")
+    print(f"with quantity:     {parsed} ({parsed / len(titles):.0%})")
+    print(f"parse_quantity:    {parse_elapsed * 1000:.1f} ms ({len(titles) / parse_elapsed:,.0f} titles/s)")
+    print(f"fill_unit_prices:  {fill_elapsed * 1000:.1f} ms ({len(items) / fill_elapsed:,.0f} items/s)")
+
+
+if __name__ == "__main__":
+    main()
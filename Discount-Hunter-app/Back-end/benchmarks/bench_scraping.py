@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+"""Offline parser benchmark over recorded store pages.
+
+Replays every page in the corpus through the store scraper's `_parse_html`,
+`extract_price_from_product_cards` and `extract_price`, and reports
+throughput, per-page latency percentiles and peak memory per target.
+
+The corpus is read from `--pages` (default: benchmarks/pages), laid out as
+`<store>/<query-with-dashes>.html`. Stores without recorded pages fall back
+to the test fixtures padded into full-size pages, so the suite always runs.
+
+Usage:
+    python benchmarks/bench_scraping.py                     # report only
+    python benchmarks/bench_scraping.py --save-baseline     # record baseline
+    python benchmarks/bench_scraping.py --check             # fail on regression
+
+benchmarks/baseline.json is the committed baseline, with the machine it was
+recorded on under "_machine". Re-record it when moving to other hardware.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.scrapers import get_registry  # noqa: E402
+from app.scrapers.html import parsed_pages  # noqa: E402
+from app.services.scraping import extract_price, extract_price_from_product_cards  # noqa: E402
+
+PAGES_DIR = Path(__file__).resolve().parent / "pages"
+FIXTURES_DIR = ROOT / "tests" / "fixtures"
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+# Query used for each bundled fixture
+FIXTURE_QUERIES = {"barbora": "pieno produktas", "rimi": "maggi", "lidl": "sriuba"}
+
+# Page chrome that real rendered pages carry around the product grid
+_PAGE_HEAD = (
+    "<head><title>Paieška</title>"
+    + "".join(f"<script>window.__state{i} = {{\"k\": \"{'x' * 2000}\"}};</script>" for i in range(20))
+    + "<style>" + ".c{color:red}" * 2000 + "</style></head>"
+)
+_PAGE_NAV = "<header><nav>" + "".join(f'<a href="/c/{i}">Kategorija {i}</a>' for i in range(200)) + "</nav></header>"
+_PAGE_FOOTER = "<footer>" + "<p>Informacija pirkėjams</p>" * 200 + "</footer>"
+
+
+class Page(NamedTuple):
+    store: str
+    name: str
+    query: str
+    html: str
+
+
+def _pad_fixture(html: str, cards: int = 60) -> str:
+    """Turn a one-card fixture into a full-size page with `cards` products."""
+    start, end = html.index("<body>") + len("<body>"), html.index("</body>")
+    grid = html[start:end] * cards
+    return f"<!doctype html><html>{_PAGE_HEAD}<body>{_PAGE_NAV}<main>{grid}</main>{_PAGE_FOOTER}</body></html>"
+
+
+def load_corpus(pages_dir: Path = PAGES_DIR) -> list[Page]:
+    pages = []
+    for store in sorted(FIXTURE_QUERIES):
+        recorded = sorted((pages_dir / store).glob("*.html")) if pages_dir.exists() else []
+        for path in recorded:
+            pages.append(Page(store, path.stem, path.stem.replace("-", " "), path.read_text(encoding="utf-8")))
+        if not recorded:
+            fixture = (FIXTURES_DIR / f"{store}_sample.html").read_text(encoding="utf-8")
+            pages.append(Page(store, "fixture", FIXTURE_QUERIES[store], fixture))
+            pages.append(Page(store, "fixture-padded", FIXTURE_QUERIES[store], _pad_fixture(fixture)))
+    return pages
+
+
+def _targets(page: Page) -> dict[str, Callable[[], object]]:
+    registry = get_registry()
+    scraper = registry.get(registry.select([page.store])[0])
+    return {
+        # Cold parse: an unchanged page would otherwise be served from the parsed-page cache
+        f"{page.store}._parse_html": lambda: parsed_pages.clear() or scraper._parse_html(page.html, base_url="https://example.lt"),
+        "extract_price_from_product_cards": lambda: extract_price_from_product_cards(page.html, page.query),
+        "extract_price": lambda: extract_price(page.html),
+    }
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(pages: list[Page], repeat: int) -> dict[str, dict[str, float]]:
+    latencies: dict[str, list[float]] = {}
+    page_medians: dict[str, float] = {}
+    peaks: dict[str, int] = {}
+    for page in pages:
+        for name, fn in _targets(page).items():
+            fn()  # warm caches and imports
+            runs = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                fn()
+                runs.append(time.perf_counter() - start)
+            latencies.setdefault(name, []).extend(runs)
+            page_medians[name] = page_medians.get(name, 0.0) + statistics.median(runs)
+
+            tracemalloc.start()
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            peaks[name] = max(peaks.get(name, 0), peak)
+
+    report = {}
+    for name, samples in latencies.items():
+        report[name] = {
+            "calls": len(samples),
+            "pages_per_s": round(len(samples) / sum(samples), 1),
+            "p50_ms": round(_percentile(samples, 50) * 1000, 3),
+            "p95_ms": round(_percentile(samples, 95) * 1000, 3),
+            "p99_ms": round(_percentile(samples, 99) * 1000, 3),
+            "mean_ms": round(statistics.mean(samples) * 1000, 3),
+            # Sum of per-page medians: the stable number regressions are judged on
+            "corpus_ms": round(page_medians[name] * 1000, 3),
+            "peak_kb": round(peaks[name] / 1024, 1),
+        }
+    return report
+
+
+def machine_notes() -> dict[str, object]:
+    """Where a baseline was recorded; timings only compare on similar machines."""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor() or "unknown",
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return a description of every metric that regressed past `tolerance`."""
+    regressions = []
+    for name, metrics in report.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for key in ("corpus_ms", "peak_kb"):
+            if base.get(key) and metrics[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{name} {key}: {metrics[key]} > baseline {base[key]} (+{tolerance:.0%})")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=Path, default=PAGES_DIR)
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per page and target")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="exit 1 when a metric regresses")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline")
+    args = parser.parse_args()
+
+    pages = load_corpus(args.pages)
+    report = run(pages, args.repeat)
+
+    print(f"{len(pages)} pages, {args.repeat} runs each")
+    print(
+        f"{'target':<36}{'pages/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        f"{'corpus ms':>11}{'peak KB':>10}"
+    )
+    for name, m in sorted(report.items()):
+        print(
+            f"{name:<36}{m['pages_per_s']:>10}{m['p50_ms']:>10}{m['p95_ms']:>10}{m['p99_ms']:>10}"
+            f"{m['corpus_ms']:>11}{m['peak_kb']:>10}"
+        )
+
+    if args.save_baseline:
+        baseline = {"_machine": machine_notes(), **report}
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"baseline saved to {args.baseline}")
+
+    if args.check:
+        if not args.baseline.exists():
+            print(f"no baseline at {args.baseline}; run with --save-baseline first")
+            return 1
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        recorded_on = baseline.pop("_machine", None)
+        if recorded_on and recorded_on != machine_notes():
+            print(f"note: baseline was recorded on {recorded_on}")
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""Cold-start budget for `import app.main`.
+
+Imports the app in fresh interpreters with ``-X importtime``, reports the
+median total and the packages that cost the most, and fails if the median
+goes over budget or if a module that should load lazily (Pillow, bs4,
+lxml, httpx) is imported at startup.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--budget-ms 800]
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+LAZY_MODULES = ("PIL", "bs4", "lxml", "httpx")
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_profile() -> tuple[float, dict[str, float], set[str]]:
+    """Import app.main once. Returns (total ms, self ms per top-level package, modules)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    total = 0.0
+    by_package: dict[str, float] = defaultdict(float)
+    modules = set()
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, module = match.groups()
+        modules.add(module)
+        package = module.split(".")[0]
+        if package == "app":
+            package = ".".join(module.split(".")[:2])
+        by_package[package] += int(self_us) / 1000
+        if module == "app.main":
+            total = int(cumulative_us) / 1000
+    return total, by_package, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=800.0)
+    parser.add_argument("--top", type=int, default=12)
+    args = parser.parse_args()
+
+    totals = []
+    per_package: dict[str, list[float]] = defaultdict(list)
+    eager = set()
+    for _ in range(args.runs):
+        total, by_package, modules = import_profile()
+        totals.append(total)
+        for package, ms in by_package.items():
+            per_package[package].append(ms)
+        eager |= {m for m in LAZY_MODULES if m in modules}
+
+    median = statistics.median(totals)
+    print(f"import app.main: median {median:.0f} ms, min {min(totals):.0f} ms over {args.runs} runs")
+    print(f"{'package':<28}{'median self ms':>16}")
+    ranked = sorted(per_package.items(), key=lambda kv: statistics.median(kv[1]), reverse=True)
+    for package, values in ranked[:args.top]:
+        print(f"{package:<28}{statistics.median(values):>16.1f}")
+
+    failed = False
+    if eager:
+        print(f"FAIL: imported at startup, should load lazily: {', '.join(sorted(eager))}")
+        failed = True
+    if median > args.budget_ms:
+        print(f"FAIL: cold start {median:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""Throughput of the API served by 1..N uvicorn workers with shared state.
+
+Starts the ScrapingBee stand-in, then for each worker count starts the API
+with STATE_BACKEND=sqlite (a fresh state file per run) and drives it with
+the load test users. Polls are spread over all workers, so a run only
+completes if every worker can serve jobs started on the others.
+
+Usage:
+    python benchmarks/bench_workers.py --max-workers 4 --users 40 --jobs 5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from load_test import _percentile, add_load_arguments, run_load  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _start(command: list[str], env: dict[str, str], health_url: str, timeout: float = 30.0) -> subprocess.Popen:
+    proc = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{command[2]} exited with {proc.returncode}")
+        try:
+            if httpx.get(health_url, timeout=1.0).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"{health_url} did not come up in {timeout:.0f} s")
+
+
+def _stop(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--port", type=int, default=3100)
+    parser.add_argument("--standin-port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="stand-in upstream latency")
+    add_load_arguments(parser)
+    args = parser.parse_args()
+    args.base_url = f"http://127.0.0.1:{args.port}"
+
+    standin = _start(
+        [sys.executable, "benchmarks/scrapingbee_standin.py", "--port", str(args.standin_port),
+         "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.latency_ms / 4)],
+        dict(os.environ),
+        f"http://127.0.0.1:{args.standin_port}/stats",
+    )
+    rows = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for workers in range(1, args.max_workers + 1):
+                env = dict(
+                    os.environ,
+                    STATE_BACKEND="sqlite",
+                    STATE_DB_PATH=str(Path(tmp) / f"state-{workers}.db"),
+                    SCRAPINGBEE_API_KEY="standin",
+                    SCRAPINGBEE_BASE_URL=f"http://127.0.0.1:{args.standin_port}/api/v1/",
+                    LOG_LEVEL="WARNING",
+                    # Every load-test user comes from one address
+                    RATE_LIMIT_ENABLED="0",
+                )
+                api = _start(
+                    [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port),
+                     "--workers", str(workers), "--log-level", "warning"],
+                    env,
+                    f"{args.base_url}/healthz",
+                )
+                try:
+                    results, elapsed = asyncio.run(run_load(args))
+                finally:
+                    _stop(api)
+                completed = [seconds for status, seconds, _ in results if status == "completed"]
+                rows.append((
+                    workers,
+                    len(completed) / elapsed,
+                    _percentile(completed, 50) if completed else float("nan"),
+                    _percentile(completed, 95) if completed else float("nan"),
+                    _percentile(completed, 99) if completed else float("nan"),
+                    statistics.mean(p for _, _, p in results) if results else 0.0,
+                    len(results) - len(completed),
+                ))
+    finally:
+        _stop(standin)
+
+    print(
+        f"{'workers':>7}  {'jobs/s':>7}  {'p50 s':>6}  {'p95 s':>6}  {'p99 s':>6}  {'polls/job':>9}  {'not completed':>13}"
+    )
+    for workers, rate, p50, p95, p99, polls, failed in rows:
+        print(f"{workers:>7}  {rate:>7.2f}  {p50:>6.2f}  {p95:>6.2f}  {p99:>6.2f}  {polls:>9.1f}  {failed:>13}")
+    return 0 if all(row[-1] == 0 for row in rows) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""End-to-end load test: N concurrent users driving /api/scrape + polling.
+
+Run the API against the ScrapingBee stand-in (scrapingbee_standin.py), then:
+    python benchmarks/load_test.py --base-url http://127.0.0.1:3000 --users 20 --jobs 5
+
+Each user starts a job, polls it until it completes or fails, and repeats.
+With --wait N, polls long-poll instead: each request is held for up to N
+seconds until the job changes, sending the last ETag as If-None-Match.
+Queries get a unique suffix by default so the product catalog cannot answer
+them and every job reaches the (stand-in) upstream.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from itertools import count
+
+import httpx
+
+QUERIES = ["pieno produktas", "maggi", "sriuba", "sviestas", "kava"]
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_job(
+    client: httpx.AsyncClient, query: str, poll_interval: float, timeout: float, wait: float = 0.0,
+) -> tuple[str, float, int]:
+    """Start one job and poll it. Returns (final status, seconds, polls)."""
+    start = time.perf_counter()
+    resp = await client.post("/api/scrape", json={"query": query})
+    resp.raise_for_status()
+    job_id = resp.json()["jobId"]
+
+    polls = 0
+    etag = None
+    while time.perf_counter() - start < timeout:
+        if wait:
+            headers = {"If-None-Match": etag} if etag else {}
+            resp = await client.get(f"/api/scrape/{job_id}", params={"wait": wait}, headers=headers)
+        else:
+            await asyncio.sleep(poll_interval)
+            resp = await client.get(f"/api/scrape/{job_id}")
+        polls += 1
+        if resp.status_code == 304:
+            continue
+        etag = resp.headers.get("etag")
+        status = resp.json()["status"]
+        if status in ("completed", "failed"):
+            return status, time.perf_counter() - start, polls
+    return "timeout", time.perf_counter() - start, polls
+
+
+async def user(client: httpx.AsyncClient, args: argparse.Namespace, ids: count, results: list) -> None:
+    for _ in range(args.jobs):
+        n = next(ids)
+        query = QUERIES[n % len(QUERIES)]
+        if not args.repeat_queries:
+            query = f"{query} {n}"
+        try:
+            results.append(await run_job(client, query, args.poll_interval, args.timeout, args.wait))
+        except httpx.HTTPError as exc:
+            results.append((f"error:{type(exc).__name__}", 0.0, 0))
+
+
+async def run_load(args: argparse.Namespace) -> tuple[list[tuple[str, float, int]], float]:
+    """Drive the API with `args.users` users. Returns (per-job results, wall seconds)."""
+    results: list[tuple[str, float, int]] = []
+    ids = count()
+    limits = httpx.Limits(max_connections=args.users * 2)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30.0) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(user(client, args, ids, results) for _ in range(args.users)))
+        elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    results, elapsed = await run_load(args)
+
+    by_status: dict[str, int] = {}
+    for status, _, _ in results:
+        by_status[status] = by_status.get(status, 0) + 1
+    completed = [seconds for status, seconds, _ in results if status == "completed"]
+    polls = [p for _, _, p in results]
+
+    print(f"users: {args.users}, jobs/user: {args.jobs}, wall: {elapsed:.1f} s")
+    print(f"statuses: {by_status}")
+    print(f"throughput: {len(completed) / elapsed:.2f} completed jobs/s")
+    if completed:
+        print(
+            f"job latency s: p50 {_percentile(completed, 50):.2f}  p95 {_percentile(completed, 95):.2f}"
+            f"  p99 {_percentile(completed, 99):.2f}  max {max(completed):.2f}"
+        )
+    if polls:
+        print(f"polls/job: mean {statistics.mean(polls):.1f}  total {sum(polls)}")
+    return 0 if completed else 1
+
+
+def add_load_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--jobs", type=int, default=5, help="jobs per user")
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--wait", type=float, default=0.0, help="long-poll for up to this many seconds per request")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-job timeout in seconds")
+    parser.add_argument("--repeat-queries", action="store_true", help="reuse queries so the catalog can answer")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:3000")
+    add_load_arguments(parser)
+    return asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""Re-run the scrape pipeline over archived pages, with no network.
+
+Pages are archived while the API runs with ARCHIVE_PAGES=1. This script
+switches on SCRAPE_REPLAY and runs `scrape_all_stores` for every archived
+query (or the ones given), with an empty catalog each time, so parser or
+matching changes can be checked against real markup and timed repeatably.
+
+Usage:
+    python benchmarks/replay.py                         # every archived query
+    python benchmarks/replay.py pienas "maggi sriuba"   # selected queries
+    python benchmarks/replay.py --seed-from-corpus      # archive the bench corpus first
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from urllib.parse import unquote_plus
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ["SCRAPE_REPLAY"] = "1"
+
+from app.config import get_settings  # noqa: E402
+from app.metrics import track_job  # noqa: E402
+from app.scrapers import get_registry  # noqa: E402
+from app.scrapers.archive import get_archive  # noqa: E402
+from app.services.catalog import catalog  # noqa: E402
+from app.services.scraping import scrape_all_stores  # noqa: E402
+
+
+def seed_from_corpus() -> int:
+    """Archive the benchmark page corpus under each store's search URL."""
+    from bench_scraping import load_corpus
+
+    archive = get_archive()
+    registry = get_registry()
+    pages = load_corpus()
+    for page in pages:
+        config = registry.config(registry.select([page.store])[0])
+        archive.put(config.search_url.format(query=page.query), page.html)
+    return len(pages)
+
+
+def archived_queries() -> list[str]:
+    """Recover the queries behind archived store search URLs."""
+    registry = get_registry()
+    prefixes = [registry.config(name).search_url.split("{query}")[0] for name in registry.names()]
+    queries = []
+    for url in get_archive().urls():
+        for prefix in prefixes:
+            if url.startswith(prefix):
+                query = unquote_plus(url[len(prefix):])
+                if query not in queries:
+                    queries.append(query)
+    return queries
+
+
+async def replay(queries: list[str]) -> None:
+    for query in queries:
+        catalog.clear()
+        timings: dict[str, float] = {}
+        start = time.perf_counter()
+        with track_job(timings):
+            items = await scrape_all_stores(query)
+        elapsed = time.perf_counter() - start
+        stores = sorted({item.store for item in items})
+        clusters = len({item.cluster_id for item in items})
+        print(f"{query!r}: {len(items)} items from {stores}, {clusters} clusters, {elapsed * 1000:.1f} ms")
+        for stage, seconds in sorted(timings.items()):
+            print(f"    {stage:<16} {seconds * 1000:8.2f} ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("queries", nargs="*")
+    parser.add_argument("--seed-from-corpus", action="store_true")
+    args = parser.parse_args()
+
+    print(f"archive: {get_settings().archive_dir}")
+    if args.seed_from_corpus:
+        print(f"archived {seed_from_corpus()} corpus pages")
+    queries = args.queries or archived_queries()
+    if not queries:
+        print("nothing archived yet; run the API with ARCHIVE_PAGES=1 or pass --seed-from-corpus")
+        return 1
+    asyncio.run(replay(queries))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
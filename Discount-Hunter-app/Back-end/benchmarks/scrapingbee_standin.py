@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""Local stand-in for the ScrapingBee API, for load tests without credits.
+
+Serves the benchmark page corpus (see bench_scraping.py) for whatever store
+URL is requested, with configurable latency, error and rate-limit rates.
+
+Usage:
+    python benchmarks/scrapingbee_standin.py --port 8900 --latency-ms 1500 \\
+        --jitter-ms 500 --error-rate 0.02 --rate-limit-rate 0.05
+
+Then start the API against it:
+    set SCRAPINGBEE_API_KEY=standin
+    set SCRAPINGBEE_BASE_URL=http://127.0.0.1:8900/api/v1/
+"""
+import argparse
+import asyncio
+import random
+import sys
+from pathlib import Path
+from urllib.parse import urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fastapi import FastAPI, Query  # noqa: E402
+from fastapi.responses import HTMLResponse, JSONResponse  # noqa: E402
+
+from bench_scraping import PAGES_DIR, load_corpus  # noqa: E402
+
+# Store host -> corpus store key
+HOSTS = {"barbora.lt": "barbora", "rimi.lt": "rimi", "lidl.lt": "lidl"}
+
+
+def create_app(
+    *,
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    error_rate: float = 0.0,
+    rate_limit_rate: float = 0.0,
+    pages_dir: Path = PAGES_DIR,
+    seed: int | None = None,
+) -> FastAPI:
+    rng = random.Random(seed)
+    pages: dict[str, list[str]] = {}
+    for page in load_corpus(pages_dir):
+        pages.setdefault(page.store, []).append(page.html)
+    stats = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0}
+
+    app = FastAPI(title="ScrapingBee stand-in")
+
+    @app.get("/api/v1/")
+    async def scrape(url: str = Query(...), api_key: str = Query(...)):
+        stats["requests"] += 1
+        delay = max(0.0, latency_ms + rng.uniform(-jitter_ms, jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+
+        roll = rng.random()
+        if roll < rate_limit_rate:
+            stats["rate_limited"] += 1
+            return JSONResponse({"message": "Too many concurrent requests"}, status_code=429)
+        if roll < rate_limit_rate + error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"message": "Stand-in upstream error"}, status_code=500)
+
+        host = (urlparse(url).hostname or "").removeprefix("www.")
+        store = HOSTS.get(host)
+        if store not in pages:
+            stats["errors"] += 1
+            return JSONResponse({"message": f"No recorded pages for {host}"}, status_code=404)
+        stats["ok"] += 1
+        return HTMLResponse(rng.choice(pages[store]))
+
+    @app.get("/stats")
+    async def get_stats() -> dict[str, int]:
+        return stats
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=1000.0)
+    parser.add_argument("--jitter-ms", type=float, default=250.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 500 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of 429 responses")
+    parser.add_argument("--pages", type=Path, default=PAGES_DIR)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    app = create_app(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        pages_dir=args.pages,
+        seed=args.seed,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,32 @@
+import argparse
+import os
 import sys
 import subprocess
-import time
-import threading
 
 sys.path.insert(0, '.')
 
-def run_server():
-    """Run the server in a subprocess to avoid shutdown issues."""
-    print("Starting Uvicorn server...")
-    subprocess.run([
-        sys.executable, '-m', 'uvicorn',
-        'app.main:app',
-        '--host', '127.0.0.1',
-        '--port', '3000',
-        '--reload', 'False'
-    ], env={'PYTHONPATH': '.'})
+def run_server(host: str = '127.0.0.1', port: int = 3000, workers: int = 1):
+    """Run the server in a subprocess to avoid shutdown issues.
+
+    With more than one worker, uvicorn's supervisor runs (and restarts) the
+    worker processes, and job state moves to the SQLite file they share so
+    a job can be polled through any of them.
+    """
+    env = dict(os.environ, PYTHONPATH='.')
+    command = [sys.executable, '-m', 'uvicorn', 'app.main:app', '--host', host, '--port', str(port)]
+    if workers > 1:
+        env.setdefault('STATE_BACKEND', 'sqlite')
+        command += ['--workers', str(workers)]
+    print(f"Starting Uvicorn server with {workers} worker(s)...")
+    subprocess.run(command, env=env)
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the Discount Hunter API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3000)
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WORKERS', '1')))
+    args = parser.parse_args()
     try:
-        run_server()
+        run_server(args.host, args.port, args.workers)
     except KeyboardInterrupt:
         print("\nServer interrupted by user")
@@ -0,0 +1,39 @@
+import pytest
+
+from app.scrapers.archive import PageArchive, PageNotArchived
+
+
+def test_archive_roundtrip_dedupe_and_rotation(tmp_path):
+    archive = PageArchive(tmp_path)
+    page = "<html><body>" + "<div class='product'>Pienas 1 l</div>" * 200 + "</body></html>"
+
+    sha = archive.put("https://www.rimi.lt/paieska?q=pienas", page)
+    assert archive.put("https://www.rimi.lt/paieska?q=pieno", page) == sha
+    assert archive.get("https://www.rimi.lt/paieska?q=pienas") == page
+    assert len(list(tmp_path.glob("objects/*/*"))) == 1
+    assert archive.size() < len(page) / 10
+    assert archive.size() == sum(path.stat().st_size for path in tmp_path.glob("objects/*/*"))
+
+    # A reopened archive reads the index back; rotation drops the oldest page
+    small = PageArchive(tmp_path, max_bytes=1)
+    small.put("https://www.lidl.lt/c/search?q=kava", "<html>kava</html>")
+    with pytest.raises(PageNotArchived):
+        small.get("https://www.rimi.lt/paieska?q=pienas")
+    assert small.urls() == ["https://www.lidl.lt/c/search?q=kava"]
+
+
+def test_unchanged_refetch_skips_index_and_index_is_compacted(tmp_path):
+    archive = PageArchive(tmp_path)
+    archive.INDEX_COMPACT_LINES = 4
+    url = "https://www.rimi.lt/paieska?q=pienas"
+
+    for _ in range(3):
+        archive.put(url, "<html>pienas 1,29</html>")
+    assert len((tmp_path / "index.jsonl").read_text().splitlines()) == 1
+
+    for cents in range(30, 36):
+        archive.put(url, f"<html>pienas 1,{cents}</html>")
+    lines = (tmp_path / "index.jsonl").read_text().splitlines()
+    assert len(lines) <= 4
+    assert archive.get(url) == "<html>pienas 1,35</html>"
+    assert PageArchive(tmp_path).get(url) == "<html>pienas 1,35</html>"
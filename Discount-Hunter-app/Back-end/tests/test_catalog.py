@@ -0,0 +1,69 @@
+import time
+
+from app.services.catalog import ProductCatalog
+from app.records import ScrapedItem
+
+
+def _item(store, title, price):
+    return ScrapedItem(store=store, title=title, price=price, url=f"https://{store}/p")
+
+
+def test_catalog_search_and_coverage():
+    catalog = ProductCatalog()
+    catalog.upsert([
+        _item("Rimi", "Pienas 2,5% 1 l", 1.19),
+        _item("Lidl", "Pienas 3,2% 1 l", 1.09),
+        _item("Rimi", "Sviestas 82%", 2.49),
+    ], now=1000.0)
+
+    titles = {e.title for e in catalog.search("pienas", now=1000.0)}
+    assert titles == {"Pienas 2,5% 1 l", "Pienas 3,2% 1 l"}
+
+    # Matching entries alone don't cover a store; the query was never scraped
+    items, missing = catalog.lookup("pienas", ["Barbora", "Rimi", "Lidl"], max_age=60, now=1030.0)
+    assert (items, missing) == ([], ["Barbora", "Rimi", "Lidl"])
+
+    catalog.mark_covered("pienas", ["Rimi", "Lidl"], now=1000.0)
+    items, missing = catalog.lookup("pienas", ["Barbora", "Rimi", "Lidl"], max_age=60, now=1030.0)
+    assert {i.store for i in items} == {"Rimi", "Lidl"}
+    assert missing == ["Barbora"]
+
+    # A broader scrape covers a narrower query, but not the other way round
+    _, missing = catalog.lookup("pienas 2,5%", ["Rimi"], max_age=60, now=1030.0)
+    assert missing == []
+    catalog.mark_covered("sviestas 82%", ["Rimi"], now=1000.0)
+    _, missing = catalog.lookup("sviestas", ["Rimi"], max_age=60, now=1030.0)
+    assert missing == ["Rimi"]
+
+    # Stale scrapes no longer cover the store
+    _, missing = catalog.lookup("pienas", ["Rimi", "Lidl"], max_age=60, now=2000.0)
+    assert missing == ["Rimi", "Lidl"]
+
+
+def test_catalog_evicts_oldest_entries():
+    catalog = ProductCatalog(max_entries=2)
+    catalog.upsert([_item("Rimi", "Obuoliai", 1.0), _item("Rimi", "Kriaušės", 2.0)])
+    catalog.upsert([_item("Rimi", "Bananai", 1.5)])
+    assert len(catalog) == 2
+    assert catalog.search("obuoliai") == []
+    assert catalog.search("bananai")
+
+
+def test_covered_lookup_is_fast_and_capped_at_catalog_scale():
+    stores = ["Barbora", "Rimi", "Lidl"]
+    catalog = ProductCatalog()
+    catalog.upsert(
+        [
+            ScrapedItem(store=stores[i % 3], title=f"Pienas {i} l", price=1.0, normalized_title=f"pienas {i} l")
+            for i in range(20_000)
+        ],
+        now=0.0,
+    )
+    catalog.mark_covered("pienas", stores, now=0.0)
+
+    start = time.perf_counter()
+    items, missing = catalog.lookup("pienas", stores, max_age=60, now=1.0, limit=30)
+    elapsed = time.perf_counter() - start
+    assert missing == []
+    assert len(items) == 90
+    assert elapsed < 0.01
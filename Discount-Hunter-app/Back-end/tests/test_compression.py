@@ -0,0 +1,50 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.compression import choose_encoding
+from app.main import app
+from app.records import ScrapedItem
+from app.state import job_store
+
+
+def test_choose_encoding_honours_q_values():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, identity") is None
+    assert choose_encoding("*") in ("br", "gzip")
+    assert choose_encoding(None) is None
+
+
+def test_large_finished_job_is_compressed_and_cacheable():
+    async def finish():
+        await job_store.create_job("big-job")
+        await job_store.update_job("big-job", status="completed", data=[
+            ScrapedItem(store="Rimi", title=f"Pienas {i} 1 l", price=1.19, url=f"https://www.rimi.lt/p/{i}")
+            for i in range(90)
+        ])
+
+    asyncio.run(finish())
+    client = TestClient(app)
+
+    plain = client.get("/api/scrape/big-job", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert "immutable" in plain.headers["cache-control"]
+
+    packed = client.get("/api/scrape/big-job", headers={"Accept-Encoding": "gzip"})
+    assert packed.headers["content-encoding"] == "gzip"
+    assert packed.headers["vary"] == "Accept-Encoding"
+    assert packed.headers["etag"] == "W/" + plain.headers["etag"]
+    assert int(packed.headers["content-length"]) < len(plain.content) / 4
+    assert packed.content == plain.content  # httpx decodes the gzip body
+
+    again = client.get(
+        "/api/scrape/big-job", headers={"Accept-Encoding": "gzip", "If-None-Match": packed.headers["etag"]}
+    )
+    assert again.status_code == 304
+
+
+def test_small_responses_are_not_compressed():
+    response = TestClient(app).get("/api/stores", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["cache-control"].startswith("public")
+    assert response.json() == ["Barbora", "Rimi", "Lidl"]
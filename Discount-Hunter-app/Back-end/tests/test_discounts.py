@@ -0,0 +1,55 @@
+from app.records import ScrapedItem
+from app.scrapers.html import parsed_pages
+from app.scrapers.store_lidl import LidlScraper
+from app.scrapers.store_rimi import RimiScraper
+from app.services.catalog import ProductCatalog
+
+
+RIMI_PAGE = """
+<ul>
+  <li class="product-tile">
+    <h3 class="product-title">Sviestas 82 % 200 g</h3>
+    <div class="price"><span class="old-price">3,49 €</span> 2,79 €</div>
+    <div class="price-badge">Su Mano Rimi 2,49 €</div>
+  </li>
+  <li class="product-tile">
+    <h3 class="product-title">Pienas 1 l</h3>
+    <span class="price">1,19 €</span>
+  </li>
+</ul>
+"""
+
+LIDL_PAGE = """
+<div class="product-card">
+  <h3 class="title">Kava 500 g</h3>
+  <span class="price lidl-plus-price">4,99</span>
+  <span class="price">5,99</span>
+</div>
+"""
+
+
+def test_scrapers_read_old_and_loyalty_prices():
+    parsed_pages.clear()
+    butter, milk = RimiScraper()._parse_html(RIMI_PAGE, base_url="https://www.rimi.lt")
+    assert (butter.price, butter.original_price, butter.loyalty_price) == (2.79, 3.49, 2.49)
+    assert butter.discount_percent == 28.7
+    assert (milk.price, milk.original_price, milk.discount_percent) == (1.19, None, None)
+
+    [coffee] = LidlScraper()._parse_html(LIDL_PAGE, base_url="https://www.lidl.lt")
+    assert (coffee.price, coffee.loyalty_price, coffee.discount_percent) == (5.99, 4.99, 16.7)
+
+
+def test_catalog_lists_current_discounts_per_store():
+    catalog = ProductCatalog()
+    catalog.upsert([
+        ScrapedItem(store="Rimi", title="Sviestas", price=2.79, original_price=3.49, discount_percent=20.1),
+        ScrapedItem(store="Rimi", title="Pienas", price=1.19),
+        ScrapedItem(store="Lidl", title="Kava", price=5.99, loyalty_price=4.99, discount_percent=16.7),
+    ], now=0)
+    assert [e.title for e in catalog.discounted(now=0)] == ["Sviestas", "Kava"]
+    assert [e.title for e in catalog.discounted(["Lidl"], now=0)] == ["Kava"]
+    assert catalog.discounted(min_percent=18, now=0)[0].to_item().original_price == 3.49
+
+    # The offer ended: the next scrape has no discount
+    catalog.upsert([ScrapedItem(store="Rimi", title="Sviestas", price=3.49)], now=1)
+    assert [e.title for e in catalog.discounted(now=1)] == ["Kava"]
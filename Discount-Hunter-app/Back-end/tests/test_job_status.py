@@ -0,0 +1,51 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.records import ScrapedItem
+from app.state import job_store
+
+
+def test_finished_job_is_served_from_cache_with_etag():
+    async def finish():
+        await job_store.create_job("etag-job")
+        return await job_store.update_job("etag-job", status="completed", data=[
+            ScrapedItem(store="Rimi", title="Pienas 1 l", price=1.19, url="https://rimi.lt/p"),
+        ])
+
+    record = asyncio.run(finish())
+    client = TestClient(app)
+
+    first = client.get("/api/scrape/etag-job")
+    assert first.status_code == 200
+    assert first.json()["data"][0]["price"] == 1.19
+    etag = first.headers["etag"]
+    assert record.payload == first.content
+
+    again = client.get("/api/scrape/etag-job", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+
+
+def test_long_poll_returns_on_next_update():
+    async def scenario():
+        record = await job_store.create_job("wait-job")
+        seen = record.version
+
+        async def finish_soon():
+            await asyncio.sleep(0.05)
+            await job_store.update_job("wait-job", status="running")
+
+        asyncio.create_task(finish_soon())
+        changed = await record.wait_for_change(5)
+        return seen, record, changed
+
+    seen, record, changed = asyncio.run(scenario())
+    assert changed
+    assert record.status == "running"
+
+    client = TestClient(app)
+    assert client.get("/api/scrape/wait-job", headers={"If-None-Match": seen}).status_code == 200
+    stale = client.get("/api/scrape/wait-job", params={"wait": 0.05}, headers={"If-None-Match": record.version})
+    assert stale.status_code == 304
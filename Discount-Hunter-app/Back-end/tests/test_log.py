@@ -0,0 +1,27 @@
+import json
+import logging
+
+from app.log import ContextFilter, JsonFormatter, SamplingFilter, log_context
+
+
+def _record(level=logging.INFO, **extra):
+    record = logging.LogRecord("app.test", level, __file__, 1, "hello %s", ("world",), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_context_and_extra():
+    record = _record(query="pienas")
+    with log_context(job_id="job-1", store="Rimi"):
+        ContextFilter().filter(record)
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload["msg"] == "hello world"
+    assert payload["job_id"] == "job-1"
+    assert payload["store"] == "Rimi"
+    assert payload["query"] == "pienas"
+
+
+def test_sampling_filter_only_drops_debug():
+    sampler = SamplingFilter(rate=0.0)
+    assert not sampler.filter(_record(logging.DEBUG))
+    assert sampler.filter(_record(logging.WARNING))
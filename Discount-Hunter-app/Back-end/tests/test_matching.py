@@ -0,0 +1,31 @@
+from app.services.matching import extract_features, match_products
+from app.records import ScrapedItem
+
+
+def test_extract_features():
+    f = extract_features("DVARO pienas 2,5% 1 l")
+    assert f.brand == "dvaro"
+    assert f.size == (1.0, "l", 1)
+
+
+def test_match_products_groups_across_stores():
+    items = [
+        ScrapedItem(store="Rimi", title="DVARO pienas 2,5% 1 l"),
+        ScrapedItem(store="Barbora", title="Pienas DVARO 2,5 %, 1 l"),
+        ScrapedItem(store="Lidl", title="DVARO pienas 2,5% 0,5 l"),
+        ScrapedItem(store="Lidl", title="Maggi Magic Asia vištienos skonio 60 g"),
+    ]
+    clusters = sorted(sorted(c) for c in match_products(items))
+    assert clusters == [[0, 1], [2], [3]]
+
+
+def test_oversized_blocks_are_split_not_skipped():
+    items = [
+        ScrapedItem(store="Rimi", title="DVARO pienas 2,5% 1 l"),
+        ScrapedItem(store="Barbora", title="DVARO pienas 2,5%, 1l"),
+        ScrapedItem(store="Rimi", title="MAGIJA pienas 2,5% 1 l"),
+        ScrapedItem(store="Barbora", title="MAGIJA pienas 2,5% 1 l"),
+        ScrapedItem(store="Lidl", title="DVARO pienas 2,5% 0,5 l"),
+    ]
+    clusters = sorted(sorted(c) for c in match_products(items, max_block_size=2))
+    assert clusters == [[0, 1], [2, 3], [4]]
@@ -0,0 +1,32 @@
+from app.metrics import Histogram, Registry, stage_timer, track_job
+
+
+def test_stage_timer_records_job_timings():
+    timings = {}
+    with track_job(timings):
+        with stage_timer("fetch", "Rimi"):
+            pass
+        with stage_timer("sort"):
+            pass
+    assert set(timings) == {"Rimi.fetch", "sort"}
+    with stage_timer("sort"):
+        pass
+    assert set(timings) == {"Rimi.fetch", "sort"}
+
+
+def test_histogram_renders_prometheus_text():
+    registry = Registry()
+    hist = registry.register(Histogram("t_seconds", "Test", ("stage",), buckets=(0.1, 1.0)))
+    hist.observe(0.05, stage="a")
+    hist.observe(0.5, stage="a")
+    text = registry.render()
+    assert 't_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 't_seconds_bucket{stage="a",le="+Inf"} 2' in text
+    assert 't_seconds_count{stage="a"} 2' in text
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    hist = registry.register(Histogram("t_seconds", "Test", ("store",), buckets=(1.0,)))
+    hist.observe(0.5, store='Maxima "XX"\\LT\n')
+    assert 't_seconds_count{store="Maxima \\"XX\\"\\\\LT\\n"} 1' in registry.render()
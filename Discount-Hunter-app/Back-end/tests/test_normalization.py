@@ -0,0 +1,26 @@
+from app.normalization import normalize_results, normalize_title, normalize_words
+from app.records import ScrapedItem
+
+
+def test_normalize_title_folds_lithuanian_and_units():
+    assert normalize_title("ŽEMAITIJOS sūris 500g") == "zemaitijos suris 500 g"
+    assert normalize_title("Kiełbasa ir dešrelės 1,5 kg") == "kielbasa desreles 1.5 kg"
+    assert normalize_title("Mineralinis vanduo 6x0,5 ltr.") == "mineralinis vanduo 6 x 0.5 l"
+    assert normalize_title("Sūrio ﬁlė ５００ g") == "surio file 500 g"
+    assert normalize_title("") == ""
+
+
+def test_normalize_words_matches_folding_the_whole_title():
+    # Words are cached per whitespace chunk; decomposed marks and NBSP still fold
+    assert normalize_words("Pies\u030cnas\u00a0su 2,5% 1234") == ["piesnas", "2.5", "1234"]
+    assert normalize_words("m² 2,5%") == normalize_words("m2 2.5 %")
+
+
+def test_normalize_results_drops_repeated_cards():
+    items = normalize_results([
+        ScrapedItem(store="Rimi", title="Pienas 1 l", price=1.19),
+        ScrapedItem(store="Rimi", title="PIENAS 1l", price=1.19),
+        ScrapedItem(store="Lidl", title="Pienas 1 l", price=1.19),
+    ])
+    assert [i.store for i in items] == ["Rimi", "Lidl"]
+    assert items[0].size == "1 l"
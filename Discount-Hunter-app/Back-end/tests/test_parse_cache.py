@@ -0,0 +1,21 @@
+import pathlib
+
+from app.metrics import PARSE_CACHE
+from app.scrapers.html import parsed_pages
+from app.scrapers.store_rimi import RimiScraper
+
+
+def test_unchanged_grid_reuses_parsed_items():
+    html = (pathlib.Path(__file__).parent / "fixtures" / "rimi_sample.html").read_text(encoding="utf-8")
+    scraper = RimiScraper()
+    parsed_pages.clear()
+    hits = PARSE_CACHE.value(store="Rimi", result="hit")
+
+    first = scraper._parse_html(html, base_url="https://www.rimi.lt")
+    first[0].cluster_id = 7  # pipeline stages mutate items in place
+    # Page chrome outside the grid doesn't change the fingerprint
+    again = scraper._parse_html(html.replace("<body>", "<body><nav>Akcijos</nav>"), base_url="https://www.rimi.lt")
+
+    assert PARSE_CACHE.value(store="Rimi", result="hit") == hits + 1
+    assert [i.title for i in again] == [i.title for i in first]
+    assert again[0].cluster_id is None
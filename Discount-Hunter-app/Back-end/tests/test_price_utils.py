@@ -0,0 +1,51 @@
+from app.services.price_utils import basket_totals, optimize_basket
+from app.records import ScrapedItem
+
+
+def _r(store, price, title=""):
+    return ScrapedItem(store=store, title=title, price=price)
+
+
+def test_basket_totals_picks_cheapest_complete_store():
+    basket = basket_totals({
+        "pienas": [_r("Rimi", 1.19), _r("Rimi", 0.99), _r("Lidl", 1.09)],
+        "sviestas": [_r("Rimi", 2.49), _r("Lidl", 2.19), _r("Barbora", 1.5)],
+    })
+
+    totals = {t["store"]: t for t in basket["stores"]}
+    assert totals["Rimi"]["total"] == 3.48
+    assert totals["Barbora"]["missing"] == ["pienas"]
+    assert basket["cheapest_store"] == "Lidl"
+    assert basket["cheapest_total"] == 3.28
+
+
+def test_basket_prices_only_relevant_results():
+    basket = basket_totals({
+        "pienas 2,5%": [
+            _r("Rimi", 1.19, "Pienas 2,5% 1 l"),
+            _r("Rimi", 0.10, "Maišelis"),
+            _r("Lidl", 0.35, "Pieno šokoladas"),
+            _r("Lidl", 1.09, "Pienas 2,5% 1 l"),
+        ],
+    }, min_relevance=0.6)
+
+    totals = {t["store"]: t["total"] for t in basket["stores"]}
+    assert totals == {"Rimi": 1.19, "Lidl": 1.09}
+
+
+def test_optimize_basket_splits_only_when_it_pays():
+    prices = {
+        "pienas": {"Rimi": 1.0, "Lidl": 1.5},
+        "sviestas": {"Rimi": 3.0, "Lidl": 2.0},
+        "kava": {"Lidl": 5.0},
+    }
+
+    plans = optimize_basket(prices, store_overhead=0.4)
+    assert plans["single"]["stores"] == ["Lidl"]
+    assert plans["single"]["total"] == 8.9
+    assert plans["split"]["stores"] == ["Lidl", "Rimi"]
+    assert plans["split"]["assignment"]["pienas"] == "Rimi"
+    assert plans["split"]["total"] == 8.8
+
+    # A higher overhead makes the second store not worth it
+    assert optimize_basket(prices, store_overhead=1.0)["split"]["stores"] == ["Lidl"]
@@ -0,0 +1,33 @@
+import asyncio
+
+from app.profiling import SamplingProfiler
+
+
+def _busy(seconds):
+    import time
+
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+async def _job(profiler, job_id):
+    async with profiler.job(job_id, force=True):
+        _busy(0.05)
+        await asyncio.sleep(0.05)
+
+
+def test_profiler_writes_collapsed_stacks(tmp_path):
+    profiler = SamplingProfiler(output_dir=tmp_path, interval=0.002)
+    asyncio.run(_job(profiler, "job-1"))
+
+    lines = profiler.path_for("job-1").read_text().splitlines()
+    stacks = {line.rsplit(" ", 1)[0] for line in lines}
+    assert any(stack.endswith("test_profiling.py:_busy") for stack in stacks)
+    assert any(stack.startswith("[waiting];test_profiling.py:_job") for stack in stacks)
+    assert profiler.list_profiles() == [profiler.path_for("job-1")]
+
+
+def test_profiler_start_requires_running_job(tmp_path):
+    profiler = SamplingProfiler(output_dir=tmp_path)
+    assert profiler.start("missing") is False
@@ -0,0 +1,16 @@
+from app.quantity import fill_unit_prices, parse_quantity
+from app.records import ScrapedItem
+
+
+def test_parse_quantity_units_and_multipacks():
+    assert parse_quantity("Pienas 2,5% 1 l") == (1.0, "l", 1)
+    assert parse_quantity("Konservu sriuba 400 g") == (0.4, "kg", 1)
+    assert parse_quantity("Mineralinis vanduo 6x0,5 l") == (3.0, "l", 6)
+    assert parse_quantity("Kiaušiniai M 10 vnt") == (10.0, "vnt", 1)
+    assert parse_quantity("Maggi Magic Asia! Sausis") is None
+
+
+def test_fill_unit_prices():
+    items = fill_unit_prices([ScrapedItem(store="Rimi", title="Sviestas 82% 200 g", price=2.49)])
+    assert items[0].size == "0.2 kg"
+    assert items[0].unit_price == 12.45
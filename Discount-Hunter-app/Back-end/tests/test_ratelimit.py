@@ -0,0 +1,89 @@
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.ratelimit import Rule, SlidingWindowLimiter, get_limiter
+from app.shared import SharedState
+
+
+def test_sliding_window_weighs_the_previous_window():
+    limiter = SlidingWindowLimiter({"scrape": Rule.parse("scrape", "3/minute")})
+    assert [limiter.hit("scrape", "ip:a", now=t) for t in (0, 1, 2)] == [0, 0, 0]
+    assert limiter.hit("scrape", "ip:a", now=3) > 0
+    assert limiter.hit("scrape", "ip:b", now=3) == 0
+    # Halfway through the next window half of the previous 3 still counts
+    assert limiter.hit("scrape", "ip:a", now=90) == 0
+    assert limiter.hit("scrape", "ip:a", now=90) > 0
+    assert limiter.hit("unconfigured", "ip:a", now=90) == 0
+
+
+def test_workers_share_counts_through_the_shared_state(tmp_path):
+    rules = {"scrape": Rule("scrape", 4, 60)}
+    worker_a = SlidingWindowLimiter(rules, SharedState(tmp_path / "state.db", origin=1))
+    worker_b = SlidingWindowLimiter(rules, SharedState(tmp_path / "state.db", origin=2))
+    for _ in range(3):
+        assert worker_a.hit("scrape", "user:7", now=10) == 0
+    worker_a.sync(now=11)
+    worker_b.sync(now=11)
+    assert worker_b.hit("scrape", "user:7", now=12) == 0
+    assert worker_b.hit("scrape", "user:7", now=12) > 0
+
+
+def test_api_returns_429_with_retry_after(monkeypatch):
+    monkeypatch.setitem(get_limiter().rules, "default", Rule("default", 2, 60))
+    monkeypatch.setattr(get_limiter(), "_state", {})
+    client = TestClient(app)
+    assert [client.get("/api/stores").status_code for _ in range(2)] == [200, 200]
+    limited = client.get("/api/stores")
+    assert limited.status_code == 429
+    assert int(limited.headers["retry-after"]) >= 1
+
+
+def test_oversize_batch_is_refused_without_charging(monkeypatch):
+    limiter = get_limiter()
+    monkeypatch.setitem(limiter.rules, "live_scrape", Rule("live_scrape", 10, 60))
+    monkeypatch.setitem(limiter.rules, "cached_scrape", Rule("cached_scrape", 1, 60))
+    monkeypatch.setattr(limiter, "_state", {})
+    monkeypatch.setattr("app.main.needs_live_scrape", lambda query, stores: query.startswith("live"))
+    client = TestClient(app)
+
+    oversize = client.post("/api/scrape/batch", json={"queries": [f"live {i}" for i in range(11)]})
+    assert oversize.status_code == 413
+    assert "retry-after" not in oversize.headers
+
+    # The cached_scrape charge fails, so the live one isn't counted either
+    assert limiter.hit("cached_scrape", "ip:testclient") == 0
+    mixed = client.post("/api/scrape/batch", json={"queries": ["live 1", "cached 1"]})
+    assert mixed.status_code == 429
+    assert limiter.hit_many({"live_scrape": 10}, "ip:testclient") is None
+
+
+def test_failed_sync_keeps_counts_for_the_next_one(tmp_path, monkeypatch):
+    shared = SharedState(tmp_path / "state.db", origin=1)
+    limiter = SlidingWindowLimiter({"scrape": Rule("scrape", 4, 60)}, shared)
+    limiter.hit("scrape", "user:7", now=10)
+
+    def locked(counts):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(shared, "add_rate_counts", locked)
+    with pytest.raises(sqlite3.OperationalError):
+        limiter.sync(now=11)
+    monkeypatch.undo()
+    limiter.hit("scrape", "user:7", now=12)
+    limiter.sync(now=13)
+    other = SharedState(tmp_path / "state.db", origin=2)
+    assert other.rate_counts(since=0) == [("scrape", "user:7", 0, 2)]
+
+
+def test_token_user_is_not_trusted_past_exp(monkeypatch):
+    from app import main
+
+    monkeypatch.setattr(main, "_token_users", {})
+    monkeypatch.setattr(main, "verify_token", lambda token: {"user_id": 7, "exp": 100} if now < 100 else None)
+    now = 50
+    assert main._token_user("t", now=now) == 7
+    now = 100
+    assert main._token_user("t", now=now) is None
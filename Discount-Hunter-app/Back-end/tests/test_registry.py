@@ -0,0 +1,25 @@
+import pytest
+
+from app.config import StoreConfig
+from app.scrapers.registry import StoreRegistry, UnknownStoreError
+
+
+def _config(name, module, cls, **kwargs):
+    return StoreConfig(name=name, scraper=f"app.scrapers.{module}:{cls}", search_url=f"https://{module}/?q={{query}}", **kwargs)
+
+
+def test_registry_selects_enabled_stores_and_loads_lazily():
+    registry = StoreRegistry([
+        _config("Rimi", "store_rimi", "RimiScraper", concurrency=2, wait_ms=4000),
+        _config("Lidl", "store_lidl", "LidlScraper", enabled=False),
+    ], default_concurrency=4)
+
+    assert registry.names() == ["Rimi"]
+    assert registry.select(["rimi", "RIMI"]) == ["Rimi"]
+    with pytest.raises(UnknownStoreError):
+        registry.select(["Lidl"])
+
+    scraper = registry.get("Rimi")
+    assert scraper is registry.get("Rimi")
+    assert scraper.name == "Rimi" and scraper.config.wait_ms == 4000
+    assert registry.limit("Rimi")._value == 2
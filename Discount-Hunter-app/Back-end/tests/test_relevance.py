@@ -0,0 +1,19 @@
+from app.services.relevance import Corpus, query_terms, stem
+
+
+def test_stem_folds_inflections():
+    assert stem("pienas") == stem("pieno") == "pien"
+    assert query_terms("Pieną") == frozenset({"pien"})
+
+
+def test_corpus_ranks_matching_card_first():
+    corpus = Corpus([
+        "Rokiškio pienas 2,5% 1 l 1,19 €",
+        "Sviestas 82% 200 g 2,49 €",
+        "Pieno šokoladas 100 g 1,29 €",
+    ])
+    terms = query_terms("rokiškio pienas")
+    assert corpus.coverage(terms, 0) == 1.0
+    assert corpus.coverage(terms, 1) == 0.0
+    assert 0 < corpus.coverage(terms, 2) < 1
+    assert corpus.score(terms, 0) > corpus.score(terms, 2) > corpus.score(terms, 1)
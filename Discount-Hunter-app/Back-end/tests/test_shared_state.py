@@ -0,0 +1,58 @@
+import asyncio
+import sqlite3
+import threading
+
+from app.records import ScrapedItem
+from app.shared import SharedState
+from app.state import SharedJobStore
+
+
+def test_job_started_on_one_worker_is_served_by_another(tmp_path):
+    path = tmp_path / "state.db"
+    worker_a = SharedJobStore(SharedState(path), poll_interval=0.01)
+    worker_b = SharedJobStore(SharedState(path), poll_interval=0.01)
+
+    async def scenario():
+        await worker_a.create_job("shared-job")
+        seen = await worker_b.get_record("shared-job")
+        assert seen.status == "queued"
+
+        async def finish_soon():
+            await asyncio.sleep(0.05)
+            await worker_a.update_job("shared-job", status="completed", data=[
+                ScrapedItem(store="Rimi", title="Pienas 1 l", price=1.19),
+            ])
+
+        asyncio.create_task(finish_soon())
+        changed = await seen.wait_for_change(5)
+        return seen, changed, await worker_b.get_record("missing-job")
+
+    seen, changed, missing = asyncio.run(scenario())
+    assert changed
+    assert seen.status == "completed"
+    assert seen.data[0].price == 1.19
+    assert seen.version == worker_a._jobs["shared-job"].version
+    assert missing is None
+
+
+def test_writes_wait_for_the_lock_off_the_event_loop(tmp_path):
+    path = tmp_path / "state.db"
+    shared = SharedState(path)
+    store = SharedJobStore(shared, poll_interval=0.01)
+    other_worker = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    shared.connect()
+    other_worker.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.3, other_worker.execute, ("COMMIT",)).start()
+
+    async def scenario():
+        ticks = 0
+        write = asyncio.create_task(store.create_job("locked-job"))
+        while not write.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        await write
+        return ticks
+
+    # The loop keeps running while the write waits ~0.3 s for the lock
+    assert asyncio.run(scenario()) > 10
+    assert shared.load_job("locked-job")["status"] == "queued"
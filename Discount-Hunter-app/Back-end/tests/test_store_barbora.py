@@ -8,4 +8,4 @@ def test_barbora_parsing():
     scraper = BarboraScraper()
     items = scraper._parse_html(html, base_url="https://www.barbora.lt")
     assert items, "No items parsed from Barbora sample"
-    assert any("pieno" in (i.get("title") or "").lower() for i in items)
+    assert any("pieno" in (i.title or "").lower() for i in items)
@@ -8,4 +8,4 @@ def test_lidl_parsing():
     scraper = LidlScraper()
     items = scraper._parse_html(html, base_url="https://www.lidl.lt")
     assert items, "No items parsed from Lidl sample"
-    assert any("sriuba" in (i.get("title") or "").lower() for i in items)
+    assert any("sriuba" in (i.title or "").lower() for i in items)
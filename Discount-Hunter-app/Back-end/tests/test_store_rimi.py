@@ -8,4 +8,4 @@ def test_rimi_parsing():
     scraper = RimiScraper()
     items = scraper._parse_html(html, base_url="https://www.rimi.lt")
     assert items, "No items parsed from Rimi sample"
-    assert any("maggi" in (i.get("title") or "").lower() for i in items)
+    assert any("maggi" in (i.title or "").lower() for i in items)
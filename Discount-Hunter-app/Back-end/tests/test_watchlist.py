@@ -0,0 +1,62 @@
+import asyncio
+
+from app import database
+from app.records import ScrapedItem
+from app.services.watchlist import add_watch, evaluate_watches, list_watches, take_notifications
+
+
+def _add_user(email: str) -> int:
+    conn = database.get_db_connection()
+    cursor = conn.execute(
+        "INSERT INTO users (email, first_name, last_name, hashed_password) VALUES (?, 'A', 'B', 'x')",
+        (email,),
+    )
+    conn.commit()
+    conn.close()
+    return cursor.lastrowid
+
+
+def test_watches_share_one_fetch_and_notify_once_per_drop(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_PATH", tmp_path / "test.db")
+    database.init_db()
+    alice, bob = _add_user("a@example.com"), _add_user("b@example.com")
+    add_watch(alice, "Pienas 1 l", 1.20)
+    add_watch(bob, "pienas 1l", 1.00, stores=["Rimi"])
+
+    fetched = []
+    prices = {"Rimi": 1.15, "Lidl": 0.99}
+
+    async def fetch(query, stores):
+        fetched.append((query, stores))
+        return [
+            ScrapedItem(store=store, title="Pienas 1 l", price=price, normalized_title="pienas 1 l")
+            for store, price in prices.items()
+        ] + [ScrapedItem(store="Lidl", title="Sviestas", price=0.10, normalized_title="sviestas")]
+
+    stats = asyncio.run(evaluate_watches(fetch))
+    assert len(fetched) == 1 and fetched[0][1] is None
+    assert stats == {"watches": 2, "groups": 1, "failed": 0, "notifications": 1}
+    [note] = take_notifications(alice)
+    assert (note["store"], note["price"]) == ("Lidl", 0.99)
+    assert take_notifications(alice) == []
+    assert [w.last_price for w in list_watches(bob)] == [1.15]
+
+    # No new notification until the price drops further
+    assert asyncio.run(evaluate_watches(fetch))["notifications"] == 0
+    prices["Rimi"] = 0.95
+    asyncio.run(evaluate_watches(fetch))
+    assert [n["price"] for n in take_notifications(alice)] == [0.95]
+    assert [n["price"] for n in take_notifications(bob)] == [0.95]
+
+
+def test_deleting_a_user_deletes_their_watches(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_PATH", tmp_path / "test.db")
+    database.init_db()
+    user = _add_user("c@example.com")
+    add_watch(user, "Kava 500 g", 4.0)
+
+    conn = database.get_db_connection()
+    conn.execute("DELETE FROM users WHERE id = ?", (user,))
+    conn.commit()
+    conn.close()
+    assert list_watches(user) == []